@@ -0,0 +1 @@
+"""Performance benchmarks for interrogate. Run from the repository root with python -m."""
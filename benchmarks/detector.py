@@ -0,0 +1,201 @@
+"""
+Micro-benchmark of detect_technologies over the checked-in HTML corpus.
+
+    python -m benchmarks.detector                        # run and print a report
+    python -m benchmarks.detector --save baseline.json   # record a baseline
+    python -m benchmarks.detector --compare baseline.json
+
+With --compare, the run exits 1 if any page's median latency regressed by more than
+--threshold (default 20%) against the baseline.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.interrogate.tech_detector import HTML_PARSERS, detect_technologies
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+# Response headers sent along with every page, as a typical CDN-fronted site would
+HEADERS = {
+    "Server": "nginx/1.25.3",
+    "X-Powered-By": "PHP/8.2.14",
+    "CF-RAY": "84a1b2c3d4e5f607-AMS",
+    "Content-Type": "text/html; charset=utf-8",
+}
+
+
+def load_corpus(names: Optional[List[str]] = None) -> Dict[str, str]:
+    """Return {page name: text} for the corpus files, optionally only those named."""
+    pages = {
+        path.stem: path.read_text(encoding="utf-8")
+        for path in sorted(CORPUS_DIR.iterdir())
+        if path.is_file()
+    }
+    if names:
+        missing = sorted(set(names) - set(pages))
+        if missing:
+            raise ValueError(f"Unknown corpus page(s): {', '.join(missing)}")
+        pages = {name: pages[name] for name in names}
+    return pages
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of samples, fraction in [0, 1]."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def bench_page(
+    body: str, iterations: int, warmup: int, html_parser: str
+) -> Dict[str, float]:
+    """Time detect_technologies on one page and measure its peak allocation."""
+    for _ in range(warmup):
+        detect_technologies(HEADERS, body, html_parser=html_parser)
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        detect_technologies(HEADERS, body, html_parser=html_parser)
+        samples.append(time.perf_counter() - start)
+
+    # Measured separately: tracemalloc slows allocation-heavy code considerably
+    tracemalloc.start()
+    detect_technologies(HEADERS, body, html_parser=html_parser)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(samples)
+    size = len(body.encode("utf-8"))
+    return {
+        "bytes": size,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p90_ms": percentile(samples, 0.90) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "calls_per_s": iterations / total,
+        "mb_per_s": size * iterations / total / 1e6,
+        "peak_kb": peak / 1024,
+    }
+
+
+def run(
+    iterations: int, warmup: int, html_parser: str, pages: Optional[List[str]] = None
+) -> Dict[str, Dict[str, float]]:
+    """Benchmark every corpus page and return {page name: metrics}."""
+    return {
+        name: bench_page(body, iterations, warmup, html_parser)
+        for name, body in load_corpus(pages).items()
+    }
+
+
+def format_report(
+    results: Dict[str, Dict[str, float]],
+    baseline: Optional[Dict[str, Dict[str, float]]] = None,
+) -> str:
+    """Render results as a table, with the p50 change against baseline if given."""
+    header = (
+        f"{'page':<24}{'KB':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+        f"{'calls/s':>10}{'MB/s':>9}{'peak KB':>10}"
+    )
+    if baseline is not None:
+        header += f"{'vs base':>10}"
+    lines = [header, "-" * len(header)]
+    for name, metrics in results.items():
+        line = (
+            f"{name:<24}{metrics['bytes'] / 1024:>8.1f}{metrics['p50_ms']:>10.3f}"
+            f"{metrics['p90_ms']:>10.3f}{metrics['p99_ms']:>10.3f}"
+            f"{metrics['calls_per_s']:>10.1f}{metrics['mb_per_s']:>9.1f}"
+            f"{metrics['peak_kb']:>10.1f}"
+        )
+        if baseline is not None:
+            change = _p50_change(metrics, baseline.get(name))
+            line += f"{'n/a' if change is None else f'{change:+.1%}':>10}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def regressions(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Names of pages whose median latency grew by more than threshold."""
+    return [
+        name
+        for name, metrics in results.items()
+        if (change := _p50_change(metrics, baseline.get(name))) is not None
+        and change > threshold
+    ]
+
+
+def _p50_change(
+    metrics: Dict[str, float], base: Optional[Dict[str, float]]
+) -> Optional[float]:
+    if not base or base.get("p50_ms", 0) <= 0:
+        return None
+    return metrics["p50_ms"] / base["p50_ms"] - 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--parser", choices=HTML_PARSERS, default="fast")
+    parser.add_argument(
+        "--pages", nargs="+", metavar="NAME", help="Corpus pages to run"
+    )
+    parser.add_argument("--save", metavar="PATH", help="Write results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.20,
+        help="Allowed p50 slowdown with --compare (default: 0.20)",
+    )
+    args = parser.parse_args(argv)
+    if args.iterations < 1:
+        parser.error("--iterations must be at least 1")
+
+    try:
+        results = run(args.iterations, args.warmup, args.parser, args.pages)
+    except ValueError as e:
+        parser.error(str(e))
+
+    baseline: Optional[Dict[str, Any]] = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print(format_report(results, baseline))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "python": sys.version.split()[0],
+                    "parser": args.parser,
+                    "iterations": args.iterations,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nBaseline saved to {args.save}")
+
+    if baseline is not None:
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print(f"\nRegressed beyond {args.threshold:.0%}: {', '.join(slower)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+"""
+End-to-end throughput benchmark against a farm of local HTTP servers.
+
+    python -m benchmarks.e2e
+    python -m benchmarks.e2e --hosts 8 --urls 400 --concurrency 1 10 50 100 --headers
+
+Each server is its own host (127.0.0.1 on a separate port) serving robots.txt with an
+optional crawl delay, normal pages, slow trickled responses, 429/503 bursts, redirect
+chains and large bodies. The farm runs in a child process so only the client's own
+sockets are counted. For every engine and concurrency level the report shows URLs/s,
+per-URL latency percentiles (measured around each fetch), errors and open sockets.
+"""
+
+import argparse
+import asyncio
+import gc
+import itertools
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Generator, List, Optional
+from unittest.mock import patch
+
+from src.interrogate import batch
+from src.interrogate.batch import run_batch, run_batch_async
+
+# URL kinds served by every host, with their default share of the workload
+DEFAULT_MIX = {"page": 70, "slow": 5, "flaky": 5, "redirect": 10, "large": 10}
+
+
+class FarmConfig:
+    """Behaviour of every server in the farm."""
+
+    def __init__(
+        self,
+        crawl_delay: float = 0.0,
+        body_kb: int = 30,
+        large_kb: int = 1024,
+        trickle_chunks: int = 10,
+        trickle_delay: float = 0.02,
+        redirect_hops: int = 3,
+        burst_every: int = 10,
+        burst_length: int = 2,
+    ) -> None:
+        self.crawl_delay = crawl_delay
+        self.body_kb = body_kb
+        self.large_kb = large_kb
+        self.trickle_chunks = trickle_chunks
+        self.trickle_delay = trickle_delay
+        self.redirect_hops = redirect_hops
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+
+
+def _page(size_kb: int) -> bytes:
+    """An HTML page of roughly size_kb KB with a few detectable technologies."""
+    head = (
+        "<!DOCTYPE html><html><head>"
+        '<meta name="generator" content="WordPress 6.4.2">'
+        '<script src="https://code.jquery.com/jquery-3.7.1.min.js"></script>'
+        "</head><body>"
+    )
+    filler = "<p>lorem ipsum dolor sit amet, consectetur adipiscing elit</p>\n"
+    count = max(1, size_kb * 1024 // len(filler))
+    return (head + filler * count + "</body></html>").encode()
+
+
+def _make_handler(config: FarmConfig) -> type:
+    page = _page(config.body_kb)
+    large = _page(config.large_kb)
+    robots = b"User-agent: *\nDisallow: /private/\n"
+    if config.crawl_delay > 0:
+        robots += f"Crawl-delay: {config.crawl_delay}\n".encode()
+    flaky_counter = itertools.count()
+    counter_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, so connection pooling shows up
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            path = self.path.split("?", 1)[0]
+            kind = path.strip("/").split("/", 1)[0]
+            if path == "/robots.txt":
+                self._send(200, robots, "text/plain")
+            elif kind == "page":
+                self._send(200, page)
+            elif kind == "large":
+                self._send(200, large)
+            elif kind == "slow":
+                self._trickle(page)
+            elif kind == "flaky":
+                with counter_lock:
+                    n = next(flaky_counter)
+                if n % config.burst_every < config.burst_length:
+                    status = 429 if n % 2 else 503
+                    self._send(status, b"busy", "text/plain", {"Retry-After": "1"})
+                else:
+                    self._send(200, page)
+            elif kind == "redirect":
+                hops = int(path.rsplit("/", 1)[-1] or 0)
+                target = f"/redirect/{hops - 1}" if hops > 1 else "/page/0"
+                self._send(302, b"", "text/plain", {"Location": target})
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def _send(
+            self,
+            status: int,
+            body: bytes,
+            content_type: str = "text/html; charset=utf-8",
+            extra: Optional[Dict[str, str]] = None,
+        ) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Server", "nginx/1.25.3")
+            for name, value in (extra or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _trickle(self, body: bytes) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            step = max(1, len(body) // config.trickle_chunks)
+            for start in range(0, len(body), step):
+                self.wfile.write(body[start : start + step])
+                self.wfile.flush()
+                time.sleep(config.trickle_delay)
+
+    return Handler
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients drop connections mid-body on purpose (body cap, early stop)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _serve_farm(
+    hosts: int, config: FarmConfig, ports: "multiprocessing.Queue[List[int]]"
+) -> None:
+    """Child process entry point: start the servers and report their ports."""
+    handler = _make_handler(config)
+    servers = [_QuietServer(("127.0.0.1", 0), handler) for _ in range(hosts)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    ports.put([server.server_address[1] for server in servers])
+    threading.Event().wait()
+
+
+@contextmanager
+def server_farm(hosts: int, config: FarmConfig) -> Generator[List[str], None, None]:
+    """Run the farm in a child process, yielding the base URL of every host."""
+    context = multiprocessing.get_context("spawn")
+    ports: "multiprocessing.Queue[List[int]]" = context.Queue()
+    process = context.Process(
+        target=_serve_farm, args=(hosts, config, ports), daemon=True
+    )
+    process.start()
+    try:
+        yield [f"http://127.0.0.1:{port}" for port in ports.get(timeout=30)]
+    finally:
+        process.terminate()
+        process.join()
+
+
+def build_urls(
+    bases: List[str], count: int, mix: Dict[str, int], config: FarmConfig, seed: int
+) -> List[str]:
+    """A shuffled workload of count URLs spread over the hosts, following mix."""
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    urls = []
+    for n, kind in enumerate(kinds):
+        base = bases[n % len(bases)]
+        suffix = config.redirect_hops if kind == "redirect" else n
+        urls.append(f"{base}/{kind}/{suffix}")
+    rng.shuffle(urls)
+    return urls
+
+
+def open_sockets() -> Optional[int]:
+    """Sockets currently open in this process, from /proc/self/fd (Linux only)."""
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return None
+    count = 0
+    for fd in fds:
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                count += 1
+        except OSError:
+            continue
+    return count
+
+
+class _SocketSampler:
+    """Samples open_sockets() on a background thread, keeping the peak."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.peak = open_sockets()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "_SocketSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            count = open_sockets()
+            if count is not None and (self.peak is None or count > self.peak):
+                self.peak = count
+
+
+@contextmanager
+def _timed_fetches(latencies: List[float]) -> Generator[None, None, None]:
+    """Record the duration of every fetch the batch runners make."""
+    sync_fetch, async_fetch = batch.fetch_url_info, batch.fetch_url_info_async
+
+    def fetch(url: str, **options: Any) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            return sync_fetch(url, **options)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    async def fetch_async(url: str, **options: Any) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            return await async_fetch(url, **options)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    with (
+        patch.object(batch, "fetch_url_info", fetch),
+        patch.object(batch, "fetch_url_info_async", fetch_async),
+    ):
+        yield
+
+
+def run_level(
+    engine: str, urls: List[str], concurrency: int, options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run one engine at one concurrency level and summarize it."""
+    latencies: List[float] = []
+    with _timed_fetches(latencies), _SocketSampler() as sampler:
+        start = time.perf_counter()
+        if engine == "threads":
+            records = list(run_batch(urls, concurrency=concurrency, **options))
+        else:
+
+            async def collect() -> List[Dict[str, Any]]:
+                return [
+                    record
+                    async for record in run_batch_async(
+                        urls, concurrency=concurrency, **options
+                    )
+                ]
+
+            records = asyncio.run(collect())
+        elapsed = time.perf_counter() - start
+    # Closed connections can linger in reference cycles; only count real leaks
+    gc.collect()
+    errors = sum(1 for record in records if "error" in record)
+    return {
+        "engine": engine,
+        "concurrency": concurrency,
+        "urls_per_s": len(records) / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p90_ms": _percentile(latencies, 0.90) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "errors": errors,
+        "peak_sockets": sampler.peak,
+        "sockets_after": open_sockets(),
+    }
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """Render run_level results as a table."""
+    header = (
+        f"{'engine':<9}{'conc':>6}{'URLs/s':>9}{'p50 ms':>9}{'p90 ms':>9}"
+        f"{'p99 ms':>9}{'errors':>8}{'peak socks':>12}{'socks after':>13}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['engine']:<9}{row['concurrency']:>6}{row['urls_per_s']:>9.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p90_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+            f"{row['errors']:>8}{_na(row['peak_sockets']):>12}"
+            f"{_na(row['sockets_after']):>13}"
+        )
+    return "\n".join(lines)
+
+
+def _na(value: Optional[int]) -> str:
+    return "n/a" if value is None else str(value)
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Parse a workload mix such as "page=80,large=20"."""
+    mix: Dict[str, int] = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown URL kind: {kind}")
+        mix[kind] = int(weight)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("Mix needs at least one positive weight")
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--urls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=("threads", "async"),
+        default=["threads", "async"],
+    )
+    parser.add_argument(
+        "--mix",
+        default=",".join(f"{kind}={weight}" for kind, weight in DEFAULT_MIX.items()),
+        help="URL kinds and weights (default: %(default)s)",
+    )
+    parser.add_argument("--crawl-delay", type=float, default=0.0)
+    parser.add_argument("--body-kb", type=int, default=30)
+    parser.add_argument("--large-kb", type=int, default=1024)
+    parser.add_argument("--trickle-delay", type=float, default=0.02)
+    parser.add_argument("--headers", action="store_true", help="Run tech detection")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    config = FarmConfig(
+        crawl_delay=args.crawl_delay,
+        body_kb=args.body_kb,
+        large_kb=args.large_kb,
+        trickle_delay=args.trickle_delay,
+    )
+    options = {"include_headers": args.headers}
+    rows = []
+    with server_farm(args.hosts, config) as bases:
+        urls = build_urls(bases, args.urls, mix, config, args.seed)
+        for engine, concurrency in itertools.product(args.engines, args.concurrency):
+            rows.append(run_level(engine, urls, concurrency, options))
+            print(format_report(rows[-1:]).splitlines()[-1], file=sys.stderr)
+    print(format_report(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Scaling benchmark of the detection stage across worker counts.
+
+    python -m benchmarks.scaling                         # thread workers, 1..CPU count
+    python -m benchmarks.scaling --mode process --max-workers 8
+
+A fixed batch of corpus pages is pushed through a DetectionPool at each worker count
+and the report shows pages/s, speedup over one worker and parallel efficiency. Thread
+workers only scale on a free-threaded interpreter with the GIL actually disabled, so
+the report header says whether the build is free-threaded and whether the GIL is
+enabled at run time (an extension module without free-threading support re-enables it
+on import; PYTHON_GIL=0 forces it off).
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import sysconfig
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from src.interrogate.detection import DETECTION_MODES, DetectionPool
+
+from .detector import HEADERS, load_corpus
+
+
+def gil_status() -> Dict[str, bool]:
+    """Whether this is a free-threaded build and whether the GIL is enabled right now."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return {
+        "free_threaded_build": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+        "gil_enabled": True if is_gil_enabled is None else is_gil_enabled(),
+    }
+
+
+def worker_counts(max_workers: int) -> List[int]:
+    """Powers of two up to max_workers, always ending with max_workers itself."""
+    counts = []
+    count = 1
+    while count < max_workers:
+        counts.append(count)
+        count *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def build_jobs(pages: Dict[str, str], jobs: int) -> List[bytes]:
+    """Cycle through the corpus pages, encoded, until there are jobs bodies."""
+    bodies = [body.encode("utf-8") for body in pages.values()]
+    return list(itertools.islice(itertools.cycle(bodies), jobs))
+
+
+def run_level(bodies: List[bytes], workers: int, mode: str) -> float:
+    """Seconds to detect every body with a DetectionPool of workers."""
+    with (
+        DetectionPool(workers, mode) as pool,
+        ThreadPoolExecutor(max_workers=workers) as drivers,
+    ):
+
+        def detect(body: bytes) -> None:
+            pool.detect(HEADERS, body)
+
+        # Start every worker (and import the detector in each process) untimed
+        list(drivers.map(detect, bodies[:workers]))
+        start = time.perf_counter()
+        list(drivers.map(detect, bodies))
+        return time.perf_counter() - start
+
+
+def run(
+    bodies: List[bytes], counts: List[int], mode: str
+) -> Dict[int, Dict[str, float]]:
+    """Run every worker count and return {workers: metrics}."""
+    size = sum(len(body) for body in bodies)
+    results: Dict[int, Dict[str, float]] = {}
+    for workers in counts:
+        seconds = run_level(bodies, workers, mode)
+        results[workers] = {"seconds": seconds, "pages_per_s": len(bodies) / seconds}
+        results[workers]["mb_per_s"] = size / seconds / 1e6
+    base = results[counts[0]]["pages_per_s"] / counts[0]
+    for workers, metrics in results.items():
+        metrics["speedup"] = metrics["pages_per_s"] / base
+        metrics["efficiency"] = metrics["speedup"] / workers
+    return results
+
+
+def format_report(
+    results: Dict[int, Dict[str, float]], mode: str, status: Dict[str, bool]
+) -> str:
+    """Render results as a table under a header describing the interpreter."""
+    lines = [
+        f"Python {sys.version.split()[0]}, mode={mode}, cpus={os.cpu_count()}, "
+        f"free-threaded build={status['free_threaded_build']}, "
+        f"GIL enabled={status['gil_enabled']}",
+        "",
+    ]
+    header = (
+        f"{'workers':>8}{'seconds':>10}{'pages/s':>10}{'MB/s':>8}"
+        f"{'speedup':>9}{'efficiency':>12}"
+    )
+    lines += [header, "-" * len(header)]
+    for workers, metrics in results.items():
+        lines.append(
+            f"{workers:>8}{metrics['seconds']:>10.2f}{metrics['pages_per_s']:>10.1f}"
+            f"{metrics['mb_per_s']:>8.1f}{metrics['speedup']:>8.2f}x"
+            f"{metrics['efficiency']:>11.0%}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=DETECTION_MODES, default="thread")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Largest worker count to run (default: CPU count)",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=400, help="Pages detected per worker count"
+    )
+    parser.add_argument(
+        "--pages", nargs="+", metavar="NAME", help="Corpus pages to cycle through"
+    )
+    args = parser.parse_args(argv)
+    if args.max_workers < 1:
+        parser.error("--max-workers must be at least 1")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    try:
+        bodies = build_jobs(load_corpus(args.pages), args.jobs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = run(bodies, worker_counts(args.max_workers), args.mode)
+    # Checked after the run, once every extension module has been imported
+    print(format_report(results, args.mode, gil_status()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,65 @@
 """Command-line interface for interrogate."""
 
 import argparse
+import asyncio
 import json
+import sqlite3
 import sys
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Union
 
+from .batch import (
+    iterate_in_thread,
+    read_url_offsets,
+    read_urls,
+    run_batch,
+    run_batch_async,
+)
+from .checkpoint import Checkpoint
+from .crawler import CrawlSummary, crawl
+from .detection import DETECTION_MODES
 from .fetchers import fetch_url_info
+from .output import NDJSONWriter, parse_fields, project
+from .retry import RetryPolicy
+from .robots import MAX_RAW_OUTPUT, MAX_ROBOTS_SIZE
+from .sitemaps import iter_site_urls
+from .sqlite_sink import SQLiteSink
+from .store import ValidatorStore
+from .timings import TimingsSummary
+from .utils import create_session
+from .validators import validate_url
+
+# Prefix of --output targets naming a SQLite database
+SQLITE_PREFIX = "sqlite:"
+
+RecordWriter = Union[NDJSONWriter, SQLiteSink]
+
+
+def _write_record(
+    record: Dict[str, Any],
+    writer: RecordWriter,
+    summary: Optional[TimingsSummary],
+    checkpoint: Optional[Checkpoint] = None,
+) -> None:
+    """
+    Write one batch record, adding its timings to summary if collecting them and
+    marking its URL done in checkpoint if journaling.
+    """
+    if summary is not None and "timings" in record:
+        summary.add(record["timings"])
+    writer.write(record)
+    if checkpoint is not None:
+        checkpoint.done(record["url"])
+
+
+async def _write_records_async(
+    records: AsyncIterator[Dict[str, Any]],
+    writer: RecordWriter,
+    summary: Optional[TimingsSummary] = None,
+    checkpoint: Optional[Checkpoint] = None,
+) -> None:
+    """Write each record from an async batch run as it completes."""
+    async for record in records:
+        _write_record(record, writer, summary, checkpoint)
 
 
 def main():
@@ -12,7 +67,37 @@ def main():
     parser = argparse.ArgumentParser(
         description="Interrogate a URL for information via CLI, fetching HTTP status, headers, technologies, body preview, and robots.txt parsing."
     )
-    parser.add_argument("--url", required=True, help="The URL to interrogate")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="The URL to interrogate")
+    source.add_argument(
+        "--input",
+        metavar="FILE",
+        help="Interrogate every URL in FILE (one per line, '-' for stdin) and print one JSON object per line",
+    )
+    source.add_argument(
+        "--sitemaps",
+        metavar="SITE",
+        help="Interrogate every page listed in SITE's sitemaps (from its robots.txt, else /sitemap.xml), streaming URLs into the batch scan like --input",
+    )
+    parser.add_argument(
+        "--crawl",
+        action="store_true",
+        help="With --url, crawl the site breadth-first from it, printing one JSON line per page and a technology summary at the end",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Links followed away from the start page with --crawl (default: 2)",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=100,
+        metavar="N",
+        help="Pages fetched at most with --crawl (default: 100)",
+    )
     parser.add_argument(
         "--headers",
         action="store_true",
@@ -28,29 +113,371 @@ def main():
         action="store_true",
         help="Fetch and parse the site's robots.txt file",
     )
+    parser.add_argument(
+        "--robots-max-size",
+        type=int,
+        default=MAX_ROBOTS_SIZE,
+        metavar="BYTES",
+        help=f"Read at most BYTES of each robots.txt; rules past the cap are ignored (default: {MAX_ROBOTS_SIZE})",
+    )
+    parser.add_argument(
+        "--robots-raw-limit",
+        type=int,
+        default=MAX_RAW_OUTPUT,
+        metavar="CHARS",
+        help=f"Cut the robots.txt text in robots_txt.raw to CHARS characters, 0 to leave it out (default: {MAX_RAW_OUTPUT})",
+    )
     parser.add_argument(
         "--all",
         action="store_true",
         help="Include all optional data (headers, body, and robots.txt)",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Number of URLs to interrogate in parallel with --input (default: 10)",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        help="Keep-alive connections kept per host with --input (default: --concurrency)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run --input on the asyncio engine instead of a thread pool, allowing much higher --concurrency",
+    )
+    parser.add_argument(
+        "--detect-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Run technology detection in N worker processes (or threads, see --detect-mode) with --input, so HTML parsing uses every core (default: 0, detect in the fetch workers)",
+    )
+    parser.add_argument(
+        "--detect-mode",
+        choices=DETECTION_MODES,
+        default="process",
+        help="Worker type for --detect-workers: processes, or threads for free-threaded Python builds (default: process)",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Requests made per URL (and per robots.txt) on 429/503 responses, connection errors and timeouts (default: 2)",
+    )
+    parser.add_argument(
+        "--retry-jitter",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Random extra wait of up to SECONDS added to each exponential back-off (default: 0)",
+    )
+    parser.add_argument(
+        "--retry-deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Stop retrying a URL once SECONDS have passed since its first attempt",
+    )
+    parser.add_argument(
+        "--store",
+        metavar="PATH",
+        help="SQLite file keeping robots.txt and page validators between runs; unchanged resources are revalidated with conditional requests",
+    )
+    parser.add_argument(
+        "--head-budget",
+        type=int,
+        metavar="BYTES",
+        help="Detect technologies while the page downloads and stop reading BYTES after </head>; the body preview is cut there too",
+    )
+    parser.add_argument(
+        "--fields",
+        metavar="LIST",
+        help="Comma-separated fields to output, e.g. status_code,technologies ('url' and 'error' are always kept); fetches only what they need",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="TARGET",
+        help="With --input, --sitemaps or --crawl, write results to TARGET instead of stdout: sqlite:PATH upserts them into normalized tables (scans, urls, technologies, headers, robots) of the SQLite file PATH",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="PATH",
+        help="With --input FILE, journal finished URLs and input offsets to PATH so an interrupted run can be continued with --resume",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the run recorded in --checkpoint, skipping URLs it already finished",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Add per-phase durations in milliseconds to each result; with --input, a summary is printed to stderr at the end",
+    )
     args = parser.parse_args()
 
-    include_headers = args.headers or args.all
-    include_body = args.body or args.all
-    include_robots = args.robots or args.all
-
+    if args.crawl and args.url is None:
+        parser.error("--crawl requires --url")
+    if args.crawl and args.use_async:
+        parser.error("--crawl runs on the thread engine and does not support --async")
+    if args.max_depth < 0:
+        parser.error("--max-depth must not be negative")
+    if args.max_pages < 1:
+        parser.error("--max-pages must be at least 1")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.pool_size is not None and args.pool_size < 1:
+        parser.error("--pool-size must be at least 1")
+    if args.detect_workers < 0:
+        parser.error("--detect-workers must not be negative")
+    if args.robots_max_size < 1:
+        parser.error("--robots-max-size must be at least 1")
+    if args.robots_raw_limit < 0:
+        parser.error("--robots-raw-limit must not be negative")
+    if args.head_budget is not None and args.head_budget < 0:
+        parser.error("--head-budget must not be negative")
+    if args.output is not None:
+        if not args.output.startswith(SQLITE_PREFIX) or args.output == SQLITE_PREFIX:
+            parser.error("--output must be sqlite:PATH")
+        if args.url is not None and not args.crawl:
+            parser.error("--output requires --input, --sitemaps or --crawl")
+    if args.checkpoint is not None and args.input in (None, "-"):
+        parser.error("--checkpoint requires --input FILE")
+    if args.resume and args.checkpoint is None:
+        parser.error("--resume requires --checkpoint")
+    if args.sitemaps is not None:
+        try:
+            validate_url(args.sitemaps)
+        except ValueError as e:
+            parser.error(f"--sitemaps: {e}")
     try:
-        result = fetch_url_info(
-            args.url,
-            include_headers=include_headers,
-            include_body=include_body,
-            include_robots=include_robots,
+        retry_policy = RetryPolicy(
+            attempts=args.max_attempts,
+            jitter=args.retry_jitter,
+            deadline=args.retry_deadline,
         )
-        print(json.dumps(result, indent=2))
+    except ValueError as e:
+        parser.error(f"Invalid retry settings: {e}")
+    fields: Optional[List[str]] = None
+    if args.fields is not None:
+        try:
+            fields = parse_fields(args.fields)
+        except ValueError as e:
+            parser.error(f"--fields: {e}")
+
+    # Requested fields switch on what they need; technologies come with headers
+    wanted = set(fields or ())
+    options: Dict[str, Any] = {
+        "include_headers": args.headers
+        or args.all
+        or bool(wanted & {"headers", "technologies"}),
+        "include_body": args.body or args.all or "body" in wanted,
+        "include_robots": args.robots or args.all or "robots_txt" in wanted,
+        "include_timings": args.timings or "timings" in wanted,
+        "retry_policy": retry_policy,
+        "robots_max_size": args.robots_max_size,
+        "robots_raw_limit": args.robots_raw_limit,
+    }
+    if args.head_budget is not None:
+        options["head_budget"] = args.head_budget
+    store = None
+    if args.store is not None:
+        try:
+            store = ValidatorStore(args.store)
+        except sqlite3.Error as e:
+            print(f"Failed to open store: {e}")
+            sys.exit(1)
+        options["store"] = store
+
+    try:
+        if args.crawl:
+            _run_crawl(args, options, fields)
+        elif args.input is not None or args.sitemaps is not None:
+            _run_batch(args, options, fields)
+        else:
+            _run_single(args, options, fields)
+    finally:
+        if store is not None:
+            store.close()
+
+
+def _run_single(
+    args: argparse.Namespace,
+    options: Dict[str, Any],
+    fields: Optional[List[str]],
+) -> None:
+    """Interrogate args.url and pretty-print the result."""
+    try:
+        with create_session() as session:
+            result = fetch_url_info(args.url, session=session, **options)
+        print(json.dumps(project(result, fields), indent=2))
     except ValueError as e:
         print(e)
         sys.exit(1)
 
 
+def _run_batch(
+    args: argparse.Namespace,
+    options: Dict[str, Any],
+    fields: Optional[List[str]],
+) -> None:
+    """
+    Interrogate every URL in args.input, or in args.sitemaps' sitemaps, printing one
+    JSON line per result.
+    """
+    if args.sitemaps is not None:
+        # Sitemaps are downloaded and parsed as the batch pulls URLs from them, which
+        # blocks; the async engine pulls them on a worker thread instead of its loop
+        with create_session() as session:
+            urls = iter_site_urls(
+                args.sitemaps,
+                session=session,
+                policy=options["retry_policy"],
+                on_error=_report_sitemap_error,
+            )
+            _scan(args, options, fields, urls, in_thread=True)
+        return
+    if args.checkpoint is not None:
+        _run_checkpointed(args, options, fields)
+        return
+    try:
+        stream = sys.stdin if args.input == "-" else open(args.input)
+    except OSError as e:
+        print(f"Failed to read input: {e}")
+        sys.exit(1)
+    with stream:
+        _scan(args, options, fields, read_urls(stream))
+
+
+def _run_checkpointed(
+    args: argparse.Namespace,
+    options: Dict[str, Any],
+    fields: Optional[List[str]],
+) -> None:
+    """
+    Interrogate every URL in args.input, journaling progress to args.checkpoint. With
+    args.resume, the input is read from the journal's offset and finished URLs skipped.
+    """
+    try:
+        checkpoint = Checkpoint(args.checkpoint, args.input, resume=args.resume)
+    except (OSError, ValueError) as e:
+        print(f"Failed to open checkpoint: {e}")
+        sys.exit(1)
+    with checkpoint:
+        try:
+            stream = open(args.input, "rb")
+        except OSError as e:
+            print(f"Failed to read input: {e}")
+            sys.exit(1)
+        with stream:
+            stream.seek(checkpoint.offset)
+            urls = checkpoint.pending(read_url_offsets(stream, checkpoint.offset))
+            _scan(args, options, fields, urls, checkpoint)
+
+
+def _run_crawl(
+    args: argparse.Namespace,
+    options: Dict[str, Any],
+    fields: Optional[List[str]],
+) -> None:
+    """Crawl from args.url, printing one JSON line per page, then the crawl summary."""
+    crawl_summary = CrawlSummary()
+    summary = TimingsSummary() if options["include_timings"] else None
+    with _open_writer(args, fields) as writer:
+        try:
+            for record in crawl(
+                args.url,
+                max_depth=args.max_depth,
+                max_pages=args.max_pages,
+                concurrency=args.concurrency,
+                detect_workers=args.detect_workers,
+                detect_mode=args.detect_mode,
+                **options,
+            ):
+                crawl_summary.add(record)
+                _write_record(record, writer, summary)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+    print(json.dumps({"crawl_summary": crawl_summary.as_dict()}))
+    if summary is not None:
+        print(json.dumps({"timings_summary": summary.as_dict()}), file=sys.stderr)
+
+
+def _open_writer(
+    args: argparse.Namespace,
+    fields: Optional[List[str]],
+    on_flush: Optional[Callable[[], None]] = None,
+) -> RecordWriter:
+    """The writer for args.output: a SQLiteSink for sqlite:PATH, else NDJSON on stdout."""
+    if args.output is None:
+        return NDJSONWriter(sys.stdout, fields=fields, on_flush=on_flush)
+    try:
+        return SQLiteSink(
+            args.output[len(SQLITE_PREFIX) :],
+            fields=fields,
+            source=args.input or args.sitemaps or args.url,
+            on_flush=on_flush,
+        )
+    except sqlite3.Error as e:
+        print(f"Failed to open output: {e}")
+        sys.exit(1)
+
+
+def _report_sitemap_error(sitemap_url: str, message: str) -> None:
+    """Report a sitemap that could not be read on stderr and carry on."""
+    print(json.dumps({"sitemap": sitemap_url, "error": message}), file=sys.stderr)
+
+
+def _scan(
+    args: argparse.Namespace,
+    options: Dict[str, Any],
+    fields: Optional[List[str]],
+    urls: Iterator[str],
+    checkpoint: Optional[Checkpoint] = None,
+    in_thread: bool = False,
+) -> None:
+    """
+    Run the batch engine over urls, writing each result to the --output writer and
+    journaling it in checkpoint, if given, once the writer has flushed it. With
+    in_thread, the async engine pulls urls on a worker thread (see iterate_in_thread).
+    """
+    summary = TimingsSummary() if options["include_timings"] else None
+    on_flush = checkpoint.flush if checkpoint is not None else None
+    with _open_writer(args, fields, on_flush) as writer:
+        if args.use_async:
+            asyncio.run(
+                _write_records_async(
+                    run_batch_async(
+                        iterate_in_thread(urls) if in_thread else urls,
+                        concurrency=args.concurrency,
+                        pool_size=args.pool_size,
+                        detect_workers=args.detect_workers,
+                        detect_mode=args.detect_mode,
+                        **options,
+                    ),
+                    writer,
+                    summary,
+                    checkpoint,
+                )
+            )
+        else:
+            for record in run_batch(
+                urls,
+                concurrency=args.concurrency,
+                pool_size=args.pool_size,
+                detect_workers=args.detect_workers,
+                detect_mode=args.detect_mode,
+                **options,
+            ):
+                _write_record(record, writer, summary, checkpoint)
+    if summary is not None:
+        print(json.dumps({"timings_summary": summary.as_dict()}), file=sys.stderr)
+
+
 if __name__ == "__main__":
     main()
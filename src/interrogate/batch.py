@@ -0,0 +1,487 @@
+"""Concurrent interrogation of many URLs."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+import httpx
+import requests
+
+from .detection import DetectionPool
+from .fetchers import fetch_url_info, fetch_url_info_async
+from .robots import RobotsCache, robots_cache_key
+from .scheduler import HostScheduler
+from .utils import create_session
+
+# Upper bound on URLs held back for hosts that are still inside their crawl delay
+MAX_DEFERRED = 10000
+# Hosts whose crawl delay (or lack of one) the dispatcher remembers
+MAX_TRACKED_HOSTS = 10000
+# URLs pulled per trip to the worker thread by iterate_in_thread
+THREAD_CHUNK_SIZE = 256
+
+
+def read_urls(stream: TextIO) -> Iterator[str]:
+    """
+    Yield URLs from a text stream, one per line.
+    Blank lines and lines starting with '#' are skipped.
+    """
+    for line in stream:
+        url = line.strip()
+        if url and not url.startswith("#"):
+            yield url
+
+
+def read_url_offsets(stream: BinaryIO, offset: int = 0) -> Iterator[Tuple[str, int]]:
+    """
+    Like read_urls for a binary stream positioned at byte offset, yielding each URL with
+    the offset just past its line, so a run can later resume from there (see Checkpoint).
+    """
+    for line in stream:
+        offset += len(line)
+        url = line.decode("utf-8", errors="replace").strip()
+        if url and not url.startswith("#"):
+            yield url, offset
+
+
+async def iterate_in_thread(
+    urls: Iterable[str], chunk_size: int = THREAD_CHUNK_SIZE
+) -> AsyncIterator[str]:
+    """
+    Async iterator over urls, pulled chunk_size at a time on a worker thread, for
+    sources that block while producing URLs (like streamed sitemaps) so they do not
+    stall the event loop of run_batch_async.
+    """
+    iterator = iter(urls)
+    while True:
+        chunk: List[str] = await asyncio.to_thread(
+            list, itertools.islice(iterator, chunk_size)
+        )
+        for url in chunk:
+            yield url
+        if len(chunk) < chunk_size:
+            return
+
+
+class _AsyncFeed:
+    """
+    Reads an async iterable of URLs ahead into a buffer of at most size URLs, for the
+    _Dispatcher, which pulls URLs synchronously. While the buffer is empty, next()
+    yields None rather than blocking; wait on arrived to learn when more URLs came in.
+    Errors raised by the source are raised by next() once the buffer is drained.
+    """
+
+    def __init__(self, urls: AsyncIterable[str], size: int) -> None:
+        self._buffer: Deque[str] = deque()
+        self._size = size
+        self._room = asyncio.Event()
+        self._room.set()
+        self.arrived = asyncio.Event()
+        self._task = asyncio.create_task(self._fill(urls))
+
+    def __iter__(self) -> "_AsyncFeed":
+        return self
+
+    def __next__(self) -> Optional[str]:
+        if self._buffer:
+            self._room.set()
+            return self._buffer.popleft()
+        if self._task.done():
+            self._task.result()
+            raise StopIteration
+        self.arrived.clear()
+        return None
+
+    @property
+    def stalled(self) -> bool:
+        """Whether the buffer is empty while the source is still producing."""
+        return not self._buffer and not self._task.done()
+
+    async def _fill(self, urls: AsyncIterable[str]) -> None:
+        try:
+            async for url in urls:
+                self._buffer.append(url)
+                self.arrived.set()
+                if len(self._buffer) >= self._size:
+                    self._room.clear()
+                    await self._room.wait()
+        finally:
+            self.arrived.set()
+
+    async def close(self) -> None:
+        """Stop reading the source."""
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def _host_key(url: str) -> Optional[str]:
+    """url's robots_cache_key, or None if its host or port cannot be parsed."""
+    try:
+        return robots_cache_key(url)
+    except ValueError:
+        return None
+
+
+class _Dispatcher:
+    """
+    Feeds URLs to a batch runner, holding back those whose host is still inside its
+    crawl delay so workers are spent on hosts that can be requested now. Until a host's
+    first URL completes its crawl delay is unknown, so that URL goes out alone; hosts
+    found to have a delay keep one URL in flight, each sent when its slot comes up, so
+    no worker sleeps waiting for a host. Hosts without one are not limited. A None from
+    urls means none is available yet; the next call pulls again.
+    """
+
+    def __init__(self, urls: Iterable[Optional[str]], scheduler: HostScheduler) -> None:
+        self._urls = iter(urls)
+        self._scheduler = scheduler
+        self._deferred: List[Tuple[float, int, str]] = []
+        self._counter = 0
+        self._exhausted = False
+        # Whether each recently seen host is limited to one URL in flight
+        self._limited: OrderedDict[str, bool] = OrderedDict()
+        self._busy: Dict[str, str] = {}  # Limited host -> its URL in flight
+        self._waiting: Dict[str, Deque[str]] = {}  # URLs held back for a busy host
+        self._waiting_count = 0
+        self._released: Deque[str] = deque()
+
+    @property
+    def done(self) -> bool:
+        """True once every URL has been handed out."""
+        return (
+            self._exhausted
+            and not self._deferred
+            and not self._waiting
+            and not self._released
+        )
+
+    def next_ready(self) -> Optional[str]:
+        """Return a URL whose host may be requested now, or None if there is none yet."""
+        now = time.monotonic()
+        while self._deferred and self._deferred[0][0] <= now:
+            url = self._admit(heapq.heappop(self._deferred)[2], now)
+            if url is not None:
+                return url
+        while self._released:
+            url = self._admit(self._released.popleft(), now)
+            if url is not None:
+                return url
+        while (
+            not self._exhausted
+            and len(self._deferred) + self._waiting_count < MAX_DEFERRED
+        ):
+            try:
+                url = next(self._urls)
+            except StopIteration:
+                self._exhausted = True
+                break
+            if url is None:
+                break
+            url = self._admit(url, now)
+            if url is not None:
+                return url
+        return None
+
+    def completed(self, url: str) -> None:
+        """Report that url finished, letting the next URL for its host go out."""
+        host = _host_key(url)
+        if host is None or self._busy.get(host) != url:
+            return
+        del self._busy[host]
+        # A host that reserved a slot (or backed off) has a delay to honour
+        limited = self._scheduler.ready_at(host) > 0
+        self._limited[host] = limited
+        self._limited.move_to_end(host)
+        if len(self._limited) > MAX_TRACKED_HOSTS:
+            self._limited.popitem(last=False)
+        waiting = self._waiting.get(host)
+        if not waiting:
+            return
+        if limited:
+            self._released.append(waiting.popleft())
+            self._waiting_count -= 1
+            if waiting:
+                return
+        else:
+            self._released.extend(waiting)
+            self._waiting_count -= len(waiting)
+        del self._waiting[host]
+
+    def wait_time(self) -> Optional[float]:
+        """Seconds until the earliest held-back URL is ready, or None if none is held."""
+        if not self._deferred:
+            return None
+        return max(0.0, self._deferred[0][0] - time.monotonic())
+
+    def _admit(self, url: str, now: float) -> Optional[str]:
+        """Return url if it can go out now, else hold it back and return None."""
+        host = _host_key(url)
+        if host is None:
+            return url  # Unparseable: sent straight on so its fetch reports the error
+        if host in self._busy:
+            self._waiting.setdefault(host, deque()).append(url)
+            self._waiting_count += 1
+            return None
+        ready_at = self._scheduler.ready_at(host)
+        if ready_at > now:
+            heapq.heappush(self._deferred, (ready_at, self._counter, url))
+            self._counter += 1
+            return None
+        if self._limited.get(host, True):
+            self._busy[host] = url
+        return url
+
+
+def interrogate_url(url: str, **options: Any) -> Dict[str, Any]:
+    """
+    Run fetch_url_info for a single URL and return a result record.
+    The record always includes the input 'url'; failures are reported as {"url", "error"}.
+    """
+    try:
+        result = fetch_url_info(url, **options)
+    except ValueError as e:
+        return {"url": url, "error": str(e)}
+    return {"url": url, **result}
+
+
+async def interrogate_url_async(
+    url: str, client: httpx.AsyncClient, **options: Any
+) -> Dict[str, Any]:
+    """Async variant of interrogate_url sharing the given httpx.AsyncClient."""
+    try:
+        result = await fetch_url_info_async(url, client=client, **options)
+    except ValueError as e:
+        return {"url": url, "error": str(e)}
+    return {"url": url, **result}
+
+
+def run_batch(
+    urls: Iterable[str],
+    concurrency: int = 10,
+    session: Optional[requests.Session] = None,
+    pool_size: Optional[int] = None,
+    robots_cache: Optional[RobotsCache] = None,
+    scheduler: Optional[HostScheduler] = None,
+    detect_workers: int = 0,
+    detect_mode: str = "process",
+    **options: Any,
+) -> Generator[Dict[str, Any], None, None]:
+    """
+    Interrogate URLs on a bounded thread pool, yielding each record as soon as it completes.
+    Input is consumed lazily: at most 2 * concurrency URLs are in flight at once, so
+    arbitrarily long URL lists run in constant memory. All workers share one
+    requests.Session (created here unless given) keeping pool_size connections alive per
+    host, defaulting to concurrency, and one RobotsCache so each origin's robots.txt is
+    fetched once. Crawl delays are enforced per host by a HostScheduler: URLs for a host
+    that is cooling down (or whose delay is not known yet) are held back while other
+    hosts keep flowing. With detect_workers, technology detection runs in a
+    DetectionPool of that many workers (processes, or threads with detect_mode="thread")
+    for the duration of the run, so fetch threads spend their time waiting on the
+    network. Extra keyword arguments are passed to fetch_url_info.
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+
+    if detect_workers:
+        with DetectionPool(detect_workers, detect_mode) as detection_pool:
+            yield from run_batch(
+                urls,
+                concurrency,
+                session=session,
+                pool_size=pool_size,
+                robots_cache=robots_cache,
+                scheduler=scheduler,
+                detection_pool=detection_pool,
+                **options,
+            )
+        return
+
+    if session is None:
+        with create_session(
+            pool_connections=concurrency, pool_maxsize=pool_size or concurrency
+        ) as own_session:
+            yield from run_batch(
+                urls,
+                concurrency,
+                session=own_session,
+                robots_cache=robots_cache,
+                scheduler=scheduler,
+                **options,
+            )
+        return
+    if robots_cache is None:
+        robots_cache = RobotsCache()
+    if scheduler is None:
+        scheduler = HostScheduler()
+
+    dispatcher = _Dispatcher(urls, scheduler)
+    max_in_flight = concurrency * 2
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending: Set[Future[Dict[str, Any]]] = set()
+    try:
+        while True:
+            while len(pending) < max_in_flight:
+                url = dispatcher.next_ready()
+                if url is None:
+                    break
+                pending.add(
+                    executor.submit(
+                        interrogate_url,
+                        url,
+                        session=session,
+                        robots_cache=robots_cache,
+                        scheduler=scheduler,
+                        **options,
+                    )
+                )
+            if not pending:
+                if dispatcher.done:
+                    break
+                time.sleep(dispatcher.wait_time() or 0.0)
+                continue
+            # With no room for a held-back URL there is nothing to wake up for
+            timeout = dispatcher.wait_time() if len(pending) < max_in_flight else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                dispatcher.completed(record["url"])
+                yield record
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def run_batch_async(
+    urls: Union[Iterable[str], AsyncIterable[str]],
+    concurrency: int = 100,
+    client: Optional[httpx.AsyncClient] = None,
+    pool_size: Optional[int] = None,
+    robots_cache: Optional[RobotsCache] = None,
+    scheduler: Optional[HostScheduler] = None,
+    detect_workers: int = 0,
+    detect_mode: str = "process",
+    **options: Any,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Interrogate URLs on a single event loop, yielding each record as soon as it completes.
+    At most `concurrency` requests are in flight, all sharing one httpx.AsyncClient
+    (created here unless given, keeping pool_size idle connections alive), so thousands
+    of concurrent fetches need no extra threads, and one RobotsCache. Crawl delays are
+    enforced per host by a HostScheduler as in run_batch, and detect_workers and
+    detect_mode move detection into a worker pool as in run_batch. urls may be an async
+    iterable, read ahead as the batch needs URLs; wrap sources that block in
+    iterate_in_thread. Extra keyword arguments are passed to fetch_url_info_async.
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+
+    if detect_workers:
+        with DetectionPool(detect_workers, detect_mode) as detection_pool:
+            async for record in run_batch_async(
+                urls,
+                concurrency,
+                client=client,
+                pool_size=pool_size,
+                robots_cache=robots_cache,
+                scheduler=scheduler,
+                detection_pool=detection_pool,
+                **options,
+            ):
+                yield record
+        return
+
+    if client is None:
+        limits = httpx.Limits(
+            max_connections=concurrency,
+            max_keepalive_connections=pool_size or concurrency,
+        )
+        async with httpx.AsyncClient(limits=limits) as own_client:
+            async for record in run_batch_async(
+                urls,
+                concurrency,
+                client=own_client,
+                robots_cache=robots_cache,
+                scheduler=scheduler,
+                **options,
+            ):
+                yield record
+        return
+    if robots_cache is None:
+        robots_cache = RobotsCache()
+    if scheduler is None:
+        scheduler = HostScheduler()
+
+    feed = None
+    source: Iterable[Optional[str]]
+    if isinstance(urls, AsyncIterable):
+        feed = source = _AsyncFeed(urls, MAX_DEFERRED)
+    else:
+        source = urls
+    dispatcher = _Dispatcher(source, scheduler)
+    pending: Set[asyncio.Task[Dict[str, Any]]] = set()
+    try:
+        while True:
+            while len(pending) < concurrency:
+                url = dispatcher.next_ready()
+                if url is None:
+                    break
+                pending.add(
+                    asyncio.create_task(
+                        interrogate_url_async(
+                            url,
+                            client,
+                            robots_cache=robots_cache,
+                            scheduler=scheduler,
+                            **options,
+                        )
+                    )
+                )
+            if not pending and dispatcher.done:
+                break
+            timeout = dispatcher.wait_time() if len(pending) < concurrency else None
+            # With room for more, also wake up when the feed brings new URLs
+            waiters: Set[asyncio.Future[Any]] = set(pending)
+            arrival = None
+            if feed is not None and feed.stalled and len(pending) < concurrency:
+                arrival = asyncio.ensure_future(feed.arrived.wait())
+                waiters.add(arrival)
+            if not waiters:
+                await asyncio.sleep(timeout or 0.0)
+                continue
+            done, _ = await asyncio.wait(
+                waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if arrival is not None:
+                arrival.cancel()
+                done.discard(arrival)
+            pending -= done
+            for task in done:
+                record = task.result()
+                dispatcher.completed(record["url"])
+                yield record
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if feed is not None:
+            await feed.close()
@@ -0,0 +1,62 @@
+"""Bounded buffer for streamed response bodies."""
+
+from collections.abc import Buffer
+from typing import Mapping, Optional
+
+
+class BodyBuffer:
+    """
+    Collects a streamed body up to max_size bytes in a single bytearray. Chunks are
+    copied in place through a memoryview, so reading up to the cap is linear in the
+    bytes kept. The buffer starts at the Content-Length hint (or the cap when unknown)
+    and only grows, by doubling, if the server sends more than it announced.
+    """
+
+    def __init__(self, max_size: int, size_hint: Optional[int] = None) -> None:
+        if max_size < 0:
+            raise ValueError("Body size cap must not be negative")
+        self.max_size = max_size
+        capacity = max_size if size_hint is None else min(max(size_hint, 0), max_size)
+        self._buffer = bytearray(capacity)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def full(self) -> bool:
+        """True once max_size bytes have been kept; later data would be dropped."""
+        return self._length >= self.max_size
+
+    def write(self, chunk: Buffer) -> bool:
+        """
+        Append as much of chunk as fits under the cap.
+        Returns True when the buffer is full and reading can stop.
+        """
+        data = memoryview(chunk)
+        end = min(self._length + data.nbytes, self.max_size)
+        if end > len(self._buffer):
+            self._grow(end)
+        count = end - self._length
+        with memoryview(self._buffer) as view:
+            view[self._length : end] = data[:count]
+        self._length = end
+        return self.full
+
+    def getvalue(self) -> bytearray:
+        """Return the collected bytes, trimming the buffer in place instead of copying."""
+        del self._buffer[self._length :]
+        return self._buffer
+
+    def _grow(self, needed: int) -> None:
+        capacity = min(max(needed, len(self._buffer) * 2), self.max_size)
+        self._buffer.extend(bytes(capacity - len(self._buffer)))
+
+
+def content_length(headers: Mapping[str, str]) -> Optional[int]:
+    """Return the Content-Length header as an int, or None if missing or invalid."""
+    try:
+        value = headers.get("Content-Length")
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
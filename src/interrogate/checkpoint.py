@@ -0,0 +1,125 @@
+"""Append-only checkpoint journal letting long batch runs resume where they stopped."""
+
+import hashlib
+import os
+from collections import deque
+from typing import Deque, Dict, IO, Iterable, Iterator, List, Set, Tuple
+
+# First line of a journal, followed by the absolute path of the input it tracks
+_HEADER = "interrogate-checkpoint 1"
+
+
+def url_hash(url: str) -> int:
+    """64-bit hash identifying url in a journal."""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest())
+
+
+class Checkpoint:
+    """
+    Journal of a batch run over an input file. Each completed URL is appended as
+    "d <hash>", and at every flush the input offset before which all URLs are complete
+    as "o <offset>". With resume=True an existing journal for the same input is loaded,
+    so the run can seek past offset and skip the other finished URLs with one set
+    lookup each, without reading earlier output; otherwise the journal starts afresh.
+    Entries are only written by flush, which callers run after their output is flushed
+    (see the writers' on_flush), so a crash may repeat a few URLs but never loses one.
+    Use from one thread. Raises ValueError if the journal belongs to another input.
+    """
+
+    def __init__(self, path: str, source: str, resume: bool = False) -> None:
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.offset = 0
+        self.skipped = 0
+        self._done: Set[int] = set()
+        if resume and os.path.exists(path):
+            self._load()
+            self._file: IO[str] = open(path, "a", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+            self._file.write(f"{_HEADER} {self.source}\n")
+            self._file.flush()
+        self._lines: List[str] = []
+        self._written_offset = self.offset
+        # Sequence numbers of URLs handed out but not completed, by URL
+        self._in_flight: Dict[str, Deque[int]] = {}
+        self._ends: Dict[int, int] = {}  # Input offset past each URL not yet passed
+        self._completed: Set[int] = set()  # Completed beyond the first incomplete URL
+        self._next_seq = 0
+        self._low_seq = 0
+
+    def __enter__(self) -> "Checkpoint":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __contains__(self, url: str) -> bool:
+        return url_hash(url) in self._done
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as journal:
+            header = journal.readline().rstrip("\n")
+            if not header.startswith(_HEADER + " "):
+                raise ValueError(f"Not a checkpoint journal: {self.path}")
+            source = header[len(_HEADER) + 1 :]
+            if source != self.source:
+                raise ValueError(f"Checkpoint {self.path} is for {source}")
+            for line in journal:
+                kind, _, value = line.rstrip("\n").partition(" ")
+                try:
+                    if kind == "d":
+                        self._done.add(int(value, 16))
+                    elif kind == "o":
+                        self.offset = int(value)
+                except ValueError:
+                    continue  # A line torn by a crash
+
+    def pending(self, urls: Iterable[Tuple[str, int]]) -> Iterator[str]:
+        """
+        The URLs of (url, end offset) pairs, as from read_url_offsets, that are not
+        complete yet. Report each yielded URL's completion with done.
+        """
+        for url, end in urls:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._ends[seq] = end
+            if url in self:
+                self.skipped += 1
+                self._complete(seq)
+                continue
+            self._in_flight.setdefault(url, deque()).append(seq)
+            yield url
+
+    def done(self, url: str) -> None:
+        """Record url as complete."""
+        key = url_hash(url)
+        self._done.add(key)
+        self._lines.append(f"d {key:016x}\n")
+        seqs = self._in_flight.get(url)
+        if seqs:
+            self._complete(seqs.popleft())
+            if not seqs:
+                del self._in_flight[url]
+
+    def _complete(self, seq: int) -> None:
+        self._completed.add(seq)
+        while self._low_seq in self._completed:
+            self._completed.remove(self._low_seq)
+            self.offset = self._ends.pop(self._low_seq)
+            self._low_seq += 1
+
+    def flush(self) -> None:
+        """Append the entries recorded since the last flush to the journal."""
+        if self.offset != self._written_offset:
+            self._lines.append(f"o {self.offset}\n")
+            self._written_offset = self.offset
+        if self._lines:
+            self._file.write("".join(self._lines))
+            self._lines.clear()
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the journal."""
+        self.flush()
+        self._file.close()
@@ -0,0 +1,358 @@
+"""Breadth-first site crawl with a bounded frontier, URL dedup and robots.txt enforcement."""
+
+import hashlib
+import math
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+
+import requests
+from lxml import etree
+
+from .batch import run_batch
+from .detection import DetectionPool
+from .retry import RetryPolicy
+from .robots import (
+    DEFAULT_PORTS,
+    MAX_ROBOTS_SIZE,
+    RobotsCache,
+    fetch_robots_txt,
+    robots_cache_key,
+)
+from .robots_rules import robots_rules
+from .scheduler import HostScheduler
+from .utils import USER_AGENT, create_session
+from .validators import validate_url
+
+# Links to these are never HTML pages, so they are not worth a request
+_SKIPPED_EXTENSIONS = (
+    ".css",
+    ".js",
+    ".json",
+    ".xml",
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".svg",
+    ".webp",
+    ".ico",
+    ".pdf",
+    ".zip",
+    ".gz",
+    ".mp3",
+    ".mp4",
+    ".woff",
+    ".woff2",
+)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of url for deduplication: fragment and credentials dropped, scheme
+    and host lowercased, default port removed and an empty path made "/".
+    Raises ValueError on an invalid port.
+    """
+    parts = urlsplit(urldefrag(url)[0])
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings that may report a string it has not seen (with probability
+    about error_rate once capacity strings were added) but never misses one it has.
+    Memory is allocated once, about 1.8 bytes per capacity entry at a 0.1% error rate,
+    however long the strings are.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add item; return True if it was not (as far as the filter can tell) present."""
+        added = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self._bits[p >> 3] & mask:
+                self._bits[p >> 3] |= mask
+                added = True
+        return added
+
+
+class _LinkCollector:
+    """lxml parser target collecting <a>/<area> hrefs and the first <base> href."""
+
+    def __init__(self) -> None:
+        self.base: Optional[str] = None
+        self.hrefs: List[str] = []
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag in ("a", "area") and "href" in attrib:
+            self.hrefs.append(attrib["href"])
+        elif tag == "base" and self.base is None and "href" in attrib:
+            self.base = attrib["href"]
+
+    def close(self) -> None:
+        pass
+
+
+def extract_links(html: str, page_url: str) -> List[str]:
+    """
+    Absolute, normalized http(s) links of an HTML page, in document order, skipping
+    obvious non-page resources (images, scripts, archives...).
+    """
+    collector = _LinkCollector()
+    parser = etree.HTMLParser(target=collector)
+    try:
+        parser.feed(html)
+        parser.close()
+    except etree.LxmlError:
+        pass  # Keep whatever was collected before the error
+    base = urljoin(page_url, collector.base) if collector.base else page_url
+    links = []
+    for href in collector.hrefs:
+        try:
+            link = normalize_url(urljoin(base, href.strip()))
+        except ValueError:
+            continue
+        parts = urlsplit(link)
+        if parts.scheme not in DEFAULT_PORTS:
+            continue
+        if parts.path.lower().endswith(_SKIPPED_EXTENSIONS):
+            continue
+        links.append(link)
+    return links
+
+
+class CrawlSummary:
+    """
+    Technologies aggregated over the pages of a crawl. Each technology lists the versions
+    seen, on how many pages it was detected, the first page it was seen on, and whether
+    the start page shows it, so a CMS only visible on sub-paths stands out.
+    """
+
+    def __init__(self) -> None:
+        self.pages = 0
+        self.errors = 0
+        self._technologies: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Add one crawl record (see crawl)."""
+        if "error" in record:
+            self.errors += 1
+            return
+        self.pages += 1
+        for tech in record.get("technologies", ()):
+            entry = self._technologies.setdefault(
+                tech["name"],
+                {
+                    "versions": set(),
+                    "pages": 0,
+                    "first_url": record["url"],
+                    "on_start_page": False,
+                },
+            )
+            entry["pages"] += 1
+            if tech.get("version"):
+                entry["versions"].add(tech["version"])
+            if record.get("depth") == 0:
+                entry["on_start_page"] = True
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Page counts and technologies, most widespread first."""
+        technologies: List[Dict[str, Any]] = [
+            {"name": name, **entry, "versions": sorted(entry["versions"])}
+            for name, entry in self._technologies.items()
+        ]
+        technologies.sort(key=_by_prevalence)
+        return {
+            "pages": self.pages,
+            "errors": self.errors,
+            "technologies": technologies,
+        }
+
+
+def _by_prevalence(tech: Dict[str, Any]) -> Tuple[int, str]:
+    """Sort key for summary technologies: seen on the most pages first, then by name."""
+    pages: int = tech["pages"]
+    name: str = tech["name"]
+    return -pages, name
+
+
+class _Frontier:
+    """
+    BFS state of a crawl: the current level of URLs, the next one being discovered, and
+    the seen filter. Links for which allowed returns False are never queued, and at most
+    max_pages URLs are, which bounds both levels.
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        max_depth: int,
+        max_pages: int,
+        allowed: Callable[[str], bool],
+    ) -> None:
+        start = normalize_url(start_url)
+        self.allowed = allowed
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.depth = 0
+        self.level = [start]
+        self.origins: Set[str] = {robots_cache_key(start)}
+        self.queued = 1
+        # Room for the final URL of every queued page as well
+        self._seen = BloomFilter(2 * max_pages)
+        self._seen.add(start)
+        self._next: List[str] = []
+
+    def discover(self, record: Dict[str, Any], html: Optional[str]) -> None:
+        """Queue the in-scope links of a fetched page for the next level."""
+        final_url = record.get("final_url")
+        if final_url:
+            final_url = normalize_url(final_url)
+            self._seen.add(final_url)
+            if self.depth == 0:
+                # Follow a redirected start page, e.g. to www. or https
+                self.origins.add(robots_cache_key(final_url))
+        if html is None or self.depth >= self.max_depth:
+            return
+        for link in extract_links(html, final_url or record["url"]):
+            if self.queued >= self.max_pages:
+                return
+            if robots_cache_key(link) not in self.origins or link in self._seen:
+                continue
+            if self.allowed(link):
+                self._seen.add(link)
+                self._next.append(link)
+                self.queued += 1
+
+    def advance(self) -> None:
+        """Move on to the next level."""
+        self.level, self._next = self._next, []
+        self.depth += 1
+
+
+def crawl(
+    start_url: str,
+    max_depth: int = 2,
+    max_pages: int = 100,
+    concurrency: int = 10,
+    session: Optional[requests.Session] = None,
+    robots_cache: Optional[RobotsCache] = None,
+    scheduler: Optional[HostScheduler] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    include_body: bool = False,
+    detect_workers: int = 0,
+    detect_mode: str = "process",
+    **options: Any,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Crawl start_url's site breadth-first, yielding a batch record (see batch.run_batch)
+    with its "depth" for every page as it completes. Links are followed from HTML pages
+    on the start URL's origin (and the one it redirects to) up to max_depth clicks from
+    the start, until max_pages pages were queued; each level is fetched with run_batch,
+    sharing one session, robots cache and host scheduler, so crawl delays apply. URLs
+    are normalized and deduplicated with a BloomFilter sized from max_pages, so memory
+    stays bounded on huge sites; its rare false positives skip a page. Links robots.txt
+    disallows for our user agent (see robots_rules) are not queued. Bodies are fetched
+    to find links and dropped from the records unless include_body is set.
+    detect_workers and detect_mode start one DetectionPool for the whole crawl. Extra
+    keyword arguments are passed to fetch_url_info. Raises ValueError on an invalid start URL or budget.
+    """
+    validate_url(start_url)
+    if max_depth < 0:
+        raise ValueError("max_depth must not be negative")
+    if max_pages < 1:
+        raise ValueError("max_pages must be at least 1")
+
+    if detect_workers:
+        with DetectionPool(detect_workers, detect_mode) as detection_pool:
+            yield from crawl(
+                start_url,
+                max_depth,
+                max_pages,
+                concurrency,
+                session=session,
+                robots_cache=robots_cache,
+                scheduler=scheduler,
+                retry_policy=retry_policy,
+                include_body=include_body,
+                detection_pool=detection_pool,
+                **options,
+            )
+        return
+    if session is None:
+        with create_session(
+            pool_connections=concurrency, pool_maxsize=concurrency
+        ) as own_session:
+            yield from crawl(
+                start_url,
+                max_depth,
+                max_pages,
+                concurrency,
+                session=own_session,
+                robots_cache=robots_cache,
+                scheduler=scheduler,
+                retry_policy=retry_policy,
+                include_body=include_body,
+                **options,
+            )
+        return
+    if robots_cache is None:
+        robots_cache = RobotsCache()
+    if scheduler is None:
+        scheduler = HostScheduler()
+
+    def allowed(url: str) -> bool:
+        robots_info = fetch_robots_txt(
+            url,
+            session=session,
+            cache=robots_cache,
+            policy=retry_policy,
+            max_size=options.get("robots_max_size", MAX_ROBOTS_SIZE),
+        )
+        rules = robots_rules(robots_info)
+        return rules is None or rules.is_allowed(USER_AGENT, url)
+
+    if not allowed(start_url):
+        yield {"url": start_url, "depth": 0, "error": "Disallowed by robots.txt"}
+        return
+    frontier = _Frontier(start_url, max_depth, max_pages, allowed)
+    while frontier.level:
+        for record in run_batch(
+            frontier.level,
+            concurrency,
+            session=session,
+            robots_cache=robots_cache,
+            scheduler=scheduler,
+            retry_policy=retry_policy,
+            include_body=True,
+            **options,
+        ):
+            html = record.get("body") if include_body else record.pop("body", None)
+            frontier.discover(record, html)
+            record["depth"] = frontier.depth
+            yield record
+        frontier.advance()
@@ -0,0 +1,123 @@
+"""Worker-pool stage running CPU-bound technology detection off the fetch workers."""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .tech_detector import detect_technologies
+from .timings import Timings, measure
+
+# "process" works around the GIL; "thread" scales on free-threaded builds without
+# copying bodies between processes
+DETECTION_MODES = ("process", "thread")
+
+# Phases measured in the worker and copied into the caller's Timings
+WORKER_PHASES = ("decode", "html_parse", "signature_match")
+
+Technologies = List[Dict[str, Optional[str]]]
+
+
+def _detect_content(
+    headers: Dict[str, str],
+    content: Union[bytes, bytearray],
+    robots_txt: Optional[Dict[str, Any]],
+    timed: bool,
+) -> Tuple[Technologies, Optional[Dict[str, float]]]:
+    """Worker entry point: decode the raw body and detect technologies."""
+    timings = Timings() if timed else None
+    with measure(timings, "decode"):
+        body = content.decode("utf-8", errors="ignore")
+    technologies = detect_technologies(headers, body, robots_txt, timings=timings)
+    return technologies, timings.as_dict() if timings is not None else None
+
+
+class DetectionPool:
+    """
+    Runs detect_technologies in worker processes or threads (see DETECTION_MODES) so HTML
+    parsing and signature matching use every core while threads or the event loop keep
+    fetching. Workers receive the raw body bytes and decode them themselves, and send
+    back only the technology list, so each page crosses the process boundary once.
+    Processes are started with "spawn", which is safe to use from a threaded parent,
+    and do not emit tracer spans. Threads share the caller's memory and tracer, and
+    only run in parallel on a free-threaded interpreter.
+    """
+
+    def __init__(self, workers: int, mode: str = "process") -> None:
+        if workers < 1:
+            raise ValueError("Detection workers must be at least 1")
+        if mode not in DETECTION_MODES:
+            raise ValueError(f"Unknown detection mode: {mode}")
+        self.workers = workers
+        self.mode = mode
+        self._executor: Executor
+        if mode == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="detect"
+            )
+        else:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def __enter__(self) -> "DetectionPool":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def detect(
+        self,
+        headers: Dict[str, str],
+        content: Union[bytes, bytearray],
+        robots_txt: Optional[Dict[str, Any]] = None,
+        timings: Optional[Timings] = None,
+    ) -> Technologies:
+        """Detect technologies from the raw body in a worker, blocking until done."""
+        future = self._executor.submit(
+            _detect_content, *_job(headers, content, robots_txt, timings)
+        )
+        return _unpack(future.result(), timings)
+
+    async def detect_async(
+        self,
+        headers: Dict[str, str],
+        content: Union[bytes, bytearray],
+        robots_txt: Optional[Dict[str, Any]] = None,
+        timings: Optional[Timings] = None,
+    ) -> Technologies:
+        """Async variant of detect that waits without blocking the event loop."""
+        future = self._executor.submit(
+            _detect_content, *_job(headers, content, robots_txt, timings)
+        )
+        return _unpack(await asyncio.wrap_future(future), timings)
+
+    def close(self) -> None:
+        """Wait for running detections and stop the workers."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _job(
+    headers: Dict[str, str],
+    content: Union[bytes, bytearray],
+    robots_txt: Optional[Dict[str, Any]],
+    timings: Optional[Timings],
+) -> Tuple[Dict[str, str], Union[bytes, bytearray], Optional[Dict[str, Any]], bool]:
+    """Arguments for _detect_content, keeping only what detection reads."""
+    # Only robots "content" is used by detection; the parsed rules stay here
+    robots = None
+    if robots_txt and "content" in robots_txt:
+        robots = {"content": robots_txt["content"]}
+    return headers, content, robots, timings is not None
+
+
+def _unpack(
+    outcome: Tuple[Technologies, Optional[Dict[str, float]]],
+    timings: Optional[Timings],
+) -> Technologies:
+    """Return the technologies, adding the worker's phase durations to timings."""
+    technologies, worker_timings = outcome
+    if timings is not None and worker_timings is not None:
+        for phase in WORKER_PHASES:
+            timings.add(phase, worker_timings[phase] / 1000)
+    return technologies
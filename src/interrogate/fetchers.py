@@ -1,10 +1,31 @@
-from typing import Dict, Any
+from typing import AsyncIterator, Callable, Dict, Any, Iterable, List, Optional, Union
+import asyncio
+import httpx
 import requests
 import time
 from .validators import validate_url
-from .tech_detector import detect_technologies
-from .robots import fetch_robots_txt
-from .utils import retry_get
+from .buffer import BodyBuffer, content_length
+from .detection import DetectionPool
+from .tech_detector import IncrementalDetector, detect_technologies
+from .robots import (
+    MAX_RAW_OUTPUT,
+    MAX_ROBOTS_SIZE,
+    RobotsCache,
+    fetch_robots_txt,
+    fetch_robots_txt_async,
+    robots_cache_key,
+    robots_output,
+)
+from .retry import RetryPolicy
+from .scheduler import HostScheduler
+from .store import ValidatorStore, conditional_headers
+from .timings import Timings, measure
+from .tracing import span
+from .utils import USER_AGENT, retry_get, retry_get_async
+
+# Cap body download at 150KB, read in 16KB chunks
+MAX_BODY_SIZE = 150 * 1024
+CHUNK_SIZE = 16 * 1024
 
 
 def fetch_url_info(
@@ -12,66 +33,459 @@ def fetch_url_info(
     include_headers: bool = False,
     include_body: bool = False,
     include_robots: bool = False,
+    session: Optional[requests.Session] = None,
+    robots_cache: Optional[RobotsCache] = None,
+    store: Optional[ValidatorStore] = None,
+    scheduler: Optional[HostScheduler] = None,
+    max_body_size: int = MAX_BODY_SIZE,
+    chunk_size: int = CHUNK_SIZE,
+    head_budget: Optional[int] = None,
+    include_timings: bool = False,
+    detection_pool: Optional[DetectionPool] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    robots_max_size: int = MAX_ROBOTS_SIZE,
+    robots_raw_limit: Optional[int] = MAX_RAW_OUTPUT,
 ) -> Dict[str, Any]:
     """
     Fetches URL info via GET request, conditionally including headers, body, and robots.txt.
-    Raises ValueError on fetch errors.
+    Pass a shared requests.Session (see utils.create_session) so robots.txt, the page and
+    retries reuse pooled connections, and a RobotsCache to fetch each origin's robots.txt
+    once. With a ValidatorStore, robots.txt and the page are revalidated with conditional
+    requests and stored data is reused on 304. With a HostScheduler, the robots.txt
+    crawl delay spaces successive requests to the same host instead of pausing before
+    every request. At most max_body_size bytes of the body are read, chunk_size at a
+    time. With head_budget, technologies are detected while the body streams in and the
+    download stops head_budget bytes after </head>, so body output and keyword
+    fallbacks only see that prefix. With include_timings, the result has a "timings"
+    dict of per-phase durations in milliseconds (see timings.PHASES). With a
+    DetectionPool, technologies are detected in its worker processes unless they were
+    already detected while streaming. retry_policy controls retries of robots.txt and
+    the page (see utils.retry_get); with a HostScheduler, the host is also held back
+    while the page request backs off. At most robots_max_size bytes of robots.txt are
+    read, and its "raw" text in the result is cut to robots_raw_limit characters (see
+    robots.robots_output). Raises ValueError on fetch or detection errors.
     """
     validate_url(url)  # Reuse existing validation
+    timings = Timings() if include_timings else None
 
     # Fetch robots if needed for tech detection or output
     robots_info = None
     if include_robots or include_headers or include_body:
-        robots_info = fetch_robots_txt(url)
-        if (
-            "crawl_delay" in robots_info
-            and robots_info["crawl_delay"] is not None
-            and robots_info["crawl_delay"] > 0
-        ):
-            time.sleep(robots_info["crawl_delay"])
+        robots_info = fetch_robots_txt(
+            url,
+            session=session,
+            cache=robots_cache,
+            store=store,
+            timings=timings,
+            policy=retry_policy,
+            max_size=robots_max_size,
+        )
+        wait = _politeness_wait(url, robots_info, scheduler)
+        if wait > 0:
+            with measure(timings, "crawl_delay"):
+                time.sleep(wait)
 
+    stored = store.get_page(url) if store is not None else None
     try:
         response = retry_get(
             url,
-            headers={
-                "User-Agent": "Interrogate/1.0 (+https://github.com/inkyvoxel/interrogate)"
-            },
+            headers={"User-Agent": USER_AGENT, **conditional_headers(stored)},
             timeout=10,
             allow_redirects=True,
             stream=True,
+            session=session,
+            timings=timings,
+            policy=retry_policy,
+            on_backoff=_backoff_hook(url, scheduler),
         )
-        headers = dict(response.headers)
-        status_code = response.status_code
-        final_url = response.url
-        # Cap body download at 150KB
-        max_size = 150 * 1024
-        content = b""
-        for chunk in response.iter_content(chunk_size=1024):
-            content += chunk
-            if len(content) > max_size:
-                content = content[:max_size]
-                break
-        # Attempt to decode as text
         try:
-            body = content.decode("utf-8", errors="ignore")
-        except UnicodeDecodeError:
-            body = None  # Non-text content
-        result = {
-            "status_code": status_code,
-            "final_url": final_url,
-        }
-        if include_headers or include_body:
-            technologies = detect_technologies(headers, body, robots_info)
-            result["technologies"] = technologies
-        if include_headers:
-            result["headers"] = headers
-        if include_body:
-            if status_code == 200 and body is not None:
-                result["body"] = body
+            detector = None
+            if response.status_code == 304 and stored is not None:
+                status_code, final_url = stored.status_code, stored.final_url
+                headers, content = stored.headers, stored.content
             else:
-                result["body"] = None
-        if include_robots:
-            result["robots_txt"] = robots_info
-        return result
+                status_code, final_url = response.status_code, str(response.url)
+                headers = dict(response.headers)
+                detector = _incremental_detector(
+                    head_budget, include_headers, include_body
+                )
+                with (
+                    measure(timings, "download"),
+                    span("body.read", url=final_url) as read,
+                ):
+                    content = _read_body(
+                        response.iter_content(chunk_size=chunk_size),
+                        max_body_size,
+                        content_length(response.headers),
+                        detector,
+                    )
+                    _trace_body(read, content, max_body_size, detector)
+                # A body cut short by the head budget must not be reused as the page
+                stopped_early = detector is not None and detector.done
+                if store is not None and status_code is not None and not stopped_early:
+                    store.put_page(url, status_code, final_url, headers, content)
+        finally:
+            response.close()
+        technologies = None
+        if detection_pool is not None and _offload(
+            detector, include_headers, include_body
+        ):
+            try:
+                technologies = detection_pool.detect(
+                    headers, content, robots_info, timings
+                )
+            except Exception as e:
+                raise ValueError(f"Technology detection failed: {e}") from e
+        return _build_result(
+            status_code,
+            final_url,
+            headers,
+            content,
+            robots_info,
+            include_headers,
+            include_body,
+            include_robots,
+            detector,
+            timings,
+            technologies,
+            robots_raw_limit,
+        )
     except requests.RequestException as e:
         raise ValueError(f"Failed to fetch URL: {e}")
+
+
+async def fetch_url_info_async(
+    url: str,
+    include_headers: bool = False,
+    include_body: bool = False,
+    include_robots: bool = False,
+    client: Optional[httpx.AsyncClient] = None,
+    robots_cache: Optional[RobotsCache] = None,
+    store: Optional[ValidatorStore] = None,
+    scheduler: Optional[HostScheduler] = None,
+    max_body_size: int = MAX_BODY_SIZE,
+    chunk_size: int = CHUNK_SIZE,
+    head_budget: Optional[int] = None,
+    include_timings: bool = False,
+    detection_pool: Optional[DetectionPool] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    robots_max_size: int = MAX_ROBOTS_SIZE,
+    robots_raw_limit: Optional[int] = MAX_RAW_OUTPUT,
+) -> Dict[str, Any]:
+    """
+    Async variant of fetch_url_info returning the same result dict.
+    Network waits, the crawl-delay pause and retry back-off all yield to the event loop.
+    Pass a shared httpx.AsyncClient to reuse connections across calls; otherwise a
+    client is created for this call. Raises ValueError on fetch or detection errors.
+    """
+    validate_url(url)
+
+    own_client = None
+    if client is None:
+        client = own_client = httpx.AsyncClient()
+    try:
+        return await _fetch_url_info_async(
+            url,
+            include_headers,
+            include_body,
+            include_robots,
+            client,
+            robots_cache,
+            store,
+            scheduler,
+            max_body_size,
+            chunk_size,
+            head_budget,
+            Timings() if include_timings else None,
+            detection_pool,
+            retry_policy,
+            robots_max_size,
+            robots_raw_limit,
+        )
+    finally:
+        if own_client is not None:
+            await own_client.aclose()
+
+
+async def _fetch_url_info_async(
+    url: str,
+    include_headers: bool,
+    include_body: bool,
+    include_robots: bool,
+    client: httpx.AsyncClient,
+    robots_cache: Optional[RobotsCache],
+    store: Optional[ValidatorStore],
+    scheduler: Optional[HostScheduler],
+    max_body_size: int,
+    chunk_size: int,
+    head_budget: Optional[int],
+    timings: Optional[Timings],
+    detection_pool: Optional[DetectionPool],
+    retry_policy: Optional[RetryPolicy],
+    robots_max_size: int,
+    robots_raw_limit: Optional[int],
+) -> Dict[str, Any]:
+    """Body of fetch_url_info_async once a client is available."""
+    robots_info = None
+    if include_robots or include_headers or include_body:
+        robots_info = await fetch_robots_txt_async(
+            url,
+            client,
+            cache=robots_cache,
+            store=store,
+            timings=timings,
+            policy=retry_policy,
+            max_size=robots_max_size,
+        )
+        wait = _politeness_wait(url, robots_info, scheduler)
+        if wait > 0:
+            with measure(timings, "crawl_delay"):
+                await asyncio.sleep(wait)
+
+    stored = store.get_page(url) if store is not None else None
+    try:
+        response = await retry_get_async(
+            url,
+            headers={"User-Agent": USER_AGENT, **conditional_headers(stored)},
+            client=client,
+            timeout=10,
+            allow_redirects=True,
+            stream=True,
+            timings=timings,
+            policy=retry_policy,
+            on_backoff=_backoff_hook(url, scheduler),
+        )
+        try:
+            detector = None
+            if response.status_code == 304 and stored is not None:
+                status_code, final_url = stored.status_code, stored.final_url
+                headers, content = stored.headers, stored.content
+            else:
+                status_code, final_url = response.status_code, str(response.url)
+                headers = _httpx_headers(response.headers)
+                detector = _incremental_detector(
+                    head_budget, include_headers, include_body
+                )
+                with (
+                    measure(timings, "download"),
+                    span("body.read", url=final_url) as read,
+                ):
+                    content = await _read_body_async(
+                        response.aiter_bytes(chunk_size=chunk_size),
+                        max_body_size,
+                        content_length(response.headers),
+                        detector,
+                    )
+                    _trace_body(read, content, max_body_size, detector)
+                # A body cut short by the head budget must not be reused as the page
+                stopped_early = detector is not None and detector.done
+                if store is not None and status_code is not None and not stopped_early:
+                    store.put_page(url, status_code, final_url, headers, content)
+        finally:
+            await response.aclose()
+        technologies = None
+        if detection_pool is not None and _offload(
+            detector, include_headers, include_body
+        ):
+            try:
+                technologies = await detection_pool.detect_async(
+                    headers, content, robots_info, timings
+                )
+            except Exception as e:
+                raise ValueError(f"Technology detection failed: {e}") from e
+        return _build_result(
+            status_code,
+            final_url,
+            headers,
+            content,
+            robots_info,
+            include_headers,
+            include_body,
+            include_robots,
+            detector,
+            timings,
+            technologies,
+            robots_raw_limit,
+        )
+    except httpx.HTTPError as e:
+        raise ValueError(f"Failed to fetch URL: {e}")
+
+
+def _backoff_hook(
+    url: str, scheduler: Optional[HostScheduler]
+) -> Optional[Callable[[float], None]]:
+    """With a scheduler, hold url's host back for as long as its request backs off."""
+    if scheduler is None:
+        return None
+    host = robots_cache_key(url)
+    return lambda seconds: scheduler.defer(host, seconds)
+
+
+def _offload(
+    detector: Optional[IncrementalDetector], include_headers: bool, include_body: bool
+) -> bool:
+    """With a detection pool, whether technologies should be detected in its workers."""
+    return detector is None and (include_headers or include_body)
+
+
+def _incremental_detector(
+    head_budget: Optional[int], include_headers: bool, include_body: bool
+) -> Optional[IncrementalDetector]:
+    """Return an IncrementalDetector if early-stopping detection was requested."""
+    if head_budget is None or not (include_headers or include_body):
+        return None
+    return IncrementalDetector(head_budget)
+
+
+def _read_body(
+    chunks: Iterable[bytes],
+    max_size: int,
+    size_hint: Optional[int],
+    detector: Optional[IncrementalDetector] = None,
+) -> bytearray:
+    """
+    Read chunks into a BodyBuffer, stopping once max_size bytes are kept or, with a
+    detector, once it has seen enough of the page.
+    """
+    buffer = BodyBuffer(max_size, size_hint)
+    if max_size > 0:
+        for chunk in chunks:
+            if _consume(buffer, chunk, detector):
+                break
+    return buffer.getvalue()
+
+
+async def _read_body_async(
+    chunks: AsyncIterator[bytes],
+    max_size: int,
+    size_hint: Optional[int],
+    detector: Optional[IncrementalDetector] = None,
+) -> bytearray:
+    """Async variant of _read_body."""
+    buffer = BodyBuffer(max_size, size_hint)
+    if max_size > 0:
+        async for chunk in chunks:
+            if _consume(buffer, chunk, detector):
+                break
+    return buffer.getvalue()
+
+
+def _consume(
+    buffer: BodyBuffer, chunk: bytes, detector: Optional[IncrementalDetector]
+) -> bool:
+    """Add a chunk to the buffer and detector. Returns True when reading can stop."""
+    if detector is None:
+        return buffer.write(chunk)
+    kept = memoryview(chunk)[: buffer.max_size - len(buffer)]
+    done = detector.feed(kept)
+    return buffer.write(kept) or done
+
+
+def _trace_body(
+    read: Any,
+    content: Union[bytes, bytearray],
+    max_size: int,
+    detector: Optional[IncrementalDetector],
+) -> None:
+    """Record how much of the body was read and why reading stopped."""
+    read.set("bytes", len(content))
+    if detector is not None and detector.done:
+        read.set("outcome", "head_budget")
+    elif len(content) >= max_size:
+        read.set("outcome", "capped")
+    else:
+        read.set("outcome", "complete")
+
+
+def _crawl_delay(robots_info: Dict[str, Any]) -> Optional[float]:
+    """Return the positive crawl delay from parsed robots.txt, if any."""
+    crawl_delay = robots_info.get("crawl_delay")
+    if crawl_delay is not None and crawl_delay > 0:
+        return crawl_delay
+    return None
+
+
+def _politeness_wait(
+    url: str,
+    robots_info: Dict[str, Any],
+    scheduler: Optional[HostScheduler],
+) -> float:
+    """
+    Seconds to pause before requesting url. Without a scheduler this is the full crawl
+    delay; with one, it is the time until the host's next free slot.
+    """
+    crawl_delay = _crawl_delay(robots_info)
+    if crawl_delay is None:
+        return 0.0
+    if scheduler is None:
+        return crawl_delay
+    return scheduler.reserve(robots_cache_key(url), crawl_delay)
+
+
+def _httpx_headers(headers: httpx.Headers) -> Dict[str, str]:
+    """
+    Convert httpx headers to a plain dict keeping the server's header-name casing,
+    which tech detection relies on. Repeated headers are joined with ", " like requests.
+    """
+    result: Dict[str, str] = {}
+    for raw_name, raw_value in headers.raw:
+        name = raw_name.decode("latin-1")
+        value = raw_value.decode("latin-1")
+        result[name] = f"{result[name]}, {value}" if name in result else value
+    return result
+
+
+def _build_result(
+    status_code: Optional[int],
+    final_url: str,
+    headers: Dict[str, str],
+    content: Union[bytes, bytearray],
+    robots_info: Optional[Dict[str, Any]],
+    include_headers: bool,
+    include_body: bool,
+    include_robots: bool,
+    detector: Optional[IncrementalDetector] = None,
+    timings: Optional[Timings] = None,
+    technologies: Optional[List[Dict[str, Optional[str]]]] = None,
+    robots_raw_limit: Optional[int] = MAX_RAW_OUTPUT,
+) -> Dict[str, Any]:
+    """
+    Assemble the result dict shared by the sync and async fetchers.
+    A detector that was fed the body while it downloaded is used for tech detection,
+    and technologies already detected elsewhere are used as they are.
+    With timings, decoding and detection are measured and "timings" is added.
+    """
+    body = None
+    if include_body or (technologies is None and include_headers):
+        # Attempt to decode as text
+        with measure(timings, "decode"):
+            try:
+                body = content.decode("utf-8", errors="ignore")
+            except UnicodeDecodeError:
+                body = None  # Non-text content
+    result: Dict[str, Any] = {
+        "status_code": status_code,
+        "final_url": final_url,
+    }
+    if technologies is not None:
+        result["technologies"] = technologies
+    elif include_headers or include_body:
+        if detector is not None:
+            technologies = detector.detect(headers, body, robots_info, timings)
+        else:
+            technologies = detect_technologies(
+                headers, body, robots_info, timings=timings
+            )
+        result["technologies"] = technologies
+    if include_headers:
+        result["headers"] = headers
+    if include_body:
+        if status_code == 200 and body is not None:
+            result["body"] = body
+        else:
+            result["body"] = None
+    if include_robots and robots_info is not None:
+        result["robots_txt"] = robots_output(robots_info, robots_raw_limit)
+    if timings is not None:
+        result["timings"] = timings.as_dict()
+    return result
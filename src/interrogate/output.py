@@ -0,0 +1,111 @@
+"""Streaming newline-delimited JSON output for result records."""
+
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, TextIO
+
+# Keys a result record can carry; "url" and "error" are only set by batch runs, "depth"
+# by crawls
+FIELDS = (
+    "url",
+    "error",
+    "status_code",
+    "final_url",
+    "technologies",
+    "headers",
+    "body",
+    "robots_txt",
+    "timings",
+    "depth",
+)
+
+# Kept by every projection so batch records stay identifiable and failures visible
+ALWAYS_KEPT = ("url", "error")
+
+_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def parse_fields(value: str) -> List[str]:
+    """
+    Parse a comma-separated field list such as "status_code,technologies".
+    Raises ValueError on unknown or missing fields.
+    """
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    if not fields:
+        raise ValueError("No fields given")
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)} (choose from {', '.join(FIELDS)})"
+        )
+    return fields
+
+
+def project(record: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Return record restricted to fields (plus ALWAYS_KEPT); None keeps everything."""
+    if fields is None:
+        return record
+    return {
+        key: value
+        for key, value in record.items()
+        if key in fields or key in ALWAYS_KEPT
+    }
+
+
+class NDJSONWriter:
+    """
+    Writes records as compact JSON, one per line, as they complete. Records are projected
+    onto fields before serialization, so dropped keys such as headers or bodies are
+    never encoded. Lines are buffered and written to the stream in batches, every
+    flush_every records or flush_interval seconds, whichever comes first, and on close.
+    on_flush, if given, is called after each flush, e.g. to checkpoint what was written.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        fields: Optional[Sequence[str]] = None,
+        flush_every: int = 100,
+        flush_interval: float = 1.0,
+        on_flush: Optional[Callable[[], None]] = None,
+    ) -> None:
+        if flush_every < 1:
+            raise ValueError("flush_every must be at least 1")
+        self.stream = stream
+        self.fields = fields
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.count = 0
+        self._lines: List[str] = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> "NDJSONWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Queue one record, flushing if the batch is full or the interval has passed."""
+        self._lines.append(_ENCODER.encode(project(record, self.fields)))
+        self.count += 1
+        if (
+            len(self._lines) >= self.flush_every
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write queued lines to the stream and flush it."""
+        if self._lines:
+            self.stream.write("\n".join(self._lines) + "\n")
+            self._lines.clear()
+        self.stream.flush()
+        self._last_flush = time.monotonic()
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def close(self) -> None:
+        """Flush remaining records. The stream itself is left open."""
+        self.flush()
@@ -0,0 +1,172 @@
+"""Configurable retry policy for HTTP requests, built on tenacity."""
+
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, List, Mapping, Optional, Tuple
+
+import httpx
+import requests
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    Retrying,
+    retry_any,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    stop_any,
+    stop_before_delay,
+    wait_exponential_jitter,
+)
+from tenacity.stop import stop_base
+
+# Transport failures worth another attempt: resets, refused connections and timeouts
+RETRYABLE_ERRORS: Tuple[type[BaseException], ...] = (
+    requests.ConnectionError,
+    requests.Timeout,
+    httpx.TransportError,
+)
+
+
+def parse_retry_after(value: Any, now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header value, either delay-seconds or an HTTP-date, into seconds
+    from now (never negative). Returns None if the value is missing or malformed.
+    """
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        return None  # HTTP-dates are always GMT; anything else is malformed
+    return max(0.0, retry_at.timestamp() - (time.time() if now is None else now))
+
+
+class RetryPolicy:
+    """
+    How retry_get retries a request. Responses with a status in statuses, and with
+    retry_errors the RETRYABLE_ERRORS, are retried until attempts requests have been
+    made. Waits grow exponentially from backoff by multiplier up to max_backoff, plus
+    up to jitter random seconds. A Retry-After header replaces the computed wait; one
+    longer than max_retry_after ends retrying at once, returning that response. With a
+    deadline, no retry is started whose wait would end more than deadline seconds after
+    the first attempt. The default retries a 429 or 503 once after 2 seconds.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 2,
+        backoff: float = 2.0,
+        multiplier: float = 2.0,
+        max_backoff: float = 60.0,
+        jitter: float = 0.0,
+        deadline: Optional[float] = None,
+        max_retry_after: float = 120.0,
+        statuses: Tuple[int, ...] = (429, 503),
+        retry_errors: bool = True,
+    ) -> None:
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        if backoff < 0 or jitter < 0:
+            raise ValueError("backoff and jitter must not be negative")
+        if deadline is not None and deadline <= 0:
+            raise ValueError("deadline must be positive")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.multiplier = multiplier
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.max_retry_after = max_retry_after
+        self.statuses = statuses
+        self.retry_errors = retry_errors
+
+        self._exponential = wait_exponential_jitter(
+            initial=backoff, max=max_backoff, exp_base=multiplier, jitter=jitter
+        )
+        stops: List[stop_base] = [
+            stop_after_attempt(attempts),
+            _StopOnLongRetryAfter(max_retry_after),
+        ]
+        if deadline is not None:
+            stops.append(stop_before_delay(deadline))
+        self._stop = stop_any(*stops)
+        retries = [retry_if_result(self._retryable_response)]
+        if retry_errors:
+            retries.append(retry_if_exception_type(RETRYABLE_ERRORS))
+        self._retry = retry_any(*retries)
+
+    def retrying(
+        self,
+        sleep: Callable[[float], None],
+        before_sleep: Callable[[RetryCallState], None],
+    ) -> Retrying:
+        """A tenacity Retrying for one request, waiting with sleep."""
+        return Retrying(
+            stop=self._stop,
+            wait=self.wait,
+            retry=self._retry,
+            sleep=sleep,
+            before_sleep=before_sleep,
+            retry_error_callback=_last_outcome,
+        )
+
+    def async_retrying(
+        self,
+        sleep: Callable[[float], Awaitable[None]],
+        before_sleep: Callable[[RetryCallState], Awaitable[None]],
+    ) -> AsyncRetrying:
+        """Async variant of retrying."""
+        return AsyncRetrying(
+            stop=self._stop,
+            wait=self.wait,
+            retry=self._retry,
+            sleep=sleep,
+            before_sleep=before_sleep,
+            retry_error_callback=_last_outcome,
+        )
+
+    def wait(self, retry_state: RetryCallState) -> float:
+        """Seconds to wait before the next attempt: Retry-After, else exponential."""
+        retry_after = _retry_after(retry_state)
+        if retry_after is not None:
+            return retry_after
+        return self._exponential(retry_state)
+
+    def _retryable_response(self, response: Any) -> bool:
+        return response.status_code in self.statuses
+
+
+class _StopOnLongRetryAfter(stop_base):
+    """Stop when the last response asks to wait longer than max_retry_after seconds."""
+
+    def __init__(self, max_retry_after: float) -> None:
+        self.max_retry_after = max_retry_after
+
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        retry_after = _retry_after(retry_state)
+        return retry_after is not None and retry_after > self.max_retry_after
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def _retry_after(retry_state: RetryCallState) -> Optional[float]:
+    """Retry-After of the last response, if the last attempt returned one."""
+    outcome = retry_state.outcome
+    if outcome is None or outcome.failed:
+        return None
+    headers: Mapping[str, str] = outcome.result().headers
+    return parse_retry_after(headers.get("Retry-After"))
+
+
+def _last_outcome(retry_state: RetryCallState) -> Any:
+    """Return the last response once retries run out, or re-raise its error."""
+    outcome = retry_state.outcome
+    assert outcome is not None  # Only called after an attempt
+    return outcome.result()
@@ -1,58 +1,548 @@
-from typing import Dict, Any
+import asyncio
+import codecs
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import (
+    AsyncGenerator,
+    AsyncIterable,
+    Dict,
+    Any,
+    Generator,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+import httpx
 import requests
-from urllib.parse import urljoin
-from .utils import retry_get
+from urllib.parse import urljoin, urlsplit
+from .retry import RetryPolicy
+from .store import ValidatorStore, conditional_headers
+from .timings import Timings, measure
+from .tracing import span
+from .utils import USER_AGENT, retry_get, retry_get_async
 
+_MAX_AGE_RE = re.compile(r"\bmax-age\s*=\s*(\d+)", re.IGNORECASE)
+# Ports implied by each scheme supported for fetching
+DEFAULT_PORTS = {"http": 80, "https": 443}
 
-def fetch_robots_txt(url: str) -> Dict[str, Any]:
+# RFC 9309 asks crawlers to parse at least 500 KiB; anything past the cap is ignored
+MAX_ROBOTS_SIZE = 500 * 1024
+# Characters of robots.txt text included in results; the cached copy keeps all it read
+MAX_RAW_OUTPUT = 16 * 1024
+CHUNK_SIZE = 16 * 1024
+
+
+def robots_cache_key(url: str) -> str:
+    """
+    Return the origin (scheme://host:port) whose robots.txt applies to url.
+    Host is lowercased and default ports are made explicit, so equivalent URLs share a key.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    port = parts.port or DEFAULT_PORTS.get(scheme)
+    return f"{scheme}://{(parts.hostname or '').lower()}:{port}"
+
+
+class _Flight:
+    """One origin's robots.txt download, shared by the callers waiting on its lock."""
+
+    __slots__ = ("users", "result")
+
+    def __init__(self) -> None:
+        self.users = 0  # Callers holding or awaiting the lock
+        self.result: Optional[Dict[str, Any]] = None
+
+
+class RobotsCache:
     """
-    Fetches and parses robots.txt for the given URL.
+    Thread-safe in-process cache of parsed robots.txt results keyed by origin.
+    Entries expire after the response's Cache-Control max-age or Expires lifetime when
+    present, otherwise after ttl seconds, and never later than max_ttl. Once max_entries
+    origins are cached the least recently used entry is evicted. hits and misses count
+    lookups so cache effectiveness can be checked. fetching() lets concurrent misses for
+    one origin wait for a single robots.txt download instead of each fetching it, even
+    when its result is not cached, and fetching_async() does the same for coroutines.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        max_ttl: float = 86400.0,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-origin fetch locks with the download they guard
+        self._fetching: Dict[str, Tuple[threading.Lock, _Flight]] = {}
+        self._fetching_async: Dict[str, Tuple[asyncio.Lock, _Flight]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached robots.txt result for url's origin, or None if absent or expired."""
+        return self._lookup(robots_cache_key(url), count=True)
+
+    def peek(self, url: str) -> Optional[Dict[str, Any]]:
+        """Like get, without counting a hit or miss."""
+        return self._lookup(robots_cache_key(url), count=False)
+
+    @contextmanager
+    def fetching(self, url: str) -> Generator["_Flight", None, None]:
+        """
+        Hold url's origin fetch lock for the block, so only one thread at a time fetches a
+        given origin's robots.txt. Threads that waited find the result of the download
+        they waited on in the yielded flight, even one that was not cached (an error or
+        a no-store response); otherwise they should peek() before fetching.
+        """
+        key = robots_cache_key(url)
+        with self._lock:
+            lock, flight = self._fetching.get(key, (None, None))
+            if lock is None or flight is None:
+                lock, flight = threading.Lock(), _Flight()
+                self._fetching[key] = (lock, flight)
+            flight.users += 1
+        try:
+            with lock:
+                yield flight
+        finally:
+            with self._lock:
+                flight.users -= 1
+                if not flight.users:
+                    del self._fetching[key]
+
+    @asynccontextmanager
+    async def fetching_async(self, url: str) -> AsyncGenerator["_Flight", None]:
+        """Async variant of fetching, holding an asyncio lock per origin."""
+        key = robots_cache_key(url)
+        with self._lock:
+            lock, flight = self._fetching_async.get(key, (None, None))
+            if lock is None or flight is None:
+                lock, flight = asyncio.Lock(), _Flight()
+                self._fetching_async[key] = (lock, flight)
+            flight.users += 1
+        try:
+            async with lock:
+                yield flight
+        finally:
+            with self._lock:
+                flight.users -= 1
+                if not flight.users:
+                    del self._fetching_async[key]
+
+    def _lookup(self, key: str, count: bool) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            if count:
+                self.misses += 1
+            return None
+
+    def put(
+        self,
+        url: str,
+        robots_info: Dict[str, Any],
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        """
+        Cache robots_info for url's origin, using the response headers' freshness lifetime
+        if given. Responses marked no-store, or with a zero lifetime, are not cached.
+        """
+        ttl = self._lifetime(headers) if headers is not None else self.ttl
+        if ttl is None or ttl <= 0:
+            return
+        key = robots_cache_key(url)
+        with self._lock:
+            self._entries[key] = (
+                time.monotonic() + min(ttl, self.max_ttl),
+                robots_info,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _lifetime(self, headers: Mapping[str, str]) -> Optional[float]:
+        """Freshness lifetime in seconds from Cache-Control/Expires, falling back to ttl."""
+        cache_control = headers.get("Cache-Control", "")
+        if "no-store" in cache_control.lower():
+            return None
+        match = _MAX_AGE_RE.search(cache_control)
+        if match:
+            return float(match.group(1))
+        expires = headers.get("Expires")
+        if expires:
+            try:
+                expires_at = parsedate_to_datetime(expires)
+                date = headers.get("Date")
+                now = parsedate_to_datetime(date) if date else None
+            except (TypeError, ValueError):
+                return 0.0  # Invalid Expires means already expired
+            if now is None or now.tzinfo is None:
+                return expires_at.timestamp() - time.time()
+            return (expires_at - now).total_seconds()
+        return self.ttl
+
+
+def fetch_robots_txt(
+    url: str,
+    session: Optional[requests.Session] = None,
+    cache: Optional[RobotsCache] = None,
+    store: Optional[ValidatorStore] = None,
+    timings: Optional[Timings] = None,
+    policy: Optional[RetryPolicy] = None,
+    max_size: int = MAX_ROBOTS_SIZE,
+) -> Dict[str, Any]:
+    """
+    Fetches and parses robots.txt for the given URL, reusing session's connections if given.
+    The body is parsed line by line as it streams in and reading stops after max_size
+    bytes (see RobotsTxtParser), so a huge robots.txt costs at most max_size per origin.
+    With a RobotsCache, the origin's cached result is returned without a request. With a
+    ValidatorStore, the request is conditional and a 304 reuses the stored parse.
+    With timings, the whole lookup counts as "robots_fetch"; it is traced as "robots.fetch".
+    policy controls retries (see utils.retry_get).
     Returns a dict with disallowed, sitemaps, crawl_delay, user_agents, raw, or {"error": message} on failure.
     """
+    with measure(timings, "robots_fetch"), span("robots.fetch", url=url) as fetch:
+        result = _fetch_robots_txt(url, session, cache, store, policy, max_size)
+        _trace_result(fetch, result)
+        return result
+
+
+def _fetch_robots_txt(
+    url: str,
+    session: Optional[requests.Session],
+    cache: Optional[RobotsCache],
+    store: Optional[ValidatorStore],
+    policy: Optional[RetryPolicy],
+    max_size: int,
+) -> Dict[str, Any]:
+    """Body of fetch_robots_txt."""
+    if cache is None:
+        return _download_robots_txt(url, session, None, store, policy, max_size)
+    cached = cache.get(url)
+    if cached is not None:
+        return cached
+    with cache.fetching(url) as flight:
+        # Another thread may have fetched this origin while we waited; its result is
+        # reused even if it failed, so waiters on a dead host do not each time out
+        if flight.result is not None:
+            return flight.result
+        cached = cache.peek(url)
+        if cached is not None:
+            return cached
+        flight.result = _download_robots_txt(
+            url, session, cache, store, policy, max_size
+        )
+        return flight.result
+
+
+def _download_robots_txt(
+    url: str,
+    session: Optional[requests.Session],
+    cache: Optional[RobotsCache],
+    store: Optional[ValidatorStore],
+    policy: Optional[RetryPolicy],
+    max_size: int,
+) -> Dict[str, Any]:
+    """Request robots.txt, storing the result in cache and store if given."""
+    origin = robots_cache_key(url)
+    stored = store.get_robots(origin) if store is not None else None
     try:
         robots_url = urljoin(url, "/robots.txt")
         response = retry_get(
             robots_url,
-            headers={
-                "User-Agent": "Interrogate/1.0 (+https://github.com/inkyvoxel/interrogate)"
-            },
+            headers={"User-Agent": USER_AGENT, **conditional_headers(stored)},
             timeout=10,
             allow_redirects=True,
+            stream=True,
+            session=session,
+            policy=policy,
         )
-        if response.status_code != 200:
-            return {"error": f"robots.txt not found (status {response.status_code})"}
-        raw = response.text
-        lines = raw.splitlines()
-        user_agents = []
-        disallowed = []
-        sitemaps = []
-        crawl_delay = None
-        for line in lines:
-            line = line.strip().lower()
-            if line.startswith("user-agent:"):
-                useragent = line[11:].strip()
-                user_agents.append(useragent)
-            elif line.startswith("disallow:"):
-                path = line[9:].strip()
-                if path:
-                    disallowed.append(path)
-            elif line.startswith("crawl-delay:"):
-                delay_str = line[12:].strip()
-                try:
-                    crawl_delay = float(delay_str)
-                except ValueError:
-                    pass
-            elif line.startswith("sitemap:"):
-                sitemap = line[8:].strip()
-                sitemaps.append(sitemap)
-        return {
-            "disallowed": list(set(disallowed)),
-            "sitemaps": sitemaps,
-            "crawl_delay": crawl_delay,
-            "user_agents": list(set(user_agents)),
-            "raw": raw,
-        }
+        try:
+            if response.status_code == 304 and stored is not None:
+                result = stored.robots_info
+            elif response.status_code != 200:
+                result = {
+                    "error": f"robots.txt not found (status {response.status_code})"
+                }
+            else:
+                result = _read_robots_txt(
+                    response.iter_content(chunk_size=CHUNK_SIZE), max_size
+                )
+        finally:
+            response.close()
+        if response.status_code == 200 and store is not None:
+            store.put_robots(origin, response.headers, result)
     except requests.RequestException as e:
         return {"error": f"Failed to fetch robots.txt: {e}"}
     except Exception as e:
         return {"error": f"Failed to parse robots.txt: {e}"}
+    status_code = response.status_code
+    if cache is not None and status_code is not None and status_code < 500:
+        cache.put(url, result, response.headers)
+    return result
+
+
+async def fetch_robots_txt_async(
+    url: str,
+    client: httpx.AsyncClient,
+    cache: Optional[RobotsCache] = None,
+    store: Optional[ValidatorStore] = None,
+    timings: Optional[Timings] = None,
+    policy: Optional[RetryPolicy] = None,
+    max_size: int = MAX_ROBOTS_SIZE,
+) -> Dict[str, Any]:
+    """
+    Async variant of fetch_robots_txt using an httpx.AsyncClient.
+    Returns the same dict shape, or {"error": message} on failure.
+    """
+    with measure(timings, "robots_fetch"), span("robots.fetch", url=url) as fetch:
+        result = await _fetch_robots_txt_async(
+            url, client, cache, store, policy, max_size
+        )
+        _trace_result(fetch, result)
+        return result
+
+
+def _trace_result(fetch: Any, result: Dict[str, Any]) -> None:
+    """Record the size and outcome of a robots.txt lookup on its span."""
+    fetch.set("bytes", len(result.get("raw", "")))
+    fetch.set("outcome", "error" if "error" in result else "ok")
+
+
+async def _fetch_robots_txt_async(
+    url: str,
+    client: httpx.AsyncClient,
+    cache: Optional[RobotsCache],
+    store: Optional[ValidatorStore],
+    policy: Optional[RetryPolicy],
+    max_size: int,
+) -> Dict[str, Any]:
+    """Body of fetch_robots_txt_async."""
+    if cache is None:
+        return await _download_robots_txt_async(
+            url, client, None, store, policy, max_size
+        )
+    cached = cache.get(url)
+    if cached is not None:
+        return cached
+    async with cache.fetching_async(url) as flight:
+        # Another task may have fetched this origin while we waited, as in
+        # _fetch_robots_txt
+        if flight.result is not None:
+            return flight.result
+        cached = cache.peek(url)
+        if cached is not None:
+            return cached
+        flight.result = await _download_robots_txt_async(
+            url, client, cache, store, policy, max_size
+        )
+        return flight.result
+
+
+async def _download_robots_txt_async(
+    url: str,
+    client: httpx.AsyncClient,
+    cache: Optional[RobotsCache],
+    store: Optional[ValidatorStore],
+    policy: Optional[RetryPolicy],
+    max_size: int,
+) -> Dict[str, Any]:
+    """Async variant of _download_robots_txt."""
+    origin = robots_cache_key(url)
+    stored = store.get_robots(origin) if store is not None else None
+    try:
+        robots_url = urljoin(url, "/robots.txt")
+        response = await retry_get_async(
+            robots_url,
+            headers={"User-Agent": USER_AGENT, **conditional_headers(stored)},
+            client=client,
+            timeout=10,
+            allow_redirects=True,
+            stream=True,
+            policy=policy,
+        )
+        try:
+            if response.status_code == 304 and stored is not None:
+                result = stored.robots_info
+            elif response.status_code != 200:
+                result = {
+                    "error": f"robots.txt not found (status {response.status_code})"
+                }
+            else:
+                result = await _read_robots_txt_async(
+                    response.aiter_bytes(chunk_size=CHUNK_SIZE), max_size
+                )
+        finally:
+            await response.aclose()
+        if response.status_code == 200 and store is not None:
+            store.put_robots(origin, response.headers, result)
+    except httpx.HTTPError as e:
+        return {"error": f"Failed to fetch robots.txt: {e}"}
+    except Exception as e:
+        return {"error": f"Failed to parse robots.txt: {e}"}
+    if cache is not None and response.status_code < 500:
+        cache.put(url, result, response.headers)
+    return result
+
+
+class RobotsTxtParser:
+    """
+    Incremental robots.txt parser, fed the body chunk by chunk as it downloads (feed) or
+    line by line (feed_line). Bodies are decoded as UTF-8 per RFC 9309. With max_size,
+    reading stops after that many bytes: the line the cap cuts through is dropped, so
+    no partial rule is applied, and the result is marked "truncated".
+    """
+
+    def __init__(self, max_size: Optional[int] = MAX_ROBOTS_SIZE) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.truncated = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._raw: List[str] = []
+        self._pending = ""  # Text after the last line break
+        self._user_agents: List[str] = []
+        self._disallowed: List[str] = []
+        self._sitemaps: List[str] = []
+        self._crawl_delay: Optional[float] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse the complete lines of chunk; False once max_size has been reached."""
+        if self.truncated:
+            return False
+        if self.max_size is not None and self.size + len(chunk) > self.max_size:
+            chunk = chunk[: self.max_size - self.size]
+            self.truncated = True
+        self.size += len(chunk)
+        self._feed_text(self._decoder.decode(chunk))
+        return not self.truncated
+
+    def _feed_text(self, text: str) -> None:
+        self._raw.append(text)
+        lines = (self._pending + text).splitlines(keepends=True)
+        self._pending = ""
+        if lines and not lines[-1].endswith(("\n", "\r")):
+            self._pending = lines.pop()
+        for line in lines:
+            self.feed_line(line)
+
+    def feed_line(self, line: str) -> None:
+        """Parse one line of robots.txt."""
+        original = line.strip()
+        line = original.lower()
+        if line.startswith("user-agent:"):
+            self._user_agents.append(line[11:].strip())
+        elif line.startswith("disallow:"):
+            path = line[9:].strip()
+            if path:
+                self._disallowed.append(path)
+        elif line.startswith("crawl-delay:"):
+            try:
+                self._crawl_delay = float(line[12:].strip())
+            except ValueError:
+                pass
+        elif line.startswith("sitemap:"):
+            self._sitemaps.append(original[8:].strip())  # URLs are case-sensitive
+
+    def close(self, raw: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Finish parsing and return the parse_robots_txt dict. raw defaults to the text that
+        was fed, without a line cut off by max_size.
+        """
+        if not self.truncated:
+            tail = self._decoder.decode(b"", final=True)
+            if tail:
+                self._feed_text(tail)
+            if self._pending:
+                self.feed_line(self._pending)
+                self._pending = ""
+        if raw is None:
+            raw = "".join(self._raw)
+            if self._pending:
+                raw = raw[: -len(self._pending)]
+        result = {
+            "disallowed": list(set(self._disallowed)),
+            "sitemaps": self._sitemaps,
+            "crawl_delay": self._crawl_delay,
+            "user_agents": list(set(self._user_agents)),
+            "raw": raw,
+        }
+        if self.truncated:
+            result["truncated"] = True
+        return result
+
+
+def _read_robots_txt(chunks: Iterable[bytes], max_size: int) -> Dict[str, Any]:
+    """Parse a streamed robots.txt body, reading at most max_size bytes of it."""
+    parser = RobotsTxtParser(max_size)
+    for chunk in chunks:
+        if not parser.feed(chunk):
+            break
+    return parser.close()
+
+
+async def _read_robots_txt_async(
+    chunks: AsyncIterable[bytes], max_size: int
+) -> Dict[str, Any]:
+    """Async variant of _read_robots_txt."""
+    parser = RobotsTxtParser(max_size)
+    async for chunk in chunks:
+        if not parser.feed(chunk):
+            break
+    return parser.close()
+
+
+def parse_robots_txt(raw: str) -> Dict[str, Any]:
+    """
+    Parses robots.txt content.
+    Returns a dict with disallowed, sitemaps, crawl_delay, user_agents and raw.
+    """
+    parser = RobotsTxtParser(max_size=None)
+    for line in raw.splitlines():
+        parser.feed_line(line)
+    return parser.close(raw)
+
+
+def robots_output(
+    robots_info: Dict[str, Any], raw_limit: Optional[int] = MAX_RAW_OUTPUT
+) -> Dict[str, Any]:
+    """
+    robots_info as included in a result: raw is cut to raw_limit characters (None keeps
+    it whole, 0 drops it) and "raw_truncated" is set when anything was cut.
+    """
+    raw = robots_info.get("raw")
+    if raw_limit is None or raw is None or len(raw) <= raw_limit:
+        return robots_info
+    output = dict(robots_info)
+    if raw_limit:
+        output["raw"] = raw[:raw_limit]
+    else:
+        del output["raw"]
+    output["raw_truncated"] = True
+    return output
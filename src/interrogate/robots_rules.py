@@ -0,0 +1,320 @@
+"""Compiled robots.txt rules: per-user-agent groups and fast longest-match path checks."""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+# Characters left alone when normalizing paths and patterns; everything else, notably
+# non-ASCII, is percent-encoded so "/café" and "/caf%C3%A9" compare equal
+_SAFE = "/?=&;:@!$'()*+,-._~%"
+_PRODUCT_TOKEN_RE = re.compile(r"[a-z_*-]+")
+_STARS_RE = re.compile(r"\*+")
+
+# Compiled robots.txt files are memoized by content, up to this many files and this many
+# characters of robots.txt in total; compiled rules take memory in proportion to the text
+MAX_CACHED_RULES = 256
+MAX_CACHED_CHARS = 4 * 1024 * 1024
+
+# A rule match is encoded as pattern length * 2 + allow, so the longest pattern wins and
+# on a tie allow beats disallow; NO_MATCH is below every match
+NO_MATCH = -1
+
+# Trie edges are keyed by node * _EDGE_BASE + code point
+_EDGE_BASE = 0x110000
+
+
+def product_token(user_agent: str) -> str:
+    """The lowercased product token of a user agent, e.g. "interrogate" for Interrogate/1.0."""
+    match = _PRODUCT_TOKEN_RE.match(user_agent.strip().lower())
+    return match.group() if match else ""
+
+
+def _normalize(path: str) -> str:
+    return quote(path, safe=_SAFE)
+
+
+class RuleGroup:
+    """
+    The Allow and Disallow rules of one user-agent group. "*" matches any run of
+    characters and a trailing "$" anchors the pattern to the end of the path. Plain
+    patterns are compiled into a path-compressed trie whose edges carry whole runs of
+    characters, and patterns with wildcards into a character trie; both are held in flat
+    per-group arrays. is_allowed walks each trie once along the path, tracking the few
+    wildcard branches still alive, so a check costs time proportional to the path length
+    however many rules there are.
+    """
+
+    def __init__(self) -> None:
+        self.crawl_delay: Optional[float] = None
+        self.rules = 0
+        # Plain trie: node 0 is the root; each other node is entered by its label
+        self._plain_edges: Dict[int, int] = {}  # Keyed by the label's first character
+        self._labels: List[str] = [""]
+        self._plain_match: List[int] = [NO_MATCH]
+        self._plain_end_match: List[int] = [NO_MATCH]
+        # Wildcard trie: node 0 is the root, which is never a wildcard child, so 0 in
+        # _star means no wildcard child
+        self._edges: Dict[int, int] = {}
+        self._star: List[int] = []
+        self._is_star: List[bool] = []
+        self._match: List[int] = []  # Rules matching any path reaching the node
+        self._end_match: List[int] = []  # Rules ending in "$"
+        self._new_node(False)
+
+    def _new_node(self, is_star: bool) -> int:
+        self._star.append(0)
+        self._is_star.append(is_star)
+        self._match.append(NO_MATCH)
+        self._end_match.append(NO_MATCH)
+        return len(self._star) - 1
+
+    def _new_plain_node(self, label: str) -> int:
+        self._labels.append(label)
+        self._plain_match.append(NO_MATCH)
+        self._plain_end_match.append(NO_MATCH)
+        return len(self._labels) - 1
+
+    def add(self, pattern: str, allow: bool) -> None:
+        """Add an Allow (allow=True) or Disallow rule; empty patterns match nothing."""
+        if not pattern:
+            return
+        key = len(pattern) * 2 + allow
+        anchored = pattern.endswith("$")
+        if anchored:
+            pattern = pattern[:-1]
+        pattern = _STARS_RE.sub("*", _normalize(pattern))
+        self.rules += 1
+        if "*" not in pattern:
+            node = self._add_plain(pattern)
+            matches = self._plain_end_match if anchored else self._plain_match
+            matches[node] = max(matches[node], key)
+            return
+        node = 0
+        for char in pattern:
+            if char == "*":
+                if not self._star[node]:
+                    self._star[node] = self._new_node(True)
+                node = self._star[node]
+            else:
+                edge = node * _EDGE_BASE + ord(char)
+                child = self._edges.get(edge)
+                if child is None:
+                    child = self._edges[edge] = self._new_node(False)
+                node = child
+        matches = self._end_match if anchored else self._match
+        matches[node] = max(matches[node], key)
+
+    def _add_plain(self, pattern: str) -> int:
+        """The plain trie node for pattern, splitting an edge if it ends inside one."""
+        node = 0
+        start = 0
+        while start < len(pattern):
+            edge = node * _EDGE_BASE + ord(pattern[start])
+            child = self._plain_edges.get(edge)
+            if child is None:
+                child = self._plain_edges[edge] = self._new_plain_node(pattern[start:])
+                return child
+            label = self._labels[child]
+            common = 1
+            limit = min(len(label), len(pattern) - start)
+            while common < limit and label[common] == pattern[start + common]:
+                common += 1
+            if common < len(label):
+                middle = self._plain_edges[edge] = self._new_plain_node(label[:common])
+                self._labels[child] = label[common:]
+                self._plain_edges[middle * _EDGE_BASE + ord(label[common])] = child
+                child = middle
+            node = child
+            start += common
+        return node
+
+    def is_allowed(self, path: str) -> bool:
+        """Whether path (with its query string) may be fetched under this group."""
+        best = self._longest_match(_normalize(path))
+        return best == NO_MATCH or bool(best & 1)
+
+    def _longest_match(self, path: str) -> int:
+        best = self._wildcard_match(path)
+        edges, labels, match = self._plain_edges, self._labels, self._plain_match
+        node = 0
+        start = 0
+        while start < len(path):
+            child = edges.get(node * _EDGE_BASE + ord(path[start]))
+            if child is None or not path.startswith(labels[child], start):
+                return best
+            node = child
+            start += len(labels[child])
+            best = max(best, match[node])
+        return max(best, self._plain_end_match[node])
+
+    def _wildcard_match(self, path: str) -> int:
+        best = NO_MATCH
+        if len(self._star) == 1:
+            return best
+        edges, star, is_star, match = (
+            self._edges,
+            self._star,
+            self._is_star,
+            self._match,
+        )
+        active = [0] if not star[0] else [0, star[0]]
+        for char in path:
+            code = ord(char)
+            following = []
+            for node in active:
+                if match[node] > best:
+                    best = match[node]
+                child = edges.get(node * _EDGE_BASE + code)
+                if child is not None:
+                    following.append(child)
+                    if star[child]:  # "*" may match nothing
+                        following.append(star[child])
+                if is_star[node]:
+                    following.append(node)
+            if not following:
+                return best
+            # A wildcard can be reached twice in one step; keep the set from growing
+            active = list(dict.fromkeys(following)) if len(following) > 2 else following
+        for node in active:
+            best = max(best, match[node], self._end_match[node])
+        return best
+
+
+class RobotsRules:
+    """
+    A robots.txt parsed per RFC 9309: rules stay in their user-agent groups (groups
+    naming the same agent are merged) and keep their case, Allow rules count, and
+    wildcards are supported. A crawler follows the group naming its product token,
+    else the "*" group, else nothing restricts it; /robots.txt itself is always allowed.
+    """
+
+    def __init__(self, groups: Dict[str, RuleGroup], sitemaps: List[str]) -> None:
+        self.groups = groups
+        self.sitemaps = sitemaps
+
+    def group(self, user_agent: str) -> Optional[RuleGroup]:
+        """The group that applies to user_agent, if any."""
+        return self.groups.get(product_token(user_agent)) or self.groups.get("*")
+
+    def is_allowed(self, user_agent: str, url: str) -> bool:
+        """Whether user_agent may fetch url (an absolute URL or a path)."""
+        if url.startswith("/"):
+            # A path is matched as given; urlsplit would read "//a/b" as host "a"
+            path = url.partition("#")[0]
+        else:
+            parts = urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path = f"{path}?{parts.query}"
+        if path == "/robots.txt":
+            return True
+        group = self.group(user_agent)
+        return group is None or group.is_allowed(path)
+
+    def crawl_delay(self, user_agent: str) -> Optional[float]:
+        """Crawl-delay of user_agent's group, if it sets one."""
+        group = self.group(user_agent)
+        return group.crawl_delay if group is not None else None
+
+
+def _parse_lines(raw: str) -> Iterable[Tuple[str, str]]:
+    """(lowercased field, value) pairs of raw, without comments or blank lines."""
+    for line in raw.splitlines():
+        line = line.split("#", 1)[0].strip()
+        field, sep, value = line.partition(":")
+        if sep:
+            yield field.strip().lower(), value.strip()
+
+
+class _CompiledCache:
+    """
+    Thread-safe LRU of compiled rules keyed by robots.txt content, bounded both by
+    entries and by the total characters of content; larger files are not cached.
+    """
+
+    def __init__(self, max_entries: int, max_chars: int) -> None:
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.chars = 0
+        self._entries: OrderedDict[str, RobotsRules] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, raw: str) -> Optional[RobotsRules]:
+        with self._lock:
+            rules = self._entries.get(raw)
+            if rules is not None:
+                self._entries.move_to_end(raw)
+            return rules
+
+    def put(self, raw: str, rules: RobotsRules) -> None:
+        if len(raw) > self.max_chars:
+            return
+        with self._lock:
+            if raw in self._entries:
+                return
+            self._entries[raw] = rules
+            self.chars += len(raw)
+            while len(self._entries) > self.max_entries or self.chars > self.max_chars:
+                evicted, _ = self._entries.popitem(last=False)
+                self.chars -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.chars = 0
+
+
+_compiled = _CompiledCache(MAX_CACHED_RULES, MAX_CACHED_CHARS)
+
+
+def compile_robots_txt(raw: str) -> RobotsRules:
+    """
+    Parse and compile robots.txt content. Results are memoized by content (see
+    MAX_CACHED_RULES and MAX_CACHED_CHARS), so callers can compile the same origin's
+    robots.txt for every URL they check.
+    """
+    rules = _compiled.get(raw)
+    if rules is None:
+        rules = _compile(raw)
+        _compiled.put(raw, rules)
+    return rules
+
+
+def _compile(raw: str) -> RobotsRules:
+    groups: Dict[str, RuleGroup] = {}
+    sitemaps: List[str] = []
+    current: List[RuleGroup] = []
+    in_rules = False  # A user-agent line after rules starts a new group
+    for field, value in _parse_lines(raw):
+        if field == "user-agent":
+            if in_rules:
+                current, in_rules = [], False
+            token = product_token(value)
+            if token:
+                current.append(groups.setdefault(token, RuleGroup()))
+        elif field in ("allow", "disallow"):
+            in_rules = True
+            for group in current:
+                group.add(value, field == "allow")
+        elif field == "crawl-delay":
+            in_rules = True
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+            for group in current:
+                group.crawl_delay = delay
+        elif field == "sitemap" and value:
+            sitemaps.append(value)
+    return RobotsRules(groups, sitemaps)
+
+
+def robots_rules(robots_info: Dict[str, Any]) -> Optional[RobotsRules]:
+    """Compiled rules of a fetch_robots_txt result, or None if it has no content."""
+    raw = robots_info.get("raw")
+    return compile_robots_txt(raw) if isinstance(raw, str) else None
@@ -0,0 +1,58 @@
+"""Per-host politeness scheduling for crawl delays."""
+
+import threading
+import time
+from typing import Dict
+
+
+class HostScheduler:
+    """
+    Thread-safe tracker of the next time each host may be requested.
+    reserve() hands out consecutive slots spaced by the host's crawl delay, so requests to
+    one host are serialized while other hosts are unaffected. Batch runners use ready_at()
+    to hold back URLs whose host is still cooling down instead of parking a worker on it.
+    """
+
+    def __init__(self, max_hosts: int = 10000) -> None:
+        self.max_hosts = max_hosts
+        self._next_allowed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._next_allowed)
+
+    def reserve(self, host: str, delay: float) -> float:
+        """
+        Claim the next request slot for host, keeping the following one delay seconds later.
+        Returns how many seconds the caller must wait before sending its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed.get(host, now))
+            self._next_allowed[host] = start + delay
+            if len(self._next_allowed) > self.max_hosts:
+                self._prune(now)
+            return start - now
+
+    def defer(self, host: str, seconds: float) -> None:
+        """
+        Keep host free of new requests for at least seconds, e.g. while a request to it
+        backs off after a 429 or 503. Slots already handed out are not moved.
+        """
+        with self._lock:
+            now = time.monotonic()
+            ready = self._next_allowed.get(host, now)
+            self._next_allowed[host] = max(ready, now + seconds)
+            if len(self._next_allowed) > self.max_hosts:
+                self._prune(now)
+
+    def ready_at(self, host: str) -> float:
+        """Return the monotonic time at which host may next be requested (0.0 if free)."""
+        with self._lock:
+            return self._next_allowed.get(host, 0.0)
+
+    def _prune(self, now: float) -> None:
+        """Forget hosts whose slots have passed; they are free again anyway."""
+        expired = [host for host, ready in self._next_allowed.items() if ready <= now]
+        for host in expired:
+            del self._next_allowed[host]
@@ -0,0 +1,183 @@
+"""Streaming sitemap ingestion: page URLs from sitemaps, sitemap indexes and .xml.gz files."""
+
+import gzip
+import io
+import itertools
+import zlib
+from collections import deque
+from collections.abc import Buffer
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urljoin
+
+import requests
+from lxml import etree
+
+from .retry import RetryPolicy
+from .robots import fetch_robots_txt
+from .utils import USER_AGENT, retry_get
+
+# The sitemap protocol caps a sitemap at 50 MB uncompressed; indexes may not nest, but
+# some sites do, so a few levels are followed
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+MAX_INDEX_DEPTH = 3
+CHUNK_SIZE = 64 * 1024
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# Per-sitemap failures: a bad sitemap is skipped and the rest are still read
+_SITEMAP_ERRORS = (
+    requests.RequestException,
+    etree.XMLSyntaxError,
+    gzip.BadGzipFile,
+    zlib.error,
+    OSError,
+    EOFError,
+)
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read-only raw file over an iterator of byte chunks, failing past limit bytes."""
+
+    def __init__(self, chunks: Iterable[bytes], limit: Optional[int] = None) -> None:
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+        self._limit = limit
+        self._read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        target = memoryview(buffer).cast("B")
+        size = min(target.nbytes, self._pending.nbytes)
+        target[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        self._read += size
+        if self._limit is not None and self._read > self._limit:
+            raise OSError(f"Sitemap is larger than {self._limit} bytes")
+        return size
+
+
+def _open_sitemap(chunks: Iterator[bytes], max_bytes: int) -> _ChunkReader:
+    """A file reading the sitemap's XML, gunzipping .xml.gz bodies on the fly."""
+    first = next(chunks, b"")
+    xml: Iterator[bytes] = itertools.chain([first], chunks)
+    if first.startswith(_GZIP_MAGIC):
+        # Served as a file rather than with Content-Encoding, so still compressed here
+        gunzip = gzip.GzipFile(fileobj=_ChunkReader(xml))
+        xml = iter(lambda: gunzip.read(CHUNK_SIZE), b"")
+    return _ChunkReader(xml, max_bytes)
+
+
+def parse_sitemap(stream: _ChunkReader) -> Iterator[Tuple[str, str]]:
+    """
+    Yield ("url", loc) for each <url> of a urlset and ("sitemap", loc) for each <sitemap>
+    of a sitemap index, as they are parsed. Elements are discarded once read, so memory
+    stays flat however many entries the file holds.
+    """
+    for _, element in etree.iterparse(
+        stream,
+        events=("end",),
+        tag=("{*}url", "{*}sitemap"),
+        resolve_entities=False,
+        no_network=True,
+    ):
+        loc = (element.findtext("{*}loc") or "").strip()
+        if loc:
+            yield etree.QName(element).localname, loc
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def _stream_sitemap(
+    url: str,
+    session: Optional[requests.Session],
+    policy: Optional[RetryPolicy],
+    max_bytes: int,
+) -> Iterator[Tuple[str, str]]:
+    """Download the sitemap at url and yield its entries while it is still arriving."""
+    response = retry_get(
+        url,
+        headers={"User-Agent": USER_AGENT},
+        timeout=10,
+        allow_redirects=True,
+        stream=True,
+        session=session,
+        policy=policy,
+    )
+    try:
+        if response.status_code != 200:
+            raise OSError(f"Sitemap not found (status {response.status_code})")
+        stream = _open_sitemap(response.iter_content(chunk_size=CHUNK_SIZE), max_bytes)
+        yield from parse_sitemap(stream)
+    finally:
+        response.close()
+
+
+def iter_sitemap_urls(
+    sitemap_urls: Iterable[str],
+    session: Optional[requests.Session] = None,
+    policy: Optional[RetryPolicy] = None,
+    max_depth: int = MAX_INDEX_DEPTH,
+    max_bytes: int = MAX_SITEMAP_BYTES,
+    on_error: Optional[Callable[[str, str], None]] = None,
+) -> Iterator[str]:
+    """
+    Yield the page URLs listed in the given sitemaps, one at a time as each sitemap is
+    downloaded and parsed, so a 50,000-URL file never sits in memory. Sitemaps may be
+    gzip-compressed. Sitemap indexes are followed breadth-first up to max_depth levels
+    and every sitemap is read at most once; page URLs are passed on as listed, without
+    deduplication. A sitemap that fails to download or parse, or exceeds max_bytes
+    uncompressed, is reported to on_error(sitemap_url, message) and skipped; URLs it
+    yielded before failing stand.
+    """
+    queue: Deque[Tuple[str, int]] = deque((url, 0) for url in sitemap_urls)
+    seen: Set[str] = set()
+    while queue:
+        url, depth = queue.popleft()
+        if url in seen:
+            continue
+        seen.add(url)
+        try:
+            for kind, loc in _stream_sitemap(url, session, policy, max_bytes):
+                if kind == "url":
+                    yield loc
+                elif depth < max_depth:
+                    queue.append((urljoin(url, loc), depth + 1))
+        except _SITEMAP_ERRORS as e:
+            if on_error is not None:
+                on_error(url, str(e))
+
+
+def site_sitemaps(
+    site: str,
+    session: Optional[requests.Session] = None,
+    policy: Optional[RetryPolicy] = None,
+) -> List[str]:
+    """
+    Sitemap URLs announced in site's robots.txt, or the conventional /sitemap.xml when
+    it lists none or cannot be fetched.
+    """
+    robots_info = fetch_robots_txt(site, session=session, policy=policy)
+    return robots_info.get("sitemaps") or [urljoin(site, "/sitemap.xml")]
+
+
+def iter_site_urls(
+    site: str,
+    session: Optional[requests.Session] = None,
+    policy: Optional[RetryPolicy] = None,
+    **options: Any,
+) -> Iterator[str]:
+    """
+    Yield every page URL in site's sitemaps (see site_sitemaps). Extra keyword arguments
+    are passed to iter_sitemap_urls.
+    """
+    yield from iter_sitemap_urls(
+        site_sitemaps(site, session, policy), session=session, policy=policy, **options
+    )
@@ -0,0 +1,249 @@
+"""SQLite result sink writing batch records into normalized tables."""
+
+import json
+import sqlite3
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .output import project
+from .robots import robots_cache_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    source TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    records INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans (id),
+    origin TEXT,
+    status_code INTEGER,
+    final_url TEXT,
+    error TEXT,
+    depth INTEGER,
+    body TEXT,
+    timings TEXT,
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS urls_scan ON urls (scan_id);
+CREATE INDEX IF NOT EXISTS urls_origin ON urls (origin);
+CREATE TABLE IF NOT EXISTS technologies (
+    url TEXT NOT NULL REFERENCES urls (url),
+    name TEXT NOT NULL,
+    version TEXT,
+    PRIMARY KEY (url, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS technologies_name ON technologies (name);
+CREATE TABLE IF NOT EXISTS headers (
+    url TEXT NOT NULL REFERENCES urls (url),
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (url, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS robots (
+    origin TEXT PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans (id),
+    crawl_delay REAL,
+    error TEXT,
+    raw TEXT
+);
+CREATE TABLE IF NOT EXISTS robots_entries (
+    origin TEXT NOT NULL REFERENCES robots (origin),
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (origin, kind, value)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_URL = """
+INSERT INTO urls (url, scan_id, origin, status_code, final_url, error, depth, body,
+                  timings, scanned_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url) DO UPDATE SET
+    scan_id = excluded.scan_id,
+    origin = excluded.origin,
+    status_code = excluded.status_code,
+    final_url = excluded.final_url,
+    error = excluded.error,
+    depth = excluded.depth,
+    body = excluded.body,
+    timings = excluded.timings,
+    scanned_at = excluded.scanned_at
+"""
+
+_UPSERT_ROBOTS = """
+INSERT INTO robots (origin, scan_id, crawl_delay, error, raw) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (origin) DO UPDATE SET
+    scan_id = excluded.scan_id,
+    crawl_delay = excluded.crawl_delay,
+    error = excluded.error,
+    raw = excluded.raw
+"""
+
+# robots_txt list fields stored in robots_entries, by kind
+_ROBOTS_ENTRIES = (
+    ("disallow", "disallowed"),
+    ("sitemap", "sitemaps"),
+    ("user_agent", "user_agents"),
+)
+
+
+def _origin(url: str) -> Optional[str]:
+    """url's origin, or None for a URL whose host or port cannot be parsed."""
+    try:
+        return robots_cache_key(url)
+    except ValueError:
+        return None
+
+
+class SQLiteSink:
+    """
+    Writes batch records into a SQLite database as one row per URL in urls, with their
+    technologies, headers and (per origin) robots.txt in their own tables, and one row
+    in scans per run. Records are projected onto fields first, like NDJSONWriter, and
+    written in batches of flush_every records or every flush_interval seconds, each in
+    a single transaction. Re-runs upsert: a URL keeps only its latest result, and its
+    technologies and headers are replaced. A URL whose host or port cannot be parsed is
+    stored with a NULL origin. on_flush, if given, is called after each flush. Use from
+    one thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fields: Optional[Sequence[str]] = None,
+        source: Optional[str] = None,
+        flush_every: int = 1000,
+        flush_interval: float = 1.0,
+        on_flush: Optional[Callable[[], None]] = None,
+    ) -> None:
+        if flush_every < 1:
+            raise ValueError("flush_every must be at least 1")
+        self.path = path
+        self.fields = fields
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.count = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        with self._conn:
+            row = self._conn.execute(
+                "INSERT INTO scans (source, started_at) VALUES (?, ?) RETURNING id",
+                (source, time.time()),
+            ).fetchone()
+        self.scan_id: int = row[0]
+        self._records: List[Dict[str, Any]] = []
+        self._origins: Set[str] = set()  # Origins whose robots.txt this scan wrote
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> "SQLiteSink":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Queue one record, flushing if the batch is full or the interval has passed."""
+        self._records.append(project(record, self.fields))
+        self.count += 1
+        if (
+            len(self._records) >= self.flush_every
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write queued records in one transaction."""
+        if self._records:
+            with self._conn:
+                self._insert(self._records)
+            self._records.clear()
+        self._last_flush = time.monotonic()
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def close(self) -> None:
+        """Flush remaining records, finish the scan row and close the database."""
+        self.flush()
+        with self._conn:
+            self._conn.execute(
+                "UPDATE scans SET finished_at = ?, records = ? WHERE id = ?",
+                (time.time(), self.count, self.scan_id),
+            )
+        self._conn.close()
+
+    def _insert(self, records: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        urls = []
+        technologies: List[Tuple[str, str, Optional[str]]] = []
+        headers: List[Tuple[str, str, str]] = []
+        robots = []
+        robots_entries: List[Tuple[str, str, str]] = []
+        for record in records:
+            url = record["url"]
+            origin = _origin(url)
+            timings = record.get("timings")
+            urls.append(
+                (
+                    url,
+                    self.scan_id,
+                    origin,
+                    record.get("status_code"),
+                    record.get("final_url"),
+                    record.get("error"),
+                    record.get("depth"),
+                    record.get("body"),
+                    json.dumps(timings) if timings is not None else None,
+                    now,
+                )
+            )
+            for tech in record.get("technologies") or ():
+                technologies.append((url, tech["name"], tech.get("version")))
+            for name, value in (record.get("headers") or {}).items():
+                headers.append((url, name, value))
+            robots_info = record.get("robots_txt")
+            if (
+                robots_info is not None
+                and origin is not None
+                and origin not in self._origins
+            ):
+                self._origins.add(origin)
+                robots.append(
+                    (
+                        origin,
+                        self.scan_id,
+                        robots_info.get("crawl_delay"),
+                        robots_info.get("error"),
+                        robots_info.get("raw"),
+                    )
+                )
+                for kind, key in _ROBOTS_ENTRIES:
+                    for value in robots_info.get(key) or ():
+                        robots_entries.append((origin, kind, value))
+
+        # Replace the child rows of every URL in the batch, then insert the new ones
+        keys = [(row[0],) for row in urls]
+        self._conn.executemany("DELETE FROM technologies WHERE url = ?", keys)
+        self._conn.executemany("DELETE FROM headers WHERE url = ?", keys)
+        self._conn.executemany(_UPSERT_URL, urls)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO technologies VALUES (?, ?, ?)", technologies
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO headers VALUES (?, ?, ?)", headers
+        )
+        if robots:
+            self._conn.executemany(
+                "DELETE FROM robots_entries WHERE origin = ?",
+                [(row[0],) for row in robots],
+            )
+            self._conn.executemany(_UPSERT_ROBOTS, robots)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO robots_entries VALUES (?, ?, ?)", robots_entries
+            )
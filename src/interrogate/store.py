@@ -0,0 +1,162 @@
+"""Persistent SQLite store of robots.txt results and page validators."""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS robots (
+    origin TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    robots_info TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    status_code INTEGER NOT NULL,
+    final_url TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+class StoredRobots(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    robots_info: Dict[str, Any]
+
+
+class StoredPage(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    status_code: int
+    final_url: str
+    headers: Dict[str, str]
+    content: bytes
+
+
+def conditional_headers(
+    stored: Optional[Union[StoredRobots, StoredPage]],
+) -> Dict[str, str]:
+    """Return If-None-Match/If-Modified-Since request headers for a stored response."""
+    headers: Dict[str, str] = {}
+    if stored is None:
+        return headers
+    if stored.etag:
+        headers["If-None-Match"] = stored.etag
+    if stored.last_modified:
+        headers["If-Modified-Since"] = stored.last_modified
+    return headers
+
+
+class ValidatorStore:
+    """
+    SQLite-backed store keeping parsed robots.txt per origin and the capped body of each
+    page, together with their ETag/Last-Modified validators. Later runs send conditional
+    requests and reuse the stored data on 304 Not Modified. Only responses that carry a
+    validator are stored. Safe to share between threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ValidatorStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get_robots(self, origin: str) -> Optional[StoredRobots]:
+        """Return the stored robots.txt result for an origin, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, robots_info FROM robots WHERE origin = ?",
+                (origin,),
+            ).fetchone()
+        if row is None:
+            return None
+        return StoredRobots(row[0], row[1], json.loads(row[2]))
+
+    def put_robots(
+        self,
+        origin: str,
+        response_headers: Mapping[str, str],
+        robots_info: Dict[str, Any],
+    ) -> None:
+        """Store a parsed robots.txt result if its response carries a validator."""
+        etag, last_modified = _validators(response_headers)
+        if etag is None and last_modified is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO robots VALUES (?, ?, ?, ?, ?)",
+                (origin, etag, last_modified, json.dumps(robots_info), time.time()),
+            )
+
+    def get_page(self, url: str) -> Optional[StoredPage]:
+        """Return the stored response for a page URL, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, status_code, final_url, headers, content "
+                "FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return StoredPage(row[0], row[1], row[2], row[3], json.loads(row[4]), row[5])
+
+    def put_page(
+        self,
+        url: str,
+        status_code: int,
+        final_url: str,
+        headers: Dict[str, str],
+        content: Union[bytes, bytearray],
+    ) -> None:
+        """Store a 200 page response if it carries a validator."""
+        etag, last_modified = _validators(headers)
+        if status_code != 200 or (etag is None and last_modified is None):
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    etag,
+                    last_modified,
+                    status_code,
+                    final_url,
+                    json.dumps(headers),
+                    content,
+                    time.time(),
+                ),
+            )
+
+
+def _validators(headers: Mapping[str, str]) -> Tuple[Optional[str], Optional[str]]:
+    """Extract ETag and Last-Modified, matching header names case-insensitively."""
+    etag = last_modified = None
+    for name, value in headers.items():
+        lowered = name.lower()
+        if lowered == "etag":
+            etag = value
+        elif lowered == "last-modified":
+            last_modified = value
+    return etag, last_modified
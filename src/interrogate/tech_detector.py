@@ -1,330 +1,476 @@
+import codecs
 import re
-from typing import Dict, List, Optional, Any
+from collections.abc import Buffer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Tuple,
+)
 from bs4 import BeautifulSoup
+from lxml import etree
+from .timings import Timings, measure
+from .tracing import span
 from .utils import extract_version
 
+# Signature registry. Everything below is compiled once at import;
+# detect_technologies only evaluates it.
 
-def detect_technologies(
-    headers: Dict[str, str],
-    body: Optional[str],
-    robots_txt: Optional[Dict[str, Any]] = None,
-) -> List[Dict[str, Optional[str]]]:
-    """
-    Detect technologies from headers and body with version extraction.
-    Returns list of dicts with 'name' and optional 'version'.
-    """
-    techs = []
-
-    # Define regex patterns for servers with version extraction
-    server_patterns = {
-        "Tomcat": re.compile(r"\bApache Tomcat(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-        "Apache": re.compile(r"\bApache(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-        "Nginx": re.compile(r"\bnginx(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-        "IIS": re.compile(r"\bMicrosoft-IIS(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-        "LiteSpeed": re.compile(r"\bLiteSpeed(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-        "Caddy": re.compile(r"\bCaddy(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-    }
+_VERSION = r"(\d+(?:\.\d+)*)"
 
-    # Check Server header
-    if "Server" in headers:
-        server = headers["Server"]
-        for name, pattern in server_patterns.items():
-            match = pattern.search(server)
-            if match:
-                techs.append({"name": name, "version": extract_version(match)})
-                break  # Assume only one server
-
-    # Define patterns for X-Powered-By
-    powered_by_patterns = {
-        "PHP": re.compile(r"\bPHP(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-        "ASP.NET": re.compile(r"\bASP\.NET(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-        "Node.js": re.compile(r"\bNode\.js(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-        "Python": re.compile(r"\bPython(?:/(\d+(?:\.\d+)*))?", re.IGNORECASE),
-    }
 
-    if "X-Powered-By" in headers:
-        powered_by = headers["X-Powered-By"]
-        for name, pattern in powered_by_patterns.items():
-            match = pattern.search(powered_by)
-            if match:
-                techs.append({"name": name, "version": extract_version(match)})
-                break  # Assume one primary runtime
+def _product_pattern(product: str) -> Pattern[str]:
+    """Compile a 'Product/1.2.3' header pattern with an optional version."""
+    return re.compile(rf"\b{product}(?:/{_VERSION})?", re.IGNORECASE)
 
-    # X-Generator for WordPress
-    if "X-Generator" in headers:
-        generator = headers["X-Generator"]
-        wp_match = re.search(
-            r"\bWordPress(?: (\d+(?:\.\d+)*))?", generator, re.IGNORECASE
-        )
-        if wp_match:
-            techs.append({"name": "WordPress", "version": extract_version(wp_match)})
-
-    # CDN detection with prioritization
-    # Order: specific headers first, then server strings
-    cdn_checks = [
+
+# Server header, checked in order; only the first match is reported
+SERVER_SIGNATURES: Tuple[Tuple[str, Pattern[str]], ...] = (
+    ("Tomcat", _product_pattern(r"Apache Tomcat")),
+    ("Apache", _product_pattern(r"Apache")),
+    ("Nginx", _product_pattern(r"nginx")),
+    ("IIS", _product_pattern(r"Microsoft-IIS")),
+    ("LiteSpeed", _product_pattern(r"LiteSpeed")),
+    ("Caddy", _product_pattern(r"Caddy")),
+)
+
+# X-Powered-By header, checked in order; only the first match is reported
+POWERED_BY_SIGNATURES: Tuple[Tuple[str, Pattern[str]], ...] = (
+    ("PHP", _product_pattern(r"PHP")),
+    ("ASP.NET", _product_pattern(r"ASP\.NET")),
+    ("Node.js", _product_pattern(r"Node\.js")),
+    ("Python", _product_pattern(r"Python")),
+)
+
+# X-Generator header
+GENERATOR_HEADER_SIGNATURES: Tuple[Tuple[str, Pattern[str]], ...] = (
+    ("WordPress", re.compile(rf"\bWordPress(?: {_VERSION})?", re.IGNORECASE)),
+)
+
+
+class HeaderCheck(NamedTuple):
+    """Matches when header is present and, if pattern is set, its value matches."""
+
+    header: str
+    pattern: Optional[Pattern[str]] = None
+
+
+# CDN detection with prioritization
+# Order: specific headers first, then server strings
+CDN_SIGNATURES: Tuple[Tuple[str, Tuple[HeaderCheck, ...]], ...] = (
+    (
+        "Fastly",
         (
-            "Fastly",
-            [
-                lambda h: "X-Served-By" in h,
-                lambda h: "X-Cache" in h and "fastly" in h["X-Cache"].lower(),
-                lambda h: "Server" in h
-                and re.search(r"\bfastly\b", h["Server"], re.IGNORECASE),
-            ],
+            HeaderCheck("X-Served-By"),
+            HeaderCheck("X-Cache", re.compile(r"fastly", re.IGNORECASE)),
+            HeaderCheck("Server", re.compile(r"\bfastly\b", re.IGNORECASE)),
         ),
+    ),
+    (
+        "Cloudflare",
         (
-            "Cloudflare",
-            [
-                lambda h: "CF-RAY" in h,
-                lambda h: "CF-IPCountry" in h,
-                lambda h: "Server" in h
-                and re.search(r"\bcloudflare\b", h["Server"], re.IGNORECASE),
-            ],
+            HeaderCheck("CF-RAY"),
+            HeaderCheck("CF-IPCountry"),
+            HeaderCheck("Server", re.compile(r"\bcloudflare\b", re.IGNORECASE)),
         ),
+    ),
+    (
+        "Akamai",
         (
-            "Akamai",
-            [
-                lambda h: "X-Akamai-Transformed" in h,
-                lambda h: "X-Cache" in h and "AkamaiGHost" in h["X-Cache"],
-                lambda h: "Server" in h
-                and re.search(r"\bakamai\b", h["Server"], re.IGNORECASE),
-            ],
+            HeaderCheck("X-Akamai-Transformed"),
+            HeaderCheck("X-Cache", re.compile(r"AkamaiGHost")),
+            HeaderCheck("Server", re.compile(r"\bakamai\b", re.IGNORECASE)),
         ),
+    ),
+    (
+        "AWS CloudFront",
         (
-            "AWS CloudFront",
-            [
-                lambda h: "X-Amz-Cf-Id" in h,
-                lambda h: "Via" in h and "cloudfront.net" in h["Via"],
-                lambda h: "X-Cache" in h and "cloudfront" in h["X-Cache"].lower(),
-            ],
+            HeaderCheck("X-Amz-Cf-Id"),
+            HeaderCheck("Via", re.compile(r"cloudfront\.net")),
+            HeaderCheck("X-Cache", re.compile(r"cloudfront", re.IGNORECASE)),
         ),
+    ),
+    (
+        "Azure CDN",
         (
-            "Azure CDN",
-            [
-                lambda h: "X-Azure-Ref" in h,
-                lambda h: "X-Azure-RequestChain" in h,
-                lambda h: "Server" in h
-                and re.search(r"\bazurecdn\b", h["Server"], re.IGNORECASE),
-            ],
+            HeaderCheck("X-Azure-Ref"),
+            HeaderCheck("X-Azure-RequestChain"),
+            HeaderCheck("Server", re.compile(r"\bazurecdn\b", re.IGNORECASE)),
         ),
+    ),
+    (
+        "Google Cloud CDN",
         (
-            "Google Cloud CDN",
-            [
-                lambda h: "Server" in h
-                and re.search(r"\bgoogle frontend\b", h["Server"], re.IGNORECASE),
-                lambda h: "X-Cache" in h and h["X-Cache"].upper() in ["HIT", "MISS"],
-            ],
+            HeaderCheck("Server", re.compile(r"\bgoogle frontend\b", re.IGNORECASE)),
+            HeaderCheck("X-Cache", re.compile(r"\A(?:HIT|MISS)\Z", re.IGNORECASE)),
         ),
+    ),
+    (
+        "Bunny CDN",
         (
-            "Bunny CDN",
-            [
-                lambda h: "X-Bunny-Id" in h,
-                lambda h: "Server" in h
-                and re.search(r"\bbunnycdn\b", h["Server"], re.IGNORECASE),
-            ],
+            HeaderCheck("X-Bunny-Id"),
+            HeaderCheck("Server", re.compile(r"\bbunnycdn\b", re.IGNORECASE)),
         ),
+    ),
+    (
+        "Imperva",
+        (HeaderCheck("X-Iinfo"),),
+    ),
+    (
+        "KeyCDN",
         (
-            "Imperva",
-            [
-                lambda h: "X-Iinfo" in h,
-            ],
+            HeaderCheck("X-Edge-Location"),
+            HeaderCheck("Server", re.compile(r"\bkeycdn\b", re.IGNORECASE)),
         ),
+    ),
+    (
+        "StackPath",
         (
-            "KeyCDN",
-            [
-                lambda h: "X-Edge-Location" in h,
-                lambda h: "Server" in h
-                and re.search(r"\bkeycdn\b", h["Server"], re.IGNORECASE),
-            ],
+            HeaderCheck("X-HW"),
+            HeaderCheck("Server", re.compile(r"\bstackpath\b", re.IGNORECASE)),
         ),
+    ),
+    (
+        "CDN77",
         (
-            "StackPath",
-            [
-                lambda h: "X-HW" in h,
-                lambda h: "Server" in h
-                and re.search(r"\bstackpath\b", h["Server"], re.IGNORECASE),
-            ],
+            HeaderCheck("X-Cache-Status"),
+            HeaderCheck("Server", re.compile(r"\bcdn77\b", re.IGNORECASE)),
         ),
-        (
-            "CDN77",
-            [
-                lambda h: "X-Cache-Status" in h,
-                lambda h: "Server" in h
-                and re.search(r"\bcdn77\b", h["Server"], re.IGNORECASE),
-            ],
+    ),
+)
+
+
+class GeneratorSignature(NamedTuple):
+    """A <meta name="generator"> keyword; versioned CMSs are only reported with a version."""
+
+    keyword: str
+    name: str
+    requires_version: bool = False
+
+
+# Meta tags for CMSs, checked in order; the first keyword found wins
+GENERATOR_SIGNATURES: Tuple[GeneratorSignature, ...] = (
+    GeneratorSignature("wordpress", "WordPress", requires_version=True),
+    GeneratorSignature("joomla", "Joomla", requires_version=True),
+    GeneratorSignature("drupal", "Drupal", requires_version=True),
+    GeneratorSignature("wix", "Wix"),
+    GeneratorSignature("squarespace", "Squarespace"),
+)
+
+
+class ScriptSignature(NamedTuple):
+    """
+    A <script src> signature. It applies when any keyword is in the lowercased src (or
+    any page marker is in the page) and every required substring is in src. Version
+    patterns are tried on src, then page_versions on the page.
+    """
+
+    name: str
+    keywords: Tuple[str, ...]
+    required: Tuple[str, ...] = ()
+    versions: Tuple[Pattern[str], ...] = ()
+    requires_version: bool = False
+    page_markers: Tuple[str, ...] = ()
+    page_versions: Tuple[Pattern[str], ...] = ()
+
+
+# Script sources, checked in order; the first applicable signature wins per script
+SCRIPT_SIGNATURES: Tuple[ScriptSignature, ...] = (
+    ScriptSignature(
+        "jQuery",
+        ("jquery",),
+        versions=(re.compile(rf"jquery-{_VERSION}"),),
+        requires_version=True,
+    ),
+    ScriptSignature(
+        "React",
+        ("react",),
+        versions=(re.compile(rf"react(?:\.|@){_VERSION}"),),
+        requires_version=True,
+        page_markers=("__next_data__",),
+        page_versions=(re.compile(rf'"version":"{_VERSION}"'),),
+    ),
+    ScriptSignature(
+        "Vue.js",
+        ("vue",),
+        versions=(re.compile(rf"vue(?:\.|@){_VERSION}"),),
+        requires_version=True,
+    ),
+    ScriptSignature(
+        "Angular",
+        ("angular",),
+        versions=(
+            re.compile(rf"angularjs/{_VERSION}"),
+            re.compile(rf"angular(?:\.|@){_VERSION}"),
         ),
-    ]
+        requires_version=True,
+    ),
+    ScriptSignature(
+        "Alpine.js",
+        ("alpine",),
+        versions=(
+            re.compile(rf"alpinejs@{_VERSION}"),
+            re.compile(rf"alpine(?:\.|@){_VERSION}"),
+        ),
+        requires_version=True,
+    ),
+    ScriptSignature(
+        "Bootstrap",
+        ("bootstrap",),
+        versions=(
+            re.compile(rf"bootstrap/{_VERSION}"),
+            re.compile(rf"bootstrap(?:\.|@){_VERSION}"),
+        ),
+        requires_version=True,
+    ),
+    ScriptSignature("Google Analytics", ("googletagmanager", "analytics.js", "gtag")),
+    ScriptSignature("Facebook Pixel", ("facebook",), required=("fbevents",)),
+    ScriptSignature("Hotjar", ("hotjar",)),
+    ScriptSignature("Shopify", ("shopify",)),
+    ScriptSignature("Magento", ("magento",)),
+    ScriptSignature("PrestaShop", ("prestashop",)),
+)
 
-    for cdn_name, checks in cdn_checks:
-        for check in checks:
-            if check(headers):
-                techs.append({"name": cdn_name, "version": None})
-                break  # Found this CDN, skip to next
 
-    # HTML-based detection with BeautifulSoup
-    if body:
-        is_html = re.search(r"<!DOCTYPE|<html", body[:1000], re.IGNORECASE)
-        if is_html:
-            limited_body = body[: 100 * 1024]  # Limit to 100KB
-            soup = BeautifulSoup(limited_body, "lxml")
-
-            # Meta tags for CMSs
-            for meta in soup.find_all("meta"):
-                name = str(meta.get("name", "")).lower()
-                content = str(meta.get("content", "")).lower()
-                if name == "generator":
-                    if "wordpress" in content:
-                        version_match = re.search(r"(\d+(?:\.\d+)*)", content)
-                        if version_match:
-                            techs.append(
-                                {
-                                    "name": "WordPress",
-                                    "version": extract_version(version_match),
-                                }
-                            )
-                    elif "joomla" in content:
-                        version_match = re.search(r"(\d+(?:\.\d+)*)", content)
-                        if version_match:
-                            techs.append(
-                                {
-                                    "name": "Joomla",
-                                    "version": extract_version(version_match),
-                                }
-                            )
-                    elif "drupal" in content:
-                        version_match = re.search(r"(\d+(?:\.\d+)*)", content)
-                        if version_match:
-                            techs.append(
-                                {
-                                    "name": "Drupal",
-                                    "version": extract_version(version_match),
-                                }
-                            )
-                    elif "wix" in content:
-                        techs.append({"name": "Wix", "version": None})
-                    elif "squarespace" in content:
-                        techs.append({"name": "Squarespace", "version": None})
-
-            # Script sources (limit to 30)
-            scripts = soup.find_all("script", src=True)[:30]
-            for script in scripts:
-                src = str(script["src"]).lower()
-                if "jquery" in src:
-                    version_match = re.search(r"jquery-(\d+(?:\.\d+)*)", src)
-                    if version_match:
-                        techs.append(
-                            {
-                                "name": "jQuery",
-                                "version": extract_version(version_match),
-                            }
-                        )
-                elif "react" in src or "__next_data__" in limited_body:
-                    version_match = re.search(
-                        r"react(?:\.|@)(\d+(?:\.\d+)*)", src
-                    ) or re.search(r'"version":"(\d+(?:\.\d+)*)"', limited_body)
-                    if version_match:
-                        techs.append(
-                            {
-                                "name": "React",
-                                "version": extract_version(version_match),
-                            }
-                        )
-                elif "vue" in src:
-                    version_match = re.search(r"vue(?:\.|@)(\d+(?:\.\d+)*)", src)
-                    if version_match:
-                        techs.append(
-                            {
-                                "name": "Vue.js",
-                                "version": extract_version(version_match),
-                            }
-                        )
-                elif "angular" in src:
-                    version_match = re.search(
-                        r"angularjs/(\d+(?:\.\d+)*)", src
-                    ) or re.search(r"angular(?:\.|@)(\d+(?:\.\d+)*)", src)
-                    if version_match:
-                        techs.append(
-                            {
-                                "name": "Angular",
-                                "version": extract_version(version_match),
-                            }
-                        )
-                elif "alpine" in src:
-                    version_match = re.search(
-                        r"alpinejs@(\d+(?:\.\d+)*)", src
-                    ) or re.search(r"alpine(?:\.|@)(\d+(?:\.\d+)*)", src)
-                    if version_match:
-                        techs.append(
-                            {
-                                "name": "Alpine.js",
-                                "version": extract_version(version_match),
-                            }
-                        )
-                elif "bootstrap" in src:
-                    version_match = re.search(
-                        r"bootstrap/(\d+(?:\.\d+)*)", src
-                    ) or re.search(r"bootstrap(?:\.|@)(\d+(?:\.\d+)*)", src)
-                    if version_match:
-                        techs.append(
-                            {
-                                "name": "Bootstrap",
-                                "version": extract_version(version_match),
-                            }
-                        )
-                elif (
-                    "googletagmanager" in src or "analytics.js" in src or "gtag" in src
-                ):
-                    techs.append({"name": "Google Analytics", "version": None})
-                elif "facebook" in src and "fbevents" in src:
-                    techs.append({"name": "Facebook Pixel", "version": None})
-                elif "hotjar" in src:
-                    techs.append({"name": "Hotjar", "version": None})
-                elif "shopify" in src:
-                    techs.append({"name": "Shopify", "version": None})
-                elif "magento" in src:
-                    techs.append({"name": "Magento", "version": None})
-                elif "prestashop" in src:
-                    techs.append({"name": "PrestaShop", "version": None})
-
-    # Body-based detection (expanded with regex fallbacks)
-    if body:
-        body_patterns = {
-            "jQuery": re.compile(r"\bjquery\b", re.IGNORECASE),
-            "WordPress": re.compile(r"\bwordpress\b", re.IGNORECASE),
-            "Bootstrap": re.compile(r"\bbootstrap\b", re.IGNORECASE),
-            "React": re.compile(r"\breact\b", re.IGNORECASE),
-            "Vue.js": re.compile(r"\bvue\b", re.IGNORECASE),
-            "Angular": re.compile(r"\bangular\b", re.IGNORECASE),
-            "Django": re.compile(r"\bdjango\b", re.IGNORECASE),
-            "Flask": re.compile(r"\bflask\b", re.IGNORECASE),
-            "Joomla": re.compile(r"\bjoomla\b", re.IGNORECASE),
-            "Drupal": re.compile(r"\bdrupal\b", re.IGNORECASE),
-            "Wix": re.compile(r"\bwix\b", re.IGNORECASE),
-            "Squarespace": re.compile(r"\bsquarespace\b", re.IGNORECASE),
-            "Alpine.js": re.compile(r"\balpine\b", re.IGNORECASE),
-            "Google Analytics": re.compile(
-                r"\bgoogle.*analytics\b|\bgtag\b", re.IGNORECASE
-            ),
-            "Facebook Pixel": re.compile(r"\bfacebook.*pixel\b", re.IGNORECASE),
-            "Hotjar": re.compile(r"\bhotjar\b", re.IGNORECASE),
-            "Shopify": re.compile(r"\bshopify\b", re.IGNORECASE),
-            "Magento": re.compile(r"\bmagento\b", re.IGNORECASE),
-            "PrestaShop": re.compile(r"\bprestashop\b", re.IGNORECASE),
-        }
+class BodySignature(NamedTuple):
+    """
+    A keyword fallback over the whole body. Matches any whole word in keywords, or a word
+    starting with the first item of a pair followed later on the same line by a word
+    ending with the second (the old 'google.*analytics' form).
+    """
+
+    name: str
+    keywords: Tuple[str, ...] = ()
+    pairs: Tuple[Tuple[str, str], ...] = ()
+
 
-        for name, pattern in body_patterns.items():
-            if pattern.search(body):
-                techs.append({"name": name, "version": None})
+# Body-based detection (keyword fallbacks over the whole body)
+BODY_SIGNATURES: Tuple[BodySignature, ...] = (
+    BodySignature("jQuery", ("jquery",)),
+    BodySignature("WordPress", ("wordpress",)),
+    BodySignature("Bootstrap", ("bootstrap",)),
+    BodySignature("React", ("react",)),
+    BodySignature("Vue.js", ("vue",)),
+    BodySignature("Angular", ("angular",)),
+    BodySignature("Django", ("django",)),
+    BodySignature("Flask", ("flask",)),
+    BodySignature("Joomla", ("joomla",)),
+    BodySignature("Drupal", ("drupal",)),
+    BodySignature("Wix", ("wix",)),
+    BodySignature("Squarespace", ("squarespace",)),
+    BodySignature("Alpine.js", ("alpine",)),
+    BodySignature("Google Analytics", ("gtag",), pairs=(("google", "analytics"),)),
+    BodySignature("Facebook Pixel", pairs=(("facebook", "pixel"),)),
+    BodySignature("Hotjar", ("hotjar",)),
+    BodySignature("Shopify", ("shopify",)),
+    BodySignature("Magento", ("magento",)),
+    BodySignature("PrestaShop", ("prestashop",)),
+)
 
-    # Robots.txt-based detection
-    if robots_txt and "content" in robots_txt:
-        content = robots_txt["content"]
-        robots_patterns = {
-            "WordPress": re.compile(r"disallow:\s*/wp-admin", re.IGNORECASE),
-            "1C-Bitrix": re.compile(r"disallow:\s*/bitrix/", re.IGNORECASE),
+
+class _BodyScanner:
+    """
+    Matches all body signatures in one pass over the lowercased body: its words (runs
+    of word characters) are collected into a set once and every keyword becomes a set
+    lookup, so cost stays flat as signatures are added. Keywords consist of word
+    characters only, so a whole-word match is exactly a word in that set. Pairs only
+    fall back to a per-line search when both halves occur somewhere in the body.
+    """
+
+    _WORDS = re.compile(r"\w+")
+
+    def __init__(self, signatures: Tuple[BodySignature, ...]) -> None:
+        self.signatures = signatures
+        self._pairs = {
+            (head, tail): (
+                re.compile(rf"\b{re.escape(head)}"),
+                re.compile(rf"{re.escape(tail)}\b"),
+            )
+            for signature in signatures
+            for head, tail in signature.pairs
         }
-        for name, pattern in robots_patterns.items():
-            if pattern.search(content):
-                techs.append({"name": name, "version": None})
+
+    def scan(self, body: str) -> List[str]:
+        """Return the names of all matching signatures, in registry order."""
+        lowered = body.lower()
+        words = set(self._WORDS.findall(lowered))
+        return [
+            signature.name
+            for signature in self.signatures
+            if not words.isdisjoint(signature.keywords)
+            or any(self._pair_on_one_line(lowered, pair) for pair in signature.pairs)
+        ]
+
+    def _pair_on_one_line(self, lowered: str, pair: Tuple[str, str]) -> bool:
+        """True if a word starting with head is followed on its line by one ending with tail."""
+        head, tail = pair
+        if head not in lowered or tail not in lowered:
+            return False
+        head_pattern, tail_pattern = self._pairs[pair]
+        for line in lowered.split("\n"):
+            head_match = head_pattern.search(line)
+            if head_match and tail_pattern.search(line, head_match.end()):
+                return True
+        return False
+
+
+_BODY_SCANNER = _BodyScanner(BODY_SIGNATURES)
+
+# Robots.txt-based detection
+ROBOTS_SIGNATURES: Tuple[Tuple[str, Pattern[str]], ...] = (
+    ("WordPress", re.compile(r"disallow:\s*/wp-admin", re.IGNORECASE)),
+    ("1C-Bitrix", re.compile(r"disallow:\s*/bitrix/", re.IGNORECASE)),
+)
+
+_HTML_MARKER = re.compile(r"<!DOCTYPE|<html", re.IGNORECASE)
+_META_VERSION = re.compile(_VERSION)
+
+# Limit HTML parsing to the first 100KB and script inspection to 30 tags
+MAX_HTML_SIZE = 100 * 1024
+MAX_SCRIPTS = 30
+
+# HTML parser modes: "fast" streams the page through lxml keeping only the tags we
+# inspect, "soup" builds a full BeautifulSoup tree (slower, kept as a fallback)
+HTML_PARSERS = ("fast", "soup")
+
+# Bytes an incremental download keeps reading after </head> before it may stop
+HEAD_BUDGET = 16 * 1024
+_HEAD_END = re.compile(r"</head", re.IGNORECASE)
+
+# Generator meta contents and script sources found in a page
+HtmlTags = Tuple[List[str], List[str]]
+
+
+def detect_technologies(
+    headers: Dict[str, str],
+    body: Optional[str],
+    robots_txt: Optional[Dict[str, Any]] = None,
+    html_parser: str = "fast",
+    timings: Optional[Timings] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Detect technologies from headers and body with version extraction.
+    Returns list of dicts with 'name' and optional 'version'.
+    html_parser selects how HTML tags are extracted, see HTML_PARSERS.
+    With timings, tag extraction counts as "html_parse" and the rest as "signature_match".
+    """
+    if html_parser not in HTML_PARSERS:
+        raise ValueError(f"Unknown HTML parser: {html_parser}")
+    extract = _extract_tags if html_parser == "fast" else _extract_tags_soup
+    return _detect(headers, body, robots_txt, extract, timings)
+
+
+class IncrementalDetector:
+    """
+    Technology detection fed with body chunks as they are downloaded. HTML tags are
+    extracted by an lxml target parser while the transfer is running, and feed() tells
+    the caller when reading can stop: once </head> has been seen and head_budget more
+    bytes have arrived, since generator meta tags and framework scripts live in <head>.
+    Body keyword fallbacks then only see what was read. detect() gives the same result
+    as detect_technologies on the decoded body that was fed.
+    """
+
+    def __init__(self, head_budget: int = HEAD_BUDGET) -> None:
+        self.head_budget = head_budget
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._collector = _TagCollector()
+        self._parser = etree.HTMLParser(target=self._collector)
+        self._parsed = 0  # Characters fed to the parser, up to MAX_HTML_SIZE
+        self._failed = False
+        self._tail = ""  # End of the previous chunk, to find </head split across chunks
+        self._received = 0
+        self._stop_at: Optional[int] = None
+
+    def feed(self, chunk: Buffer) -> bool:
+        """Consume the next body chunk. Returns True when the download can stop."""
+        self._received += memoryview(chunk).nbytes
+        text = self._decoder.decode(chunk)
+        if self._stop_at is None:
+            window = self._tail + text
+            if _HEAD_END.search(window):
+                self._stop_at = self._received + self.head_budget
+            self._tail = window[-5:]
+        if not self._failed and self._parsed < MAX_HTML_SIZE:
+            piece = text[: MAX_HTML_SIZE - self._parsed]
+            self._parsed += len(piece)
+            try:
+                self._parser.feed(piece)
+            except etree.LxmlError:
+                self._failed = True
+        return self.done
+
+    @property
+    def done(self) -> bool:
+        """Whether head_budget bytes past </head> have been fed."""
+        return self._stop_at is not None and self._received >= self._stop_at
+
+    def detect(
+        self,
+        headers: Dict[str, str],
+        body: Optional[str],
+        robots_txt: Optional[Dict[str, Any]] = None,
+        timings: Optional[Timings] = None,
+    ) -> List[Dict[str, Optional[str]]]:
+        """
+        Finish parsing and detect technologies; body is the decoded text that was fed.
+        Parsing done by feed() is part of the download, so "html_parse" in timings only
+        covers closing the parser (and any soup fallback).
+        """
+        with measure(timings, "html_parse"), span("detect.html_parse"):
+            if not self._failed:
+                try:
+                    self._parser.close()
+                except etree.LxmlError:
+                    self._failed = True
+        return _detect(headers, body, robots_txt, self._tags, timings)
+
+    def _tags(self, html: str) -> HtmlTags:
+        if self._failed:
+            return _extract_tags_soup(html)
+        return self._collector.generators, self._collector.script_srcs
+
+
+def _detect(
+    headers: Dict[str, str],
+    body: Optional[str],
+    robots_txt: Optional[Dict[str, Any]],
+    extract: Callable[[str], HtmlTags],
+    timings: Optional[Timings] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """
+    Run every detection stage, extracting HTML tags from the page with extract.
+    Parsing and each signature group are traced as "detect.*" spans.
+    """
+    tags = None
+    if body:
+        with measure(timings, "html_parse"), span("detect.html_parse") as parse:
+            tags = _html_tags(body, extract)
+            parse.set("bytes", min(len(body), MAX_HTML_SIZE))
+
+    techs: List[Dict[str, Optional[str]]] = []
+    with measure(timings, "signature_match"):
+        with span("detect.headers") as group:
+            _detect_from_headers(headers, techs)
+            group.set("matches", len(techs))
+        if body:
+            if tags is not None:
+                with span("detect.html") as group:
+                    found = len(techs)
+                    _detect_from_html(body[:MAX_HTML_SIZE], tags, techs)
+                    group.set("matches", len(techs) - found)
+            with span("detect.body", bytes=len(body)) as group:
+                found = len(techs)
+                _detect_from_body(body, techs)
+                group.set("matches", len(techs) - found)
+        if robots_txt and "content" in robots_txt:
+            with span("detect.robots") as group:
+                found = len(techs)
+                _detect_from_robots(robots_txt["content"], techs)
+                group.set("matches", len(techs) - found)
 
     # Deduplicate by name
     seen = set()
@@ -335,3 +481,179 @@ def detect_technologies(
             unique_techs.append(tech)
 
     return unique_techs
+
+
+def _first_header_match(
+    value: str,
+    signatures: Tuple[Tuple[str, Pattern[str]], ...],
+) -> Optional[Dict[str, Optional[str]]]:
+    """Return the first signature matching a header value as a tech dict."""
+    for name, pattern in signatures:
+        match = pattern.search(value)
+        if match:
+            return {"name": name, "version": extract_version(match)}
+    return None
+
+
+def _detect_from_headers(
+    headers: Dict[str, str], techs: List[Dict[str, Optional[str]]]
+) -> None:
+    """Server, X-Powered-By, X-Generator and CDN header detection."""
+    # Assume only one server and one primary runtime
+    for header, signatures in (
+        ("Server", SERVER_SIGNATURES),
+        ("X-Powered-By", POWERED_BY_SIGNATURES),
+    ):
+        if header in headers:
+            tech = _first_header_match(headers[header], signatures)
+            if tech:
+                techs.append(tech)
+
+    if "X-Generator" in headers:
+        generator = headers["X-Generator"]
+        for name, pattern in GENERATOR_HEADER_SIGNATURES:
+            match = pattern.search(generator)
+            if match:
+                techs.append({"name": name, "version": extract_version(match)})
+
+    for cdn_name, checks in CDN_SIGNATURES:
+        for check in checks:
+            value = headers.get(check.header)
+            if value is not None and (
+                check.pattern is None or check.pattern.search(value)
+            ):
+                techs.append({"name": cdn_name, "version": None})
+                break  # Found this CDN, skip to next
+
+
+class _TagCollector:
+    """
+    lxml parser target that keeps only what HTML detection inspects: the content of
+    generator meta tags and the first MAX_SCRIPTS script sources. No tree is built.
+    """
+
+    def __init__(self) -> None:
+        self.generators: List[str] = []
+        self.script_srcs: List[str] = []
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag == "meta":
+            if attrib.get("name", "").lower() == "generator":
+                self.generators.append(attrib.get("content", ""))
+        elif tag == "script" and "src" in attrib:
+            if len(self.script_srcs) < MAX_SCRIPTS:
+                self.script_srcs.append(attrib["src"])
+
+    def close(self) -> None:
+        pass
+
+
+def _extract_tags_fast(html: str) -> HtmlTags:
+    """Collect generator contents and script sources with an lxml target parser."""
+    collector = _TagCollector()
+    parser = etree.HTMLParser(target=collector)
+    parser.feed(html)
+    parser.close()
+    return collector.generators, collector.script_srcs
+
+
+def _extract_tags(html: str) -> HtmlTags:
+    """Extract tags with the fast parser, falling back to BeautifulSoup on lxml errors."""
+    try:
+        return _extract_tags_fast(html)
+    except etree.LxmlError:
+        return _extract_tags_soup(html)
+
+
+def _extract_tags_soup(html: str) -> HtmlTags:
+    """Collect generator contents and script sources from a full BeautifulSoup tree."""
+    soup = BeautifulSoup(html, "lxml")
+    generators = [
+        str(meta.get("content", ""))
+        for meta in soup.find_all("meta")
+        if str(meta.get("name", "")).lower() == "generator"
+    ]
+    script_srcs = [
+        str(script["src"]) for script in soup.find_all("script", src=True)[:MAX_SCRIPTS]
+    ]
+    return generators, script_srcs
+
+
+def _html_tags(
+    body: str, extract: Callable[[str], HtmlTags] = _extract_tags
+) -> Optional[HtmlTags]:
+    """Extract tags from the first MAX_HTML_SIZE characters, or None if body isn't HTML."""
+    if not _HTML_MARKER.search(body[:1000]):
+        return None
+    return extract(body[:MAX_HTML_SIZE])
+
+
+def _detect_from_html(
+    limited_body: str, tags: HtmlTags, techs: List[Dict[str, Optional[str]]]
+) -> None:
+    """HTML-based detection of generator meta tags and script sources."""
+    generators, script_srcs = tags
+
+    for generator in generators:
+        content = generator.lower()
+        for signature in GENERATOR_SIGNATURES:
+            if signature.keyword not in content:
+                continue
+            if signature.requires_version:
+                version_match = _META_VERSION.search(content)
+                if version_match:
+                    techs.append(
+                        {
+                            "name": signature.name,
+                            "version": extract_version(version_match),
+                        }
+                    )
+            else:
+                techs.append({"name": signature.name, "version": None})
+            break
+
+    page_marked = {
+        signature.name: any(marker in limited_body for marker in signature.page_markers)
+        for signature in SCRIPT_SIGNATURES
+        if signature.page_markers
+    }
+    for script_src in script_srcs:
+        src = script_src.lower()
+        for signature in SCRIPT_SIGNATURES:
+            applies = page_marked.get(signature.name, False) or any(
+                keyword in src for keyword in signature.keywords
+            )
+            if not applies or not all(part in src for part in signature.required):
+                continue
+            version_match = _first_search(signature.versions, src) or _first_search(
+                signature.page_versions, limited_body
+            )
+            if version_match or not signature.requires_version:
+                techs.append(
+                    {"name": signature.name, "version": extract_version(version_match)}
+                )
+            break
+
+
+def _first_search(
+    patterns: Tuple[Pattern[str], ...], text: str
+) -> Optional[re.Match[str]]:
+    """Return the first match of any pattern in text, trying patterns in order."""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match
+    return None
+
+
+def _detect_from_body(body: str, techs: List[Dict[str, Optional[str]]]) -> None:
+    """Keyword fallbacks over the whole body."""
+    for name in _BODY_SCANNER.scan(body):
+        techs.append({"name": name, "version": None})
+
+
+def _detect_from_robots(content: str, techs: List[Dict[str, Optional[str]]]) -> None:
+    """robots.txt rules that reveal a CMS."""
+    for name, pattern in ROBOTS_SIGNATURES:
+        if pattern.search(content):
+            techs.append({"name": name, "version": None})
@@ -0,0 +1,112 @@
+"""Opt-in per-phase timing of the fetch pipeline."""
+
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Generator, List, Mapping, Optional
+
+# Pipeline phases, in the order they happen for one URL
+PHASES = (
+    "robots_fetch",
+    "crawl_delay",
+    "retry_backoff",
+    "ttfb",
+    "download",
+    "decode",
+    "html_parse",
+    "signature_match",
+)
+
+_NO_TIMING = nullcontext()
+
+
+class Timings:
+    """
+    Monotonic durations per pipeline phase for one URL. A phase measured more than once,
+    such as TTFB across retries, is summed. Pipeline functions take an optional
+    Timings and skip all timing work when given None.
+    """
+
+    def __init__(self) -> None:
+        self._seconds = dict.fromkeys(PHASES, 0.0)
+        self._start = time.perf_counter()
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add seconds to phase."""
+        self._seconds[phase] = self._seconds.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, phase: str) -> Generator[None, None, None]:
+        """Time the enclosed block and add it to phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return every phase plus "total" (since creation) in milliseconds."""
+        result = {
+            phase: round(seconds * 1000, 3) for phase, seconds in self._seconds.items()
+        }
+        result["total"] = round((time.perf_counter() - self._start) * 1000, 3)
+        return result
+
+
+def measure(timings: Optional[Timings], phase: str) -> ContextManager[None]:
+    """Return timings.measure(phase), or a shared no-op context when timings is None."""
+    return _NO_TIMING if timings is None else timings.measure(phase)
+
+
+class TimingsSummary:
+    """
+    Aggregates the "timings" of many results into count, total, mean, p50, p95 and max
+    per phase (milliseconds). Percentiles come from a fixed-size random sample of each
+    phase, so memory stays bounded however many results are added.
+    """
+
+    def __init__(self, sample_size: int = 10000, seed: Optional[int] = None) -> None:
+        self.sample_size = sample_size
+        self.count = 0
+        self._counts: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+        self._maxima: Dict[str, float] = {}
+        self._samples: Dict[str, List[float]] = {}
+        self._random = random.Random(seed)
+
+    def add(self, timings: Mapping[str, float]) -> None:
+        """Add the timings dict of one result."""
+        self.count += 1
+        for phase, value in timings.items():
+            seen = self._counts[phase] = self._counts.get(phase, 0) + 1
+            self._totals[phase] = self._totals.get(phase, 0.0) + value
+            self._maxima[phase] = max(self._maxima.get(phase, value), value)
+            samples = self._samples.setdefault(phase, [])
+            if len(samples) < self.sample_size:
+                samples.append(value)
+            else:
+                # Reservoir sampling keeps a uniform sample of everything seen
+                index = self._random.randrange(seen)
+                if index < self.sample_size:
+                    samples[index] = value
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Return {phase: {count, total, mean, p50, p95, max}} in milliseconds."""
+        summary = {}
+        for phase, total in self._totals.items():
+            samples = sorted(self._samples[phase])
+            count = self._counts[phase]
+            summary[phase] = {
+                "count": count,
+                "total": round(total, 3),
+                "mean": round(total / count, 3),
+                "p50": _percentile(samples, 0.50),
+                "p95": _percentile(samples, 0.95),
+                "max": round(self._maxima[phase], 3),
+            }
+        return summary
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return round(ordered[index], 3)
@@ -0,0 +1,101 @@
+"""Pluggable tracing hooks around the fetch and detection pipeline."""
+
+import time
+from typing import Any, Dict, Optional, Union
+from urllib.parse import urlsplit
+
+
+class Span:
+    """
+    One timed pipeline stage. attributes may carry url, host, bytes and outcome (plus
+    stage-specific keys); host is derived from url when not given. start and end are
+    time.perf_counter() values, end is None until the span has finished.
+    """
+
+    __slots__ = ("name", "attributes", "start", "end", "_tracer")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
+        if "url" in attributes and "host" not in attributes:
+            attributes["host"] = urlsplit(attributes["url"]).hostname
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+        self.end: Optional[float] = None
+        self._tracer = _tracer
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds between start and end, or None while the span is open."""
+        return None if self.end is None else self.end - self.start
+
+    def set(self, key: str, value: Any) -> None:
+        """Set an attribute, e.g. bytes or outcome once they are known."""
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        self._tracer.on_start(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attributes["outcome"] = "error"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        self._tracer.on_end(self)
+
+
+class _NoSpan:
+    """Shared stand-in returned by span() when no tracer is installed."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        pass
+
+
+class Tracer:
+    """
+    Base class for instrumentation. Override on_start and on_end to feed spans to a
+    tracer, profiler or tracemalloc collector. Callbacks run on whichever thread or
+    event loop task executes the stage, so implementations must be thread-safe.
+    """
+
+    def on_start(self, span: Span) -> None:
+        """Called when a stage starts."""
+
+    def on_end(self, span: Span) -> None:
+        """Called when a stage ends, also when it raised (outcome is then "error")."""
+
+
+_NO_SPAN = _NoSpan()
+_tracer = Tracer()
+_enabled = False
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Install tracer for the whole process; None restores the no-op default."""
+    global _tracer, _enabled
+    _tracer = tracer if tracer is not None else Tracer()
+    _enabled = tracer is not None
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Return the installed tracer, or None if tracing is off."""
+    return _tracer if _enabled else None
+
+
+def span(name: str, **attributes: Any) -> Union[Span, _NoSpan]:
+    """
+    Context manager timing a stage as a Span reported to the installed tracer. Without
+    one, a shared no-op object is returned, so instrumented code costs one call.
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return Span(name, attributes)
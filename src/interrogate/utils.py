@@ -1,8 +1,34 @@
+import asyncio
 import re
 import time
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from tenacity import RetryCallState
+
+from .retry import DEFAULT_RETRY_POLICY, RetryPolicy
+from .timings import Timings, measure
+from .tracing import span
+
+USER_AGENT = "Interrogate/1.0 (+https://github.com/inkyvoxel/interrogate)"
+
+
+def create_session(
+    pool_connections: int = 10, pool_maxsize: int = 10
+) -> requests.Session:
+    """
+    Create a requests.Session backed by a keep-alive connection pool.
+    pool_connections is the number of hosts whose pools are kept, pool_maxsize the number
+    of open connections kept per host. Reusing one session lets robots.txt, the page and
+    any retries share a TCP/TLS connection instead of handshaking for each request.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
 def retry_get(
@@ -11,28 +37,107 @@ def retry_get(
     timeout: int = 10,
     allow_redirects: bool = True,
     stream: bool = False,
+    session: Optional[requests.Session] = None,
+    timings: Optional[Timings] = None,
+    policy: Optional[RetryPolicy] = None,
+    on_backoff: Optional[Callable[[float], None]] = None,
 ) -> requests.Response:
     """
-    Perform a GET request with retry on 429 or 503 status codes.
-    Sleeps for 2 seconds before retrying once.
+    Perform a GET request, retrying according to policy (see RetryPolicy; by default a
+    429 or 503 is retried once after 2 seconds, and connection errors and timeouts are
+    retried too). A response is closed before its retry; once retries run out the last
+    response is returned, or the last error raised. on_backoff is called with each wait
+    before sleeping. Uses the given session's connection pool, or a one-off connection
+    when session is None. With timings, each attempt counts towards "ttfb" and each
+    wait towards "retry_backoff". Each attempt is traced as an "http.attempt" span
+    whose outcome is the status code.
     """
-    response = requests.get(
-        url,
-        headers=headers,
-        timeout=timeout,
-        allow_redirects=allow_redirects,
-        stream=stream,
+    get = session.get if session is not None else requests.get
+    attempts = 0
+
+    def attempt() -> requests.Response:
+        nonlocal attempts
+        attempts += 1
+        with (
+            measure(timings, "ttfb"),
+            span("http.attempt", url=url, attempt=attempts) as traced,
+        ):
+            response = get(
+                url,
+                headers=headers,
+                timeout=timeout,
+                allow_redirects=allow_redirects,
+                stream=stream,
+            )
+            traced.set("outcome", response.status_code)
+        return response
+
+    def sleep(seconds: float) -> None:
+        if on_backoff is not None:
+            on_backoff(seconds)
+        with measure(timings, "retry_backoff"):
+            time.sleep(seconds)
+
+    retrying = (policy or DEFAULT_RETRY_POLICY).retrying(sleep, _close_response)
+    return retrying(attempt)
+
+
+async def retry_get_async(
+    url: str,
+    headers: Dict[str, str],
+    client: httpx.AsyncClient,
+    timeout: int = 10,
+    allow_redirects: bool = True,
+    stream: bool = False,
+    timings: Optional[Timings] = None,
+    policy: Optional[RetryPolicy] = None,
+    on_backoff: Optional[Callable[[float], None]] = None,
+) -> httpx.Response:
+    """
+    Async variant of retry_get using an httpx.AsyncClient.
+    Waits with asyncio.sleep between attempts, so other requests on the event loop keep
+    running. With stream=True the caller must close the returned response.
+    """
+    attempts = 0
+
+    async def attempt() -> httpx.Response:
+        nonlocal attempts
+        attempts += 1
+        request = client.build_request("GET", url, headers=headers, timeout=timeout)
+        with (
+            measure(timings, "ttfb"),
+            span("http.attempt", url=url, attempt=attempts) as traced,
+        ):
+            response = await client.send(
+                request, stream=stream, follow_redirects=allow_redirects
+            )
+            traced.set("outcome", response.status_code)
+        return response
+
+    async def sleep(seconds: float) -> None:
+        if on_backoff is not None:
+            on_backoff(seconds)
+        with measure(timings, "retry_backoff"):
+            await asyncio.sleep(seconds)
+
+    retrying = (policy or DEFAULT_RETRY_POLICY).async_retrying(
+        sleep, _close_response_async
     )
-    if response.status_code in [429, 503]:
-        time.sleep(2)
-        response = requests.get(
-            url,
-            headers=headers,
-            timeout=timeout,
-            allow_redirects=allow_redirects,
-            stream=stream,
-        )
-    return response
+    return await retrying(attempt)
+
+
+def _close_response(retry_state: RetryCallState) -> None:
+    """Release a response that is about to be retried back to the pool."""
+    outcome = retry_state.outcome
+    if outcome is not None and not outcome.failed:
+        outcome.result().close()
+
+
+async def _close_response_async(retry_state: RetryCallState) -> None:
+    """Async variant of _close_response."""
+    outcome = retry_state.outcome
+    if outcome is not None and not outcome.failed:
+        await outcome.result().aclose()
 
 
 def extract_version(match: Optional[re.Match[str]]) -> Optional[str]:
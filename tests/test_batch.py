@@ -0,0 +1,428 @@
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.interrogate.batch import (
+    interrogate_url,
+    iterate_in_thread,
+    read_url_offsets,
+    read_urls,
+    run_batch,
+    run_batch_async,
+)
+from src.interrogate.robots import RobotsCache, robots_cache_key
+from src.interrogate.scheduler import HostScheduler
+
+# A URL whose port makes urlsplit raise, between two good ones
+BAD_PORT_URLS = ["https://a.example", "http://127.0.0.1:99999/x", "https://b.example"]
+
+
+class TestReadUrls:
+    def test_skips_blank_and_comment_lines(self):
+        stream = io.StringIO("https://a.example\n\n# comment\n  https://b.example  \n")
+        assert list(read_urls(stream)) == ["https://a.example", "https://b.example"]
+
+
+class TestReadUrlOffsets:
+    def test_offsets_past_each_line(self):
+        stream = io.BytesIO(b"# urls\nhttps://a.example\n\nhttps://b.example\n")
+
+        assert list(read_url_offsets(stream)) == [
+            ("https://a.example", 25),
+            ("https://b.example", 44),
+        ]
+
+    def test_starts_at_offset(self):
+        stream = io.BytesIO(b"https://b.example\n")
+
+        assert list(read_url_offsets(stream, 25)) == [("https://b.example", 43)]
+
+
+class TestInterrogateUrl:
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_success_record(self, mock_fetch):
+        mock_fetch.return_value = {
+            "status_code": 200,
+            "final_url": "https://a.example/",
+        }
+
+        record = interrogate_url("https://a.example", include_headers=True)
+
+        assert record == {
+            "url": "https://a.example",
+            "status_code": 200,
+            "final_url": "https://a.example/",
+        }
+        mock_fetch.assert_called_once_with("https://a.example", include_headers=True)
+
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_error_record(self, mock_fetch):
+        mock_fetch.side_effect = ValueError("Failed to fetch URL: timeout")
+
+        record = interrogate_url("https://a.example")
+
+        assert record == {
+            "url": "https://a.example",
+            "error": "Failed to fetch URL: timeout",
+        }
+
+    @patch("src.interrogate.fetchers.fetch_robots_txt")
+    @patch("src.interrogate.fetchers.requests.get")
+    def test_detection_failure_record(self, mock_get, mock_robots):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.url = "https://a.example/"
+        mock_get.return_value.headers = {}
+        mock_get.return_value.iter_content.return_value = iter([b"<html></html>"])
+        mock_robots.return_value = {"error": "skipped"}
+        pool = MagicMock()
+        pool.detect.side_effect = BrokenProcessPool("worker died")
+
+        record = interrogate_url(
+            "https://a.example", include_body=True, detection_pool=pool
+        )
+
+        assert record == {
+            "url": "https://a.example",
+            "error": "Technology detection failed: worker died",
+        }
+
+
+class TestRunBatch:
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_yields_one_record_per_url(self, mock_fetch):
+        mock_fetch.side_effect = lambda url, **kwargs: {
+            "status_code": 200,
+            "final_url": url,
+        }
+        urls = [f"https://{i}.example" for i in range(25)]
+
+        records = list(run_batch(urls, concurrency=4))
+
+        assert sorted(r["url"] for r in records) == sorted(urls)
+        assert all(r["status_code"] == 200 for r in records)
+
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_unparseable_url_is_error_record(self, mock_fetch):
+        def fetch(url, **kwargs):
+            robots_cache_key(
+                url
+            )  # Raises ValueError for the bad port, as fetching does
+            return {"status_code": 200, "final_url": url}
+
+        mock_fetch.side_effect = fetch
+
+        records = list(run_batch(BAD_PORT_URLS, concurrency=2))
+
+        assert sorted(records, key=lambda r: r["url"]) == [
+            {"url": "http://127.0.0.1:99999/x", "error": "Port out of range 0-65535"},
+            {
+                "url": "https://a.example",
+                "status_code": 200,
+                "final_url": "https://a.example",
+            },
+            {
+                "url": "https://b.example",
+                "status_code": 200,
+                "final_url": "https://b.example",
+            },
+        ]
+
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_shares_one_session(self, mock_fetch):
+        mock_fetch.return_value = {"status_code": 200, "final_url": "x"}
+
+        list(run_batch(["https://a", "https://b"], concurrency=2, pool_size=4))
+
+        sessions = {id(c.kwargs["session"]) for c in mock_fetch.call_args_list}
+        assert len(sessions) == 1
+        session = mock_fetch.call_args.kwargs["session"]
+        assert session.get_adapter("https://a")._pool_maxsize == 4
+
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_shares_one_robots_cache(self, mock_fetch):
+        mock_fetch.return_value = {"status_code": 200, "final_url": "x"}
+
+        list(run_batch(["https://a", "https://b"], concurrency=2))
+
+        caches = {id(c.kwargs["robots_cache"]) for c in mock_fetch.call_args_list}
+        assert len(caches) == 1
+        assert isinstance(mock_fetch.call_args.kwargs["robots_cache"], RobotsCache)
+
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_holds_back_hosts_in_crawl_delay(self, mock_fetch):
+        mock_fetch.side_effect = lambda url, **kwargs: {
+            "status_code": 200,
+            "final_url": url,
+        }
+        scheduler = HostScheduler()
+        scheduler.reserve("https://slow.example:443", 0.2)  # Slow host is busy
+
+        records = list(
+            run_batch(
+                ["https://slow.example/a", "https://fast.example/b"],
+                concurrency=1,
+                scheduler=scheduler,
+            )
+        )
+
+        assert [r["url"] for r in records] == [
+            "https://fast.example/b",
+            "https://slow.example/a",
+        ]
+        assert mock_fetch.call_args.kwargs["scheduler"] is scheduler
+
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_no_worker_sleeps_for_unknown_delay(self, mock_fetch):
+        waits = []
+
+        def fetch(url, scheduler, **kwargs):
+            # As fetch_url_info does once robots.txt gives the slow host a delay
+            if "slow" in url:
+                waits.append(scheduler.reserve("https://slow.example:443", 0.02))
+            time.sleep(0.005)
+            return {"status_code": 200, "final_url": url}
+
+        mock_fetch.side_effect = fetch
+        urls = [f"https://slow.example/{i}" for i in range(5)]
+        urls += [f"https://{i}.example/" for i in range(5)]
+
+        records = list(run_batch(urls, concurrency=4))
+
+        assert sorted(r["url"] for r in records) == sorted(urls)
+        assert waits == [0.0] * 5
+
+    @patch("src.interrogate.batch.wait", wraps=wait)
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_no_busy_wait_when_full(self, mock_fetch, mock_wait):
+        def fetch(url, **kwargs):
+            time.sleep(0.2)
+            return {"status_code": 200, "final_url": url}
+
+        mock_fetch.side_effect = fetch
+        scheduler = HostScheduler()
+        scheduler.reserve("https://slow.example:443", 0.05)
+
+        records = list(
+            run_batch(
+                ["https://slow.example/a", "https://a.example/", "https://b.example/"],
+                concurrency=1,
+                scheduler=scheduler,
+            )
+        )
+
+        assert len(records) == 3
+        assert mock_wait.call_count < 10
+
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_consumes_input_lazily(self, mock_fetch):
+        mock_fetch.return_value = {"status_code": 200, "final_url": "x"}
+        consumed = []
+
+        def urls():
+            for i in range(1000):
+                consumed.append(i)
+                yield f"https://{i}.example"
+
+        batch = run_batch(urls(), concurrency=2)
+        next(batch)
+        assert len(consumed) <= 4
+        batch.close()
+
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_runs_concurrently(self, mock_fetch):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch(url, **kwargs):
+            barrier.wait()
+            return {"status_code": 200, "final_url": url}
+
+        mock_fetch.side_effect = fetch
+
+        records = list(
+            run_batch(["https://a", "https://b", "https://c"], concurrency=3)
+        )
+
+        assert len(records) == 3
+
+    @patch("src.interrogate.batch.DetectionPool")
+    @patch("src.interrogate.batch.fetch_url_info")
+    def test_detect_workers_share_one_pool(self, mock_fetch, mock_pool):
+        mock_fetch.return_value = {"status_code": 200, "final_url": "x"}
+        pool = mock_pool.return_value.__enter__.return_value
+
+        list(run_batch(["https://a.example", "https://b.example"], detect_workers=3))
+
+        mock_pool.assert_called_once_with(3, "process")
+        pools = {call.kwargs["detection_pool"] for call in mock_fetch.call_args_list}
+        assert pools == {pool}
+
+    def test_invalid_concurrency(self):
+        with pytest.raises(ValueError, match="Concurrency"):
+            list(run_batch(["https://a.example"], concurrency=0))
+
+
+class TestRunBatchAsync:
+    def _collect(self, urls, **kwargs):
+        async def run():
+            return [record async for record in run_batch_async(urls, **kwargs)]
+
+        return asyncio.run(run())
+
+    @patch("src.interrogate.batch.fetch_url_info_async")
+    def test_yields_one_record_per_url(self, mock_fetch):
+        async def fetch(url, client=None, **kwargs):
+            await asyncio.sleep(0)
+            return {"status_code": 200, "final_url": url}
+
+        mock_fetch.side_effect = fetch
+        urls = [f"https://{i}.example" for i in range(25)]
+
+        records = self._collect(urls, concurrency=4)
+
+        assert sorted(r["url"] for r in records) == sorted(urls)
+
+    @patch("src.interrogate.batch.fetch_url_info_async")
+    def test_error_record(self, mock_fetch):
+        mock_fetch.side_effect = ValueError("Failed to fetch URL: boom")
+
+        records = self._collect(["https://a.example"])
+
+        assert records == [
+            {"url": "https://a.example", "error": "Failed to fetch URL: boom"}
+        ]
+
+    @patch("src.interrogate.batch.fetch_url_info_async")
+    def test_unparseable_url_is_error_record(self, mock_fetch):
+        async def fetch(url, client=None, **kwargs):
+            robots_cache_key(
+                url
+            )  # Raises ValueError for the bad port, as fetching does
+            return {"status_code": 200, "final_url": url}
+
+        mock_fetch.side_effect = fetch
+
+        records = self._collect(BAD_PORT_URLS, concurrency=2)
+
+        assert sorted(records, key=lambda r: r["url"]) == [
+            {"url": "http://127.0.0.1:99999/x", "error": "Port out of range 0-65535"},
+            {
+                "url": "https://a.example",
+                "status_code": 200,
+                "final_url": "https://a.example",
+            },
+            {
+                "url": "https://b.example",
+                "status_code": 200,
+                "final_url": "https://b.example",
+            },
+        ]
+
+    @patch("src.interrogate.batch.fetch_url_info_async")
+    def test_holds_back_hosts_in_crawl_delay(self, mock_fetch):
+        async def fetch(url, client=None, **kwargs):
+            return {"status_code": 200, "final_url": url}
+
+        mock_fetch.side_effect = fetch
+        scheduler = HostScheduler()
+        scheduler.reserve("https://slow.example:443", 0.2)
+
+        records = self._collect(
+            ["https://slow.example/a", "https://fast.example/b"],
+            concurrency=1,
+            scheduler=scheduler,
+        )
+
+        assert [r["url"] for r in records] == [
+            "https://fast.example/b",
+            "https://slow.example/a",
+        ]
+
+    @patch("src.interrogate.batch.fetch_url_info_async")
+    def test_no_task_sleeps_for_unknown_delay(self, mock_fetch):
+        waits = []
+
+        async def fetch(url, scheduler, client=None, **kwargs):
+            if "slow" in url:
+                waits.append(scheduler.reserve("https://slow.example:443", 0.02))
+            await asyncio.sleep(0.005)
+            return {"status_code": 200, "final_url": url}
+
+        mock_fetch.side_effect = fetch
+        urls = [f"https://slow.example/{i}" for i in range(5)]
+        urls += [f"https://{i}.example/" for i in range(5)]
+
+        records = self._collect(urls, concurrency=4)
+
+        assert sorted(r["url"] for r in records) == sorted(urls)
+        assert waits == [0.0] * 5
+
+    @patch("src.interrogate.batch.fetch_url_info_async")
+    def test_async_iterable_source(self, mock_fetch):
+        events = []
+
+        async def fetch(url, client=None, **kwargs):
+            events.append(("fetch", url))
+            return {"status_code": 200, "final_url": url}
+
+        async def source():
+            for i in range(3):
+                await asyncio.sleep(0.01)
+                events.append(("produce", i))
+                yield f"https://{i}.example"
+
+        mock_fetch.side_effect = fetch
+
+        records = self._collect(source(), concurrency=4)
+
+        assert [r["url"] for r in records] == [f"https://{i}.example" for i in range(3)]
+        # Each URL goes out as it arrives, without waiting for the source to finish
+        assert events[:2] == [("produce", 0), ("fetch", "https://0.example")]
+
+    @patch("src.interrogate.batch.fetch_url_info_async")
+    def test_blocking_source_in_thread(self, mock_fetch):
+        threads = set()
+
+        async def fetch(url, client=None, **kwargs):
+            return {"status_code": 200, "final_url": url}
+
+        def source():
+            for i in range(5):
+                threads.add(threading.current_thread())
+                yield f"https://{i}.example"
+
+        mock_fetch.side_effect = fetch
+
+        records = self._collect(iterate_in_thread(source(), chunk_size=2))
+
+        assert sorted(r["url"] for r in records) == [
+            f"https://{i}.example" for i in range(5)
+        ]
+        assert threading.main_thread() not in threads
+
+    @patch("src.interrogate.batch.fetch_url_info_async")
+    def test_limits_in_flight(self, mock_fetch):
+        in_flight = 0
+        peak = 0
+
+        async def fetch(url, client=None, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return {"status_code": 200, "final_url": url}
+
+        mock_fetch.side_effect = fetch
+
+        records = self._collect(
+            [f"https://{i}.example" for i in range(50)], concurrency=5
+        )
+
+        assert len(records) == 50
+        assert peak <= 5
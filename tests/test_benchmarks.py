@@ -0,0 +1,72 @@
+import pytest
+
+from benchmarks.detector import load_corpus, percentile, regressions, run
+from benchmarks.e2e import FarmConfig, build_urls, parse_mix
+from benchmarks.scaling import build_jobs, gil_status, worker_counts
+
+
+class TestDetectorBenchmark:
+    def test_corpus_is_present(self):
+        pages = load_corpus()
+
+        assert {"small_blog", "large_100kb", "pathological_no_match"} <= set(pages)
+
+    def test_unknown_page(self):
+        with pytest.raises(ValueError, match="Unknown corpus page"):
+            load_corpus(["missing"])
+
+    def test_percentile(self):
+        samples = [float(n) for n in range(1, 101)]
+
+        assert percentile(samples, 0.50) == 50.0
+        assert percentile(samples, 0.99) == 99.0
+        assert percentile([3.0], 0.90) == 3.0
+
+    def test_regressions(self):
+        baseline = {"a": {"p50_ms": 1.0}, "b": {"p50_ms": 1.0}}
+        results = {"a": {"p50_ms": 1.1}, "b": {"p50_ms": 1.5}, "c": {"p50_ms": 9.0}}
+
+        assert regressions(results, baseline, 0.2) == ["b"]
+
+    def test_run_reports_metrics(self):
+        results = run(iterations=2, warmup=0, html_parser="fast", pages=["small_blog"])
+
+        metrics = results["small_blog"]
+        assert metrics["p50_ms"] > 0
+        assert metrics["calls_per_s"] > 0
+        assert metrics["peak_kb"] > 0
+
+
+class TestEndToEndBenchmark:
+    def test_build_urls_follows_mix(self):
+        config = FarmConfig(redirect_hops=2)
+        bases = ["http://127.0.0.1:1", "http://127.0.0.1:2"]
+
+        urls = build_urls(bases, 50, {"page": 1, "redirect": 1}, config, seed=1)
+
+        assert len(urls) == 50
+        assert all(url.startswith(tuple(bases)) for url in urls)
+        assert {url.split("/")[3] for url in urls} == {"page", "redirect"}
+        assert all(url.endswith("/2") for url in urls if "/redirect/" in url)
+
+    def test_parse_mix(self):
+        assert parse_mix("page=3,large=1") == {"page": 3, "large": 1}
+
+    def test_parse_mix_unknown_kind(self):
+        with pytest.raises(ValueError, match="Unknown URL kind"):
+            parse_mix("page=1,video=2")
+
+
+class TestScalingBenchmark:
+    def test_worker_counts(self):
+        assert worker_counts(1) == [1]
+        assert worker_counts(8) == [1, 2, 4, 8]
+        assert worker_counts(6) == [1, 2, 4, 6]
+
+    def test_build_jobs_cycles_corpus(self):
+        jobs = build_jobs({"a": "x", "b": "yy"}, 5)
+
+        assert jobs == [b"x", b"yy", b"x", b"yy", b"x"]
+
+    def test_gil_status(self):
+        assert set(gil_status()) == {"free_threaded_build", "gil_enabled"}
@@ -0,0 +1,62 @@
+import pytest
+
+from src.interrogate.buffer import BodyBuffer, content_length
+
+
+class TestBodyBuffer:
+    def test_collects_chunks(self):
+        buffer = BodyBuffer(100)
+
+        assert buffer.write(b"hello ") is False
+        assert buffer.write(b"world") is False
+        assert buffer.getvalue() == b"hello world"
+        assert len(buffer) == 11
+
+    def test_stops_at_cap(self):
+        buffer = BodyBuffer(10)
+
+        assert buffer.write(b"12345678") is False
+        assert buffer.write(b"90abcdef") is True
+        assert buffer.full
+        assert buffer.getvalue() == b"1234567890"
+
+    def test_grows_past_size_hint(self):
+        buffer = BodyBuffer(1000, size_hint=4)
+        for _ in range(50):
+            buffer.write(b"abc")
+
+        assert buffer.getvalue() == b"abc" * 50
+
+    def test_size_hint_is_capped(self):
+        buffer = BodyBuffer(8, size_hint=1 << 30)
+        buffer.write(b"x" * 20)
+
+        assert buffer.getvalue() == b"x" * 8
+
+    def test_accepts_memoryview_chunks(self):
+        buffer = BodyBuffer(4)
+        buffer.write(memoryview(b"abcdef"))
+
+        assert buffer.getvalue() == b"abcd"
+
+    def test_zero_cap(self):
+        buffer = BodyBuffer(0)
+
+        assert buffer.full
+        assert buffer.write(b"data") is True
+        assert buffer.getvalue() == b""
+
+    def test_negative_cap(self):
+        with pytest.raises(ValueError, match="must not be negative"):
+            BodyBuffer(-1)
+
+
+class TestContentLength:
+    def test_valid(self):
+        assert content_length({"Content-Length": "1234"}) == 1234
+
+    def test_missing(self):
+        assert content_length({}) is None
+
+    def test_invalid(self):
+        assert content_length({"Content-Length": "lots"}) is None
@@ -0,0 +1,78 @@
+import pytest
+
+from src.interrogate.checkpoint import Checkpoint, url_hash
+
+URLS = [
+    ("https://a.example", 18),
+    ("https://b.example", 36),
+    ("https://c.example", 54),
+]
+
+
+class TestCheckpoint:
+    def test_offset_follows_first_incomplete_url(self, tmp_path):
+        with Checkpoint(str(tmp_path / "run.ckpt"), "urls.txt") as checkpoint:
+            pending = list(checkpoint.pending(URLS))
+            checkpoint.done("https://b.example")
+            assert checkpoint.offset == 0
+            checkpoint.done("https://a.example")
+
+            assert pending == [url for url, _ in URLS]
+            assert checkpoint.offset == 36
+
+    def test_resume_skips_finished_urls(self, tmp_path):
+        path = str(tmp_path / "run.ckpt")
+        with Checkpoint(path, "urls.txt") as checkpoint:
+            for url in checkpoint.pending(URLS):
+                if url != "https://b.example":
+                    checkpoint.done(url)
+
+        with Checkpoint(path, "urls.txt", resume=True) as checkpoint:
+            assert checkpoint.offset == 18
+            assert list(checkpoint.pending(URLS[1:])) == ["https://b.example"]
+            assert checkpoint.skipped == 1
+            checkpoint.done("https://b.example")
+            assert checkpoint.offset == 54
+
+    def test_entries_written_on_flush(self, tmp_path):
+        path = tmp_path / "run.ckpt"
+        checkpoint = Checkpoint(str(path), "urls.txt")
+        list(checkpoint.pending(URLS[:1]))
+        checkpoint.done("https://a.example")
+
+        assert path.read_text().count("\n") == 1
+        checkpoint.flush()
+        assert path.read_text().splitlines()[1:] == [
+            f"d {url_hash('https://a.example'):016x}",
+            "o 18",
+        ]
+        checkpoint.close()
+
+    def test_ignores_torn_line(self, tmp_path):
+        path = tmp_path / "run.ckpt"
+        with Checkpoint(str(path), "urls.txt") as checkpoint:
+            list(checkpoint.pending(URLS[:1]))
+            checkpoint.done("https://a.example")
+        with path.open("a") as journal:
+            journal.write("d 12ab")
+
+        with Checkpoint(str(path), "urls.txt", resume=True) as checkpoint:
+            assert "https://a.example" in checkpoint
+            assert checkpoint.offset == 18
+
+    def test_without_resume_starts_afresh(self, tmp_path):
+        path = str(tmp_path / "run.ckpt")
+        with Checkpoint(path, "urls.txt") as checkpoint:
+            list(checkpoint.pending(URLS[:1]))
+            checkpoint.done("https://a.example")
+
+        with Checkpoint(path, "urls.txt") as checkpoint:
+            assert "https://a.example" not in checkpoint
+            assert checkpoint.offset == 0
+
+    def test_other_input_rejected(self, tmp_path):
+        path = str(tmp_path / "run.ckpt")
+        Checkpoint(path, "urls.txt").close()
+
+        with pytest.raises(ValueError, match="is for"):
+            Checkpoint(path, "other.txt", resume=True)
@@ -0,0 +1,163 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.interrogate.crawler import (
+    BloomFilter,
+    CrawlSummary,
+    crawl,
+    extract_links,
+    normalize_url,
+)
+
+SITE = {
+    "https://a.example/": '<a href="/blog/">Blog</a><a href="about#team">About</a>'
+    '<a href="https://b.example/">Elsewhere</a><a href="/logo.png">Logo</a>'
+    '<a href="/private/x">Private</a><a href="mailto:me@a.example">Mail</a>'
+    '<a href="/private/ok">Public</a>',
+    "https://a.example/private/ok": "",
+    "https://a.example/about": '<a href="/">Home</a><a href="/blog/">Blog</a>',
+    "https://a.example/blog/": '<a href="post-1">1</a><a href="post-2">2</a>',
+    "https://a.example/blog/post-1": '<a href="/deep">Deep</a>',
+    "https://a.example/blog/post-2": "",
+    "https://a.example/deep": "",
+}
+
+
+def fake_fetch(url, **kwargs):
+    if url not in SITE:
+        raise ValueError("Failed to fetch URL: 404")
+    technologies = [{"name": "WordPress", "version": "6.4"}] if "blog" in url else []
+    return {
+        "status_code": 200,
+        "final_url": url,
+        "technologies": technologies,
+        "body": f"<html><body>{SITE[url]}</body></html>",
+    }
+
+
+def crawl_site(**kwargs):
+    robots = {"raw": "User-agent: *\nDisallow: /private/\nAllow: /private/ok\n"}
+    with (
+        patch("src.interrogate.batch.fetch_url_info", side_effect=fake_fetch),
+        patch("src.interrogate.crawler.fetch_robots_txt", return_value=robots),
+    ):
+        return list(crawl("https://a.example", session=MagicMock(), **kwargs))
+
+
+class TestNormalizeUrl:
+    def test_canonical_form(self):
+        assert normalize_url("HTTPS://User@A.Example:443#top") == "https://a.example/"
+        assert (
+            normalize_url("http://a.example:8080/x?b=1")
+            == "http://a.example:8080/x?b=1"
+        )
+
+
+class TestBloomFilter:
+    def test_add_and_contains(self):
+        seen = BloomFilter(1000)
+
+        assert seen.add("https://a.example/1")
+        assert not seen.add("https://a.example/1")
+        assert "https://a.example/1" in seen
+        assert "https://a.example/2" not in seen
+
+    def test_false_positive_rate(self):
+        seen = BloomFilter(10000, error_rate=0.01)
+        for i in range(10000):
+            seen.add(f"https://a.example/{i}")
+
+        false_positives = sum(f"https://b.example/{i}" in seen for i in range(10000))
+
+        assert false_positives < 200
+        assert len(seen._bits) < 12000
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            BloomFilter(0)
+
+
+class TestExtractLinks:
+    def test_resolves_and_filters(self):
+        html = (
+            '<html><head><base href="/docs/"></head><body>'
+            '<a href="intro#x">Intro</a><a href="javascript:void(0)">JS</a>'
+            '<a href="style.css">CSS</a><area href="https://b.example/map">'
+            '<a href="http://a.example:bad/">Bad</a></body></html>'
+        )
+
+        assert extract_links(html, "https://a.example/index") == [
+            "https://a.example/docs/intro",
+            "https://b.example/map",
+        ]
+
+
+class TestCrawl:
+    def test_breadth_first_within_site(self):
+        records = crawl_site()
+
+        # Pages of one level complete in any order
+        assert sorted((r["depth"], r["url"]) for r in records) == [
+            (0, "https://a.example/"),
+            (1, "https://a.example/about"),
+            (1, "https://a.example/blog/"),
+            (1, "https://a.example/private/ok"),
+            (2, "https://a.example/blog/post-1"),
+            (2, "https://a.example/blog/post-2"),
+        ]
+        assert all("body" not in r for r in records)
+
+    def test_max_depth(self):
+        records = crawl_site(max_depth=3)
+
+        assert records[-1]["url"] == "https://a.example/deep"
+        assert [r["url"] for r in crawl_site(max_depth=0)] == ["https://a.example/"]
+
+    def test_max_pages(self):
+        records = crawl_site(max_pages=3)
+
+        assert len(records) == 3
+
+    def test_include_body(self):
+        records = crawl_site(max_depth=0, include_body=True)
+
+        assert "Blog" in records[0]["body"]
+
+    def test_start_disallowed(self):
+        with (
+            patch("src.interrogate.batch.fetch_url_info") as mock_fetch,
+            patch(
+                "src.interrogate.crawler.fetch_robots_txt",
+                return_value={"raw": "User-agent: interrogate\nDisallow: /\n"},
+            ),
+        ):
+            records = list(crawl("https://a.example/", session=MagicMock()))
+
+        assert records[0]["error"] == "Disallowed by robots.txt"
+        mock_fetch.assert_not_called()
+
+    def test_invalid_budget(self):
+        with pytest.raises(ValueError):
+            list(crawl("https://a.example/", max_pages=0))
+
+
+class TestCrawlSummary:
+    def test_flags_technologies_hidden_from_start_page(self):
+        summary = CrawlSummary()
+        for record in crawl_site():
+            summary.add(record)
+        summary.add({"url": "https://a.example/gone", "error": "404"})
+
+        result = summary.as_dict()
+
+        assert (result["pages"], result["errors"]) == (6, 1)
+        assert result["technologies"] == [
+            {
+                "name": "WordPress",
+                "versions": ["6.4"],
+                "pages": 3,
+                "first_url": "https://a.example/blog/",
+                "on_start_page": False,
+            }
+        ]
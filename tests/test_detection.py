@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from src.interrogate.detection import DetectionPool, _job
+from src.interrogate.tech_detector import detect_technologies
+from src.interrogate.timings import Timings
+
+HEADERS = {"Server": "nginx/1.25.3", "X-Powered-By": "PHP/8.2"}
+PAGE = (
+    "<html><head>"
+    '<meta name="generator" content="WordPress 6.4.2">'
+    '<script src="/js/jquery-3.7.1.min.js"></script>'
+    "</head><body>café gtag('config')</body></html>"
+)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with DetectionPool(2) as detection_pool:
+        yield detection_pool
+
+
+class TestDetectionPool:
+    def test_matches_in_process_detection(self, pool):
+        technologies = pool.detect(HEADERS, PAGE.encode("utf-8"))
+        assert technologies == detect_technologies(HEADERS, PAGE)
+
+    def test_async(self, pool):
+        technologies = asyncio.run(pool.detect_async(HEADERS, PAGE.encode("utf-8")))
+        assert technologies == detect_technologies(HEADERS, PAGE)
+
+    def test_worker_timings_added(self, pool):
+        timings = Timings()
+        pool.detect(HEADERS, PAGE.encode("utf-8"), timings=timings)
+        result = timings.as_dict()
+        assert result["html_parse"] > 0
+        assert result["signature_match"] > 0
+
+    def test_thread_mode(self):
+        with DetectionPool(2, "thread") as thread_pool:
+            technologies = thread_pool.detect(HEADERS, PAGE.encode("utf-8"))
+        assert technologies == detect_technologies(HEADERS, PAGE)
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError, match="Unknown detection mode"):
+            DetectionPool(1, "interpreter")
+
+    def test_invalid_workers(self):
+        with pytest.raises(ValueError, match="at least 1"):
+            DetectionPool(0)
+
+    def test_only_robots_content_is_sent(self):
+        robots = {"disallowed": ["/admin"], "raw": "x" * 1000, "content": "wp-admin"}
+        _, _, sent, timed = _job(HEADERS, b"", robots, None)
+        assert sent == {"content": "wp-admin"}
+        assert timed is False
+        assert _job(HEADERS, b"", {"raw": "x"}, Timings())[2:] == (None, True)
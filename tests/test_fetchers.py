@@ -1,7 +1,18 @@
+import asyncio
+import httpx
 import pytest
-from unittest.mock import patch, MagicMock
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch, AsyncMock, MagicMock
 from requests import RequestException
-from src.interrogate.fetchers import fetch_url_info
+from src.interrogate.fetchers import (
+    MAX_BODY_SIZE,
+    fetch_url_info,
+    fetch_url_info_async,
+)
+from src.interrogate.retry import RetryPolicy
+from src.interrogate.scheduler import HostScheduler
+from src.interrogate.timings import PHASES
+from src.interrogate.store import ValidatorStore
 
 
 class TestFetchUrlInfo:
@@ -10,7 +21,9 @@ class TestFetchUrlInfo:
         # Mock robots.txt response
         mock_robots_response = MagicMock()
         mock_robots_response.status_code = 200
-        mock_robots_response.text = "User-agent: *\nDisallow: /admin\n"
+        mock_robots_response.iter_content.return_value = iter(
+            ["User-agent: *\nDisallow: /admin\n".encode()]
+        )
         # Mock main response
         mock_main_response = MagicMock()
         mock_main_response.status_code = 200
@@ -45,7 +58,9 @@ class TestFetchUrlInfo:
         # Mock robots
         mock_robots_response = MagicMock()
         mock_robots_response.status_code = 200
-        mock_robots_response.text = "User-agent: *\nDisallow: /admin\n"
+        mock_robots_response.iter_content.return_value = iter(
+            ["User-agent: *\nDisallow: /admin\n".encode()]
+        )
         # Mock main 404
         mock_main_response = MagicMock()
         mock_main_response.status_code = 404
@@ -65,7 +80,9 @@ class TestFetchUrlInfo:
         # Mock robots
         mock_robots_response = MagicMock()
         mock_robots_response.status_code = 200
-        mock_robots_response.text = "User-agent: *\nDisallow: /admin\n"
+        mock_robots_response.iter_content.return_value = iter(
+            ["User-agent: *\nDisallow: /admin\n".encode()]
+        )
         # Mock main 429 then 200
         mock_429_response = MagicMock()
         mock_429_response.status_code = 429
@@ -92,7 +109,9 @@ class TestFetchUrlInfo:
         # Mock robots with crawl-delay
         mock_robots_response = MagicMock()
         mock_robots_response.status_code = 200
-        mock_robots_response.text = "User-agent: *\nDisallow: /admin\nCrawl-delay: 5\n"
+        mock_robots_response.iter_content.return_value = iter(
+            ["User-agent: *\nDisallow: /admin\nCrawl-delay: 5\n".encode()]
+        )
         # Mock main
         mock_main_response = MagicMock()
         mock_main_response.status_code = 200
@@ -106,6 +125,258 @@ class TestFetchUrlInfo:
         mock_sleep.assert_called_with(5.0)
         assert result["status_code"] == 200
 
+    @patch("src.interrogate.fetchers.requests.get")
+    @patch("src.interrogate.fetchers.time.sleep")
+    def test_include_timings(self, mock_sleep, mock_get):
+        mock_robots_response = MagicMock()
+        mock_robots_response.status_code = 200
+        mock_robots_response.iter_content.return_value = iter(
+            ["User-agent: *\nCrawl-delay: 1\n".encode()]
+        )
+        mock_429_response = MagicMock()
+        mock_429_response.status_code = 429
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {"Server": "nginx"}
+        mock_main_response.iter_content.return_value = iter([b"<html>OK</html>"])
+        mock_get.side_effect = [
+            mock_robots_response,
+            mock_429_response,
+            mock_main_response,
+        ]
+
+        result = fetch_url_info(
+            "https://example.com", include_headers=True, include_timings=True
+        )
+
+        assert set(result["timings"]) == {*PHASES, "total"}
+        assert all(value >= 0 for value in result["timings"].values())
+        assert mock_sleep.call_count == 2  # crawl delay, then retry back-off
+
+    @patch("src.interrogate.fetchers.requests.get")
+    def test_detection_pool_used(self, mock_get):
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {"Server": "nginx"}
+        mock_main_response.iter_content.return_value = iter([b"<html>OK</html>"])
+        mock_get.return_value = mock_main_response
+        pool = MagicMock()
+        pool.detect.return_value = [{"name": "Nginx", "version": None}]
+
+        with patch(
+            "src.interrogate.fetchers.fetch_robots_txt",
+            return_value={"error": "skipped"},
+        ):
+            result = fetch_url_info(
+                "https://example.com", include_body=True, detection_pool=pool
+            )
+
+        pool.detect.assert_called_once_with(
+            {"Server": "nginx"},
+            bytearray(b"<html>OK</html>"),
+            {"error": "skipped"},
+            None,
+        )
+        assert result["technologies"] == [{"name": "Nginx", "version": None}]
+        assert result["body"] == "<html>OK</html>"
+
+    @patch("src.interrogate.fetchers.requests.get")
+    def test_detection_pool_failure(self, mock_get):
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {"Server": "nginx"}
+        mock_main_response.iter_content.return_value = iter([b"<html>OK</html>"])
+        mock_get.return_value = mock_main_response
+        pool = MagicMock()
+        pool.detect.side_effect = BrokenProcessPool("worker died")
+
+        with patch(
+            "src.interrogate.fetchers.fetch_robots_txt",
+            return_value={"error": "skipped"},
+        ):
+            with pytest.raises(ValueError, match="detection failed: worker died"):
+                fetch_url_info(
+                    "https://example.com", include_body=True, detection_pool=pool
+                )
+
+    @patch("src.interrogate.fetchers.requests.get")
+    def test_detection_pool_skipped_with_head_budget(self, mock_get):
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {"Server": "nginx"}
+        mock_main_response.iter_content.return_value = iter([b"<html>OK</html>"])
+        mock_get.return_value = mock_main_response
+        pool = MagicMock()
+
+        with patch(
+            "src.interrogate.fetchers.fetch_robots_txt",
+            return_value={"error": "skipped"},
+        ):
+            result = fetch_url_info(
+                "https://example.com",
+                include_headers=True,
+                head_budget=0,
+                detection_pool=pool,
+            )
+
+        pool.detect.assert_not_called()
+        assert {"name": "Nginx", "version": None} in result["technologies"]
+
+    @patch("src.interrogate.fetchers.requests.get")
+    def test_timings_off_by_default(self, mock_get):
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {}
+        mock_main_response.iter_content.return_value = iter([b"OK"])
+        mock_get.return_value = mock_main_response
+
+        result = fetch_url_info("https://example.com")
+
+        assert "timings" not in result
+
+    @patch("src.interrogate.fetchers.requests.get")
+    def test_body_size_and_chunk_size_configurable(self, mock_get):
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {"Content-Length": "12"}
+        mock_main_response.iter_content.return_value = iter([b"abcd", b"efgh", b"ijkl"])
+        mock_get.return_value = mock_main_response
+
+        result = fetch_url_info("https://example.com", max_body_size=6, chunk_size=4)
+
+        mock_main_response.iter_content.assert_called_once_with(chunk_size=4)
+        assert result["status_code"] == 200
+        mock_main_response.close.assert_called_once()
+
+    @patch("src.interrogate.fetchers.requests.get")
+    @patch("src.interrogate.fetchers.fetch_robots_txt")
+    def test_body_capped(self, mock_robots, mock_get):
+        mock_robots.return_value = {"error": "skipped"}
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {}
+        mock_main_response.iter_content.return_value = iter(
+            [b"x" * 1000] * 10 + [b"y" * 1000]
+        )
+        mock_get.return_value = mock_main_response
+
+        result = fetch_url_info(
+            "https://example.com", include_body=True, max_body_size=9500
+        )
+
+        assert result["body"] == "x" * 9500
+
+    @patch("src.interrogate.fetchers.requests.get")
+    @patch("src.interrogate.fetchers.fetch_robots_txt")
+    def test_head_budget_stops_download(self, mock_robots, mock_get):
+        mock_robots.return_value = {"error": "skipped"}
+        chunks = [
+            b'<html><head><script src="/vue@3.4.0/vue.js"></script></head>',
+            b"<body>" + b"a" * 100,
+            b"b" * 100,
+            b"c" * 100,
+        ]
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {}
+        mock_main_response.iter_content.return_value = iter(chunks)
+        mock_get.return_value = mock_main_response
+
+        result = fetch_url_info(
+            "https://example.com", include_body=True, head_budget=150
+        )
+
+        assert result["body"] == (chunks[0] + chunks[1] + chunks[2]).decode()
+        assert {"name": "Vue.js", "version": "3.4.0"} in result["technologies"]
+        mock_main_response.close.assert_called_once()
+
+    @patch("src.interrogate.fetchers.requests.get")
+    @patch("src.interrogate.fetchers.fetch_robots_txt")
+    def test_head_budget_page_not_stored(self, mock_robots, mock_get, tmp_path):
+        mock_robots.return_value = {"error": "skipped"}
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {"ETag": '"v1"'}
+        mock_main_response.iter_content.return_value = iter(
+            [b"<html><head></head><body>", b"a" * 100, b"b" * 100]
+        )
+        mock_get.return_value = mock_main_response
+
+        with ValidatorStore(str(tmp_path / "store.db")) as store:
+            fetch_url_info(
+                "https://example.com", include_body=True, head_budget=10, store=store
+            )
+
+            assert store.get_page("https://example.com") is None
+
+    @patch("src.interrogate.fetchers.requests.get")
+    @patch("src.interrogate.fetchers.time.sleep")
+    def test_scheduler_spaces_requests_per_host(self, mock_sleep, mock_get):
+        def fake_get(url, **kwargs):
+            response = MagicMock()
+            response.status_code = 200
+            response.url = url
+            response.headers = {}
+            body = b"User-agent: *\nCrawl-delay: 5\n" if "robots" in url else b"OK"
+            response.iter_content.return_value = iter([body])
+            return response
+
+        mock_get.side_effect = fake_get
+        scheduler = HostScheduler()
+
+        fetch_url_info("https://example.com/a", include_body=True, scheduler=scheduler)
+        mock_sleep.assert_not_called()
+        fetch_url_info("https://other.com/", include_body=True, scheduler=scheduler)
+        mock_sleep.assert_not_called()
+        fetch_url_info("https://example.com/b", include_body=True, scheduler=scheduler)
+
+        assert mock_sleep.call_count == 1
+        assert 0 < mock_sleep.call_args.args[0] <= 5.0
+
+    @patch("src.interrogate.fetchers.requests.get")
+    @patch("src.interrogate.fetchers.time.sleep")
+    def test_backoff_defers_host(self, mock_sleep, mock_get):
+        mock_429_response = MagicMock()
+        mock_429_response.status_code = 429
+        mock_429_response.headers = {"Retry-After": "30"}
+        mock_200_response = MagicMock()
+        mock_200_response.status_code = 200
+        mock_200_response.url = "https://example.com/"
+        mock_200_response.headers = {}
+        mock_200_response.iter_content.return_value = iter([b"OK"])
+        mock_get.side_effect = [mock_429_response, mock_200_response]
+        scheduler = HostScheduler()
+
+        result = fetch_url_info("https://example.com/", scheduler=scheduler)
+
+        assert result["status_code"] == 200
+        mock_sleep.assert_called_once_with(30.0)
+        assert scheduler.ready_at("https://example.com:443") > 0
+
+    @patch("src.interrogate.fetchers.requests.get")
+    @patch("src.interrogate.fetchers.time.sleep")
+    def test_retry_policy_applies_to_page(self, mock_sleep, mock_get):
+        mock_503_response = MagicMock()
+        mock_503_response.status_code = 503
+        mock_503_response.headers = {}
+        mock_get.return_value = mock_503_response
+
+        result = fetch_url_info(
+            "https://example.com/", retry_policy=RetryPolicy(attempts=4)
+        )
+
+        assert result["status_code"] == 503
+        assert mock_get.call_count == 4
+
 
 class TestFetchUrlInfoFlags:
     @patch("src.interrogate.fetchers.requests.get")
@@ -153,7 +424,12 @@ class TestFetchUrlInfoFlags:
             elif url == "https://example.com/robots.txt":
                 mock_resp = MagicMock()
                 mock_resp.status_code = 200
-                mock_resp.text = "User-agent: *\nDisallow: /private\nSitemap: https://example.com/sitemap.xml"
+                mock_resp.iter_content.return_value = iter(
+                    [
+                        b"User-agent: *\nDisallow: /private\n",
+                        b"Sitemap: https://example.com/sitemap.xml",
+                    ]
+                )
                 return mock_resp
             else:
                 raise RequestException("Not found")
@@ -173,6 +449,32 @@ class TestFetchUrlInfoFlags:
         assert "user_agents" in robots
         assert "*" in robots["user_agents"]
 
+    def test_robots_raw_limit(self):
+        def mock_get(url, **kwargs):
+            mock_resp = MagicMock()
+            mock_resp.status_code = 200
+            mock_resp.url = url
+            mock_resp.headers = {}
+            body = b"User-agent: *\n" + b"Disallow: /x\n" * 100
+            mock_resp.iter_content.return_value = iter([body])
+            return mock_resp
+
+        with (
+            patch("src.interrogate.fetchers.requests.get", side_effect=mock_get),
+            patch("src.interrogate.robots.requests.get", side_effect=mock_get),
+        ):
+            result = fetch_url_info(
+                "https://example.com",
+                include_robots=True,
+                robots_max_size=200,
+                robots_raw_limit=50,
+            )
+
+        robots = result["robots_txt"]
+        assert robots["truncated"] is True
+        assert robots["raw_truncated"] is True
+        assert len(robots["raw"]) == 50
+
     def test_include_robots_404(self):
         def mock_get(url, **kwargs):
             if url == "https://example.com":
@@ -211,7 +513,9 @@ class TestFetchUrlInfoFlags:
             elif url == "https://example.com/robots.txt":
                 mock_resp = MagicMock()
                 mock_resp.status_code = 200
-                mock_resp.text = "Invalid robots.txt content"
+                mock_resp.iter_content.return_value = iter(
+                    [b"Invalid robots.txt content"]
+                )
                 return mock_resp
             else:
                 raise RequestException("Not found")
@@ -248,3 +552,242 @@ class TestFetchUrlInfoFlags:
         assert "body" in result
         assert "technologies" in result
         assert "robots_txt" in result  # Even if error, it should be present
+
+    def test_session_shared_by_robots_and_page(self):
+        mock_robots_response = MagicMock()
+        mock_robots_response.status_code = 200
+        mock_robots_response.iter_content.return_value = iter(
+            ["User-agent: *\n".encode()]
+        )
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com"
+        mock_main_response.headers = {}
+        mock_main_response.iter_content.return_value = iter([b"OK"])
+        session = MagicMock()
+        session.get.side_effect = [mock_robots_response, mock_main_response]
+
+        with patch("src.interrogate.fetchers.requests.get") as mock_get:
+            result = fetch_url_info(
+                "https://example.com", include_body=True, session=session
+            )
+
+        mock_get.assert_not_called()
+        assert [c.args[0] for c in session.get.call_args_list] == [
+            "https://example.com/robots.txt",
+            "https://example.com",
+        ]
+        mock_main_response.close.assert_called_once()
+        assert result["body"] == "OK"
+
+    def test_store_revalidates_page(self, tmp_path):
+        store = ValidatorStore(str(tmp_path / "store.db"))
+        store.put_page(
+            "https://example.com",
+            200,
+            "https://example.com/",
+            {"ETag": '"v1"', "Server": "nginx"},
+            b"<html>WordPress</html>",
+        )
+        mock_robots_response = MagicMock()
+        mock_robots_response.status_code = 404
+        mock_304_response = MagicMock()
+        mock_304_response.status_code = 304
+        session = MagicMock()
+        session.get.side_effect = [mock_robots_response, mock_304_response]
+
+        result = fetch_url_info(
+            "https://example.com",
+            include_headers=True,
+            include_body=True,
+            session=session,
+            store=store,
+        )
+        store.close()
+
+        page_headers = session.get.call_args_list[1].kwargs["headers"]
+        assert page_headers["If-None-Match"] == '"v1"'
+        mock_304_response.iter_content.assert_not_called()
+        assert result["status_code"] == 200
+        assert result["final_url"] == "https://example.com/"
+        assert result["body"] == "<html>WordPress</html>"
+        assert {"name": "Nginx", "version": None} in result["technologies"]
+        assert {"name": "WordPress", "version": None} in result["technologies"]
+
+
+def _mock_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestFetchUrlInfoAsync:
+    def test_successful_fetch(self):
+        body_text = "<html><script src='jquery.js'></script>WordPress site</html>"
+
+        def handler(request):
+            if request.url.path == "/robots.txt":
+                return httpx.Response(200, text="User-agent: *\nDisallow: /admin\n")
+            return httpx.Response(
+                200,
+                headers=[("Server", "nginx"), ("X-Powered-By", "PHP")],
+                text=body_text,
+            )
+
+        async def run():
+            async with _mock_client(handler) as client:
+                return await fetch_url_info_async(
+                    "https://example.com",
+                    include_headers=True,
+                    include_body=True,
+                    include_robots=True,
+                    client=client,
+                )
+
+        result = asyncio.run(run())
+
+        assert result["status_code"] == 200
+        assert result["final_url"] == "https://example.com"
+        assert result["headers"]["Server"] == "nginx"
+        assert {"name": "Nginx", "version": None} in result["technologies"]
+        assert {"name": "PHP", "version": None} in result["technologies"]
+        assert result["body"] == body_text
+        assert "/admin" in result["robots_txt"]["disallowed"]
+
+    @patch("src.interrogate.utils.asyncio.sleep", new_callable=AsyncMock)
+    def test_fetch_error(self, mock_sleep):
+        def handler(request):
+            raise httpx.ConnectError("Connection error")
+
+        async def run():
+            async with _mock_client(handler) as client:
+                return await fetch_url_info_async("https://example.com", client=client)
+
+        with pytest.raises(ValueError, match="Failed to fetch URL"):
+            asyncio.run(run())
+        mock_sleep.assert_awaited_once_with(2)  # Connection errors are retried
+
+    def test_detection_pool_failure(self):
+        def handler(request):
+            if request.url.path == "/robots.txt":
+                return httpx.Response(404)
+            return httpx.Response(200, text="<html><body>OK</body></html>")
+
+        pool = MagicMock()
+        pool.detect_async = AsyncMock(side_effect=KeyError("meta"))
+
+        async def run():
+            async with _mock_client(handler) as client:
+                return await fetch_url_info_async(
+                    "https://example.com",
+                    include_body=True,
+                    detection_pool=pool,
+                    client=client,
+                )
+
+        with pytest.raises(ValueError, match="detection failed: 'meta'"):
+            asyncio.run(run())
+
+    def test_include_timings(self):
+        def handler(request):
+            if request.url.path == "/robots.txt":
+                return httpx.Response(404)
+            return httpx.Response(200, text="<html><body>OK</body></html>")
+
+        async def run():
+            async with _mock_client(handler) as client:
+                return await fetch_url_info_async(
+                    "https://example.com",
+                    include_body=True,
+                    include_timings=True,
+                    client=client,
+                )
+
+        result = asyncio.run(run())
+
+        assert set(result["timings"]) == {*PHASES, "total"}
+        assert result["timings"]["total"] >= result["timings"]["download"]
+
+    def test_body_capped(self):
+        def handler(request):
+            return httpx.Response(200, content=b"x" * (MAX_BODY_SIZE + 5000))
+
+        async def run():
+            async with _mock_client(handler) as client:
+                return await fetch_url_info_async(
+                    "https://example.com/page", include_body=True, client=client
+                )
+
+        with patch(
+            "src.interrogate.fetchers.fetch_robots_txt_async",
+            new=AsyncMock(return_value={"error": "skipped"}),
+        ):
+            result = asyncio.run(run())
+
+        assert len(result["body"]) == MAX_BODY_SIZE
+
+    def test_head_budget_stops_download(self):
+        page = b"<html><head><title>t</title></head><body>" + b"x" * 50000
+
+        def handler(request):
+            if request.url.path == "/robots.txt":
+                return httpx.Response(404)
+            return httpx.Response(200, content=page)
+
+        async def run():
+            async with _mock_client(handler) as client:
+                return await fetch_url_info_async(
+                    "https://example.com/page",
+                    include_body=True,
+                    client=client,
+                    chunk_size=1024,
+                    head_budget=0,
+                )
+
+        result = asyncio.run(run())
+
+        assert 0 < len(result["body"]) <= 2048
+        assert result["body"].startswith("<html><head>")
+
+    def test_store_saves_and_revalidates(self, tmp_path):
+        seen = []
+
+        def handler(request):
+            seen.append(dict(request.headers))
+            if request.url.path == "/robots.txt":
+                return httpx.Response(404)
+            if "if-none-match" in request.headers:
+                return httpx.Response(304)
+            return httpx.Response(200, headers={"ETag": '"v1"'}, text="first body")
+
+        async def run(store):
+            async with _mock_client(handler) as client:
+                return await fetch_url_info_async(
+                    "https://example.com/page",
+                    include_body=True,
+                    client=client,
+                    store=store,
+                )
+
+        with ValidatorStore(str(tmp_path / "store.db")) as store:
+            first = asyncio.run(run(store))
+            second = asyncio.run(run(store))
+
+        assert seen[3]["if-none-match"] == '"v1"'
+        assert first["body"] == second["body"] == "first body"
+
+    @patch("src.interrogate.fetchers.asyncio.sleep", new_callable=AsyncMock)
+    def test_crawl_delay_sleep(self, mock_sleep):
+        def handler(request):
+            if request.url.path == "/robots.txt":
+                return httpx.Response(200, text="User-agent: *\nCrawl-delay: 5\n")
+            return httpx.Response(200, text="OK")
+
+        async def run():
+            async with _mock_client(handler) as client:
+                return await fetch_url_info_async(
+                    "https://example.com", include_body=True, client=client
+                )
+
+        result = asyncio.run(run())
+
+        mock_sleep.assert_awaited_with(5.0)
+        assert result["body"] == "OK"
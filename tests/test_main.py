@@ -1,7 +1,10 @@
 """Tests for the CLI main module."""
 
+import json
 import pytest
+import sqlite3
 import sys
+import threading
 from unittest.mock import patch
 
 from interrogate.__main__ import main
@@ -17,3 +20,348 @@ def test_help(capsys):
         assert "usage:" in captured.out.lower()
         assert "help" in captured.out.lower()
         assert "url" in captured.out.lower()
+
+
+def test_input_batch(tmp_path, capsys):
+    """Test that --input streams one compact JSON record per URL."""
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://a.example\nhttps://b.example\n")
+
+    def fake_fetch(url, **kwargs):
+        return {"status_code": 200, "final_url": url}
+
+    with (
+        patch.object(sys, "argv", ["main.py", "--input", str(url_file)]),
+        patch("interrogate.batch.fetch_url_info", side_effect=fake_fetch),
+    ):
+        main()
+
+    lines = capsys.readouterr().out.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert sorted(r["url"] for r in records) == [
+        "https://a.example",
+        "https://b.example",
+    ]
+
+
+def test_url_and_input_are_exclusive(capsys):
+    """Test that --url and --input cannot be combined."""
+    with patch.object(sys, "argv", ["main.py", "--url", "https://a", "--input", "-"]):
+        with pytest.raises(SystemExit) as excinfo:
+            main()
+        assert excinfo.value.code == 2
+
+
+def test_input_batch_async(tmp_path, capsys):
+    """Test that --input --async streams records from the asyncio engine."""
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://a.example\n")
+
+    async def fake_fetch(url, client=None, **kwargs):
+        return {"status_code": 200, "final_url": url}
+
+    with (
+        patch.object(sys, "argv", ["main.py", "--input", str(url_file), "--async"]),
+        patch("interrogate.batch.fetch_url_info_async", side_effect=fake_fetch),
+    ):
+        main()
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records == [
+        {
+            "url": "https://a.example",
+            "status_code": 200,
+            "final_url": "https://a.example",
+        }
+    ]
+
+
+def test_head_budget_passed_to_fetch(tmp_path, capsys):
+    """Test that --head-budget reaches fetch_url_info for every URL."""
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://a.example\n")
+    seen = []
+
+    def fake_fetch(url, **kwargs):
+        seen.append(kwargs.get("head_budget"))
+        return {"status_code": 200, "final_url": url}
+
+    argv = ["main.py", "--input", str(url_file), "--head-budget", "4096"]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("interrogate.batch.fetch_url_info", side_effect=fake_fetch),
+    ):
+        main()
+
+    assert seen == [4096]
+
+
+def test_fields_projection(tmp_path, capsys):
+    """Test that --fields projects records and enables only what they need."""
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://a.example\n")
+    seen = []
+
+    def fake_fetch(url, **kwargs):
+        seen.append(kwargs)
+        return {
+            "status_code": 200,
+            "final_url": url,
+            "technologies": [],
+            "headers": {"Server": "nginx"},
+        }
+
+    argv = ["main.py", "--input", str(url_file), "--fields", "technologies"]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("interrogate.batch.fetch_url_info", side_effect=fake_fetch),
+    ):
+        main()
+
+    record = json.loads(capsys.readouterr().out)
+    assert record == {"url": "https://a.example", "technologies": []}
+    assert seen[0]["include_headers"] is True
+    assert seen[0]["include_body"] is False
+
+
+def test_unknown_field(capsys):
+    """Test that unknown --fields entries are rejected."""
+    argv = ["main.py", "--url", "https://a.example", "--fields", "cookies"]
+    with patch.object(sys, "argv", argv):
+        with pytest.raises(SystemExit) as excinfo:
+            main()
+        assert excinfo.value.code == 2
+
+
+def test_timings_summary(tmp_path, capsys):
+    """Test that --timings requests timings and prints a batch summary to stderr."""
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://a.example\nhttps://b.example\n")
+    seen = []
+
+    def fake_fetch(url, **kwargs):
+        seen.append(kwargs["include_timings"])
+        return {"status_code": 200, "final_url": url, "timings": {"ttfb": 2.0}}
+
+    argv = ["main.py", "--input", str(url_file), "--timings"]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("interrogate.batch.fetch_url_info", side_effect=fake_fetch),
+    ):
+        main()
+
+    captured = capsys.readouterr()
+    assert seen == [True, True]
+    assert len(captured.out.splitlines()) == 2
+    summary = json.loads(captured.err)["timings_summary"]
+    assert summary["ttfb"]["count"] == 2
+    assert summary["ttfb"]["mean"] == 2.0
+
+
+def test_retry_settings_passed_to_fetch(tmp_path, capsys):
+    """Test that retry flags build the RetryPolicy given to fetch_url_info."""
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://a.example\n")
+    seen = []
+
+    def fake_fetch(url, **kwargs):
+        seen.append(kwargs["retry_policy"])
+        return {"status_code": 200, "final_url": url}
+
+    argv = [
+        "main.py",
+        "--input",
+        str(url_file),
+        "--max-attempts",
+        "5",
+        "--retry-deadline",
+        "30",
+    ]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("interrogate.batch.fetch_url_info", side_effect=fake_fetch),
+    ):
+        main()
+
+    assert (seen[0].attempts, seen[0].deadline) == (5, 30.0)
+
+
+def test_invalid_retry_settings(capsys):
+    """Test that invalid retry flags are rejected."""
+    argv = ["main.py", "--url", "https://a.example", "--max-attempts", "0"]
+    with patch.object(sys, "argv", argv):
+        with pytest.raises(SystemExit) as excinfo:
+            main()
+        assert excinfo.value.code == 2
+
+
+def test_sitemaps_batch(capsys):
+    """Test that --sitemaps streams sitemap URLs into the batch scan."""
+
+    def fake_site_urls(site, on_error, **kwargs):
+        on_error("https://a.example/broken.xml", "Sitemap not found (status 404)")
+        yield from ["https://a.example/1", "https://a.example/2"]
+
+    def fake_fetch(url, **kwargs):
+        return {"status_code": 200, "final_url": url}
+
+    argv = ["main.py", "--sitemaps", "https://a.example"]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("interrogate.__main__.iter_site_urls", side_effect=fake_site_urls),
+        patch("interrogate.batch.fetch_url_info", side_effect=fake_fetch),
+    ):
+        main()
+
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert sorted(r["url"] for r in records) == [
+        "https://a.example/1",
+        "https://a.example/2",
+    ]
+    assert json.loads(captured.err)["sitemap"] == "https://a.example/broken.xml"
+
+
+def test_sitemaps_batch_async(capsys):
+    """Test that --sitemaps --async reads the sitemaps off the event loop thread."""
+    threads = set()
+
+    def fake_site_urls(site, **kwargs):
+        threads.add(threading.current_thread())
+        yield from ["https://a.example/1", "https://a.example/2"]
+
+    async def fake_fetch(url, client=None, **kwargs):
+        return {"status_code": 200, "final_url": url}
+
+    argv = ["main.py", "--sitemaps", "https://a.example", "--async"]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("interrogate.__main__.iter_site_urls", side_effect=fake_site_urls),
+        patch("interrogate.batch.fetch_url_info_async", side_effect=fake_fetch),
+    ):
+        main()
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(r["url"] for r in records) == [
+        "https://a.example/1",
+        "https://a.example/2",
+    ]
+    assert threading.main_thread() not in threads
+
+
+def test_sitemaps_invalid_site(capsys):
+    """Test that --sitemaps rejects a site without a scheme."""
+    with patch.object(sys, "argv", ["main.py", "--sitemaps", "a.example"]):
+        with pytest.raises(SystemExit) as excinfo:
+            main()
+        assert excinfo.value.code == 2
+
+
+def test_crawl(capsys):
+    """Test that --crawl prints page records and a final crawl summary."""
+
+    def fake_crawl(url, **kwargs):
+        assert (kwargs["max_depth"], kwargs["max_pages"]) == (1, 5)
+        yield {"url": url, "depth": 0, "technologies": []}
+        yield {
+            "url": url + "blog/",
+            "depth": 1,
+            "technologies": [{"name": "WordPress", "version": None}],
+        }
+
+    argv = ["main.py", "--url", "https://a.example/", "--crawl"]
+    argv += ["--max-depth", "1", "--max-pages", "5"]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("interrogate.__main__.crawl", side_effect=fake_crawl),
+    ):
+        main()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["depth"] for line in lines[:2]] == [0, 1]
+    summary = json.loads(lines[2])["crawl_summary"]
+    assert summary["technologies"][0]["on_start_page"] is False
+
+
+def test_crawl_requires_url(capsys):
+    """Test that --crawl cannot be combined with --input."""
+    with patch.object(sys, "argv", ["main.py", "--input", "-", "--crawl"]):
+        with pytest.raises(SystemExit) as excinfo:
+            main()
+        assert excinfo.value.code == 2
+
+
+def test_output_sqlite(tmp_path, capsys):
+    """Test that --output sqlite:PATH writes batch results to the database."""
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://a.example\nhttps://b.example\n")
+    db = tmp_path / "results.db"
+
+    def fake_fetch(url, **kwargs):
+        return {"status_code": 200, "final_url": url}
+
+    argv = ["main.py", "--input", str(url_file), "--output", f"sqlite:{db}"]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("interrogate.batch.fetch_url_info", side_effect=fake_fetch),
+    ):
+        main()
+
+    assert capsys.readouterr().out == ""
+    conn = sqlite3.connect(db)
+    try:
+        rows = conn.execute("SELECT url, status_code FROM urls ORDER BY url").fetchall()
+    finally:
+        conn.close()
+    assert rows == [("https://a.example", 200), ("https://b.example", 200)]
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--input", "-", "--output", "results.db"],
+        ["--url", "https://a.example", "--output", "sqlite:results.db"],
+    ],
+)
+def test_output_invalid(argv, capsys):
+    """Test that --output needs a sqlite: target and a batch or crawl source."""
+    with patch.object(sys, "argv", ["main.py", *argv]):
+        with pytest.raises(SystemExit) as excinfo:
+            main()
+        assert excinfo.value.code == 2
+
+
+def test_checkpoint_resume(tmp_path, capsys):
+    """Test that --resume only interrogates URLs the checkpointed run did not finish."""
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://a.example\nhttps://b.example\n")
+    journal = tmp_path / "run.ckpt"
+    fetched = []
+
+    def fake_fetch(url, **kwargs):
+        fetched.append(url)
+        return {"status_code": 200, "final_url": url}
+
+    argv = ["main.py", "--input", str(url_file), "--checkpoint", str(journal)]
+    with patch("interrogate.batch.fetch_url_info", side_effect=fake_fetch):
+        with patch.object(sys, "argv", argv):
+            main()
+        url_file.write_text("https://a.example\nhttps://b.example\nhttps://c.example\n")
+        with patch.object(sys, "argv", argv + ["--resume"]):
+            main()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert sorted(fetched) == [
+        "https://a.example",
+        "https://b.example",
+        "https://c.example",
+    ]
+    assert json.loads(lines[-1])["url"] == "https://c.example"
+
+
+def test_resume_requires_checkpoint(capsys):
+    """Test that --resume needs --checkpoint."""
+    with patch.object(sys, "argv", ["main.py", "--input", "urls.txt", "--resume"]):
+        with pytest.raises(SystemExit) as excinfo:
+            main()
+        assert excinfo.value.code == 2
@@ -0,0 +1,113 @@
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.interrogate.output import NDJSONWriter, parse_fields, project
+
+
+class TestParseFields:
+    def test_valid(self):
+        assert parse_fields("status_code, technologies") == [
+            "status_code",
+            "technologies",
+        ]
+
+    def test_unknown(self):
+        with pytest.raises(ValueError, match="Unknown field"):
+            parse_fields("status_code,cookies")
+
+    def test_empty(self):
+        with pytest.raises(ValueError, match="No fields"):
+            parse_fields(" , ")
+
+
+class TestProject:
+    def test_keeps_requested_and_always_kept_fields(self):
+        record = {
+            "url": "https://example.com",
+            "status_code": 200,
+            "headers": {"Server": "nginx"},
+            "body": "<html>",
+        }
+
+        assert project(record, ["status_code"]) == {
+            "url": "https://example.com",
+            "status_code": 200,
+        }
+
+    def test_keeps_errors(self):
+        record = {"url": "https://example.com", "error": "Failed to fetch URL"}
+
+        assert project(record, ["technologies"]) == record
+
+    def test_no_fields_keeps_everything(self):
+        record = {"status_code": 200, "body": "x"}
+
+        assert project(record, None) is record
+
+
+class TestNDJSONWriter:
+    def test_writes_compact_lines(self):
+        stream = io.StringIO()
+        with NDJSONWriter(stream) as writer:
+            writer.write({"url": "https://a.example", "status_code": 200})
+            writer.write({"url": "https://b.example", "error": "boom"})
+
+        assert stream.getvalue() == (
+            '{"url":"https://a.example","status_code":200}\n'
+            '{"url":"https://b.example","error":"boom"}\n'
+        )
+        assert writer.count == 2
+
+    def test_projects_fields(self):
+        stream = io.StringIO()
+        with NDJSONWriter(stream, fields=["technologies"]) as writer:
+            writer.write({"url": "u", "technologies": [], "body": "x" * 1000})
+
+        assert json.loads(stream.getvalue()) == {"url": "u", "technologies": []}
+
+    @patch("src.interrogate.output.time.monotonic")
+    def test_flushes_in_batches(self, mock_monotonic):
+        mock_monotonic.return_value = 0.0
+        stream = io.StringIO()
+        writer = NDJSONWriter(stream, flush_every=3, flush_interval=60.0)
+
+        writer.write({"n": 1})
+        writer.write({"n": 2})
+        assert stream.getvalue() == ""
+        writer.write({"n": 3})
+        assert stream.getvalue().count("\n") == 3
+        writer.write({"n": 4})
+        assert stream.getvalue().count("\n") == 3
+        writer.close()
+        assert stream.getvalue().count("\n") == 4
+
+    @patch("src.interrogate.output.time.monotonic")
+    def test_flushes_after_interval(self, mock_monotonic):
+        mock_monotonic.return_value = 0.0
+        stream = io.StringIO()
+        writer = NDJSONWriter(stream, flush_every=100, flush_interval=1.0)
+
+        writer.write({"n": 1})
+        assert stream.getvalue() == ""
+        mock_monotonic.return_value = 1.5
+        writer.write({"n": 2})
+        assert stream.getvalue().count("\n") == 2
+
+    def test_on_flush_after_write(self):
+        stream = io.StringIO()
+        flushed = []
+        writer = NDJSONWriter(
+            stream, flush_every=2, on_flush=lambda: flushed.append(stream.getvalue())
+        )
+
+        writer.write({"n": 1})
+        assert flushed == []
+        writer.write({"n": 2})
+        assert flushed == ['{"n":1}\n{"n":2}\n']
+
+    def test_invalid_batch_size(self):
+        with pytest.raises(ValueError, match="flush_every"):
+            NDJSONWriter(io.StringIO(), flush_every=0)
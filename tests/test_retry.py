@@ -0,0 +1,156 @@
+import asyncio
+from email.utils import formatdate
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+import requests
+
+from src.interrogate.retry import RetryPolicy, parse_retry_after
+from src.interrogate.utils import retry_get, retry_get_async
+
+
+def _response(status_code, retry_after=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = {} if retry_after is None else {"Retry-After": retry_after}
+    return response
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after("120") == 120.0
+        assert parse_retry_after(" 0 ") == 0.0
+
+    def test_http_date(self):
+        now = 1_700_000_000.0
+        value = formatdate(now + 30, usegmt=True)
+
+        assert parse_retry_after(value, now=now) == 30.0
+        assert parse_retry_after(formatdate(now - 30, usegmt=True), now=now) == 0.0
+
+    def test_invalid(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after("-5") is None
+
+
+class TestRetryPolicy:
+    def test_invalid_settings(self):
+        with pytest.raises(ValueError, match="attempts"):
+            RetryPolicy(attempts=0)
+        with pytest.raises(ValueError, match="deadline"):
+            RetryPolicy(deadline=0)
+
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_exponential_backoff(self, mock_sleep, mock_get):
+        mock_get.side_effect = [_response(503)] * 3 + [_response(200)]
+        policy = RetryPolicy(attempts=4, backoff=1.0, multiplier=3.0)
+
+        response = retry_get("http://example.com", {}, policy=policy)
+
+        assert response.status_code == 200
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1.0, 3.0, 9.0]
+
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_jitter_bounds(self, mock_sleep, mock_get):
+        mock_get.side_effect = [_response(429), _response(200)]
+        policy = RetryPolicy(backoff=1.0, jitter=0.5)
+
+        retry_get("http://example.com", {}, policy=policy)
+
+        assert 1.0 <= mock_sleep.call_args.args[0] <= 1.5
+
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_gives_up_with_last_response(self, mock_sleep, mock_get):
+        mock_get.side_effect = [_response(429), _response(503), _response(429)]
+
+        response = retry_get("http://example.com", {}, policy=RetryPolicy(attempts=3))
+
+        assert response.status_code == 429
+        assert mock_get.call_count == 3
+
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_honours_retry_after(self, mock_sleep, mock_get):
+        mock_get.side_effect = [_response(429, "7"), _response(200)]
+
+        retry_get("http://example.com", {})
+
+        mock_sleep.assert_called_once_with(7.0)
+
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_long_retry_after_stops(self, mock_sleep, mock_get):
+        mock_get.side_effect = [_response(503, "3600"), _response(200)]
+
+        response = retry_get("http://example.com", {})
+
+        assert response.status_code == 503
+        mock_sleep.assert_not_called()
+
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_deadline_stops(self, mock_sleep, mock_get):
+        mock_get.side_effect = [_response(503, "5"), _response(200)]
+        policy = RetryPolicy(attempts=5, deadline=3.0)
+
+        response = retry_get("http://example.com", {}, policy=policy)
+
+        assert response.status_code == 503
+        mock_sleep.assert_not_called()
+
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_connection_errors_retried(self, mock_sleep, mock_get):
+        mock_get.side_effect = [requests.ConnectionError("reset"), _response(200)]
+
+        assert retry_get("http://example.com", {}).status_code == 200
+
+        mock_get.side_effect = [requests.Timeout("slow")] * 2
+        with pytest.raises(requests.Timeout):
+            retry_get("http://example.com", {})
+
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_connection_errors_not_retried(self, mock_sleep, mock_get):
+        mock_get.side_effect = [requests.ConnectionError("reset"), _response(200)]
+
+        with pytest.raises(requests.ConnectionError):
+            retry_get("http://example.com", {}, policy=RetryPolicy(retry_errors=False))
+        mock_sleep.assert_not_called()
+
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_on_backoff_called(self, mock_sleep, mock_get):
+        mock_get.side_effect = [_response(429, "3"), _response(200)]
+        waits = []
+
+        retry_get("http://example.com", {}, on_backoff=waits.append)
+
+        assert waits == [3.0]
+
+
+class TestRetryPolicyAsync:
+    @patch("src.interrogate.utils.asyncio.sleep", new_callable=AsyncMock)
+    def test_retry_after_and_backoff(self, mock_sleep):
+        responses = [
+            httpx.Response(503, headers={"Retry-After": "4"}),
+            httpx.Response(429),
+            httpx.Response(200),
+        ]
+
+        async def run():
+            transport = httpx.MockTransport(lambda request: responses.pop(0))
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await retry_get_async(
+                    "http://example.com", {}, client, policy=RetryPolicy(attempts=3)
+                )
+
+        response = asyncio.run(run())
+
+        assert response.status_code == 200
+        assert [c.args[0] for c in mock_sleep.await_args_list] == [4.0, 4.0]
@@ -1,5 +1,20 @@
-from unittest.mock import patch, MagicMock
-from src.interrogate.robots import fetch_robots_txt
+import asyncio
+import threading
+import time
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, AsyncMock, MagicMock
+from src.interrogate.robots import (
+    RobotsCache,
+    RobotsTxtParser,
+    fetch_robots_txt,
+    fetch_robots_txt_async,
+    parse_robots_txt,
+    robots_cache_key,
+    robots_output,
+)
+from src.interrogate.retry import RetryPolicy
+from src.interrogate.store import ValidatorStore
 
 
 class TestFetchRobotsTxt:
@@ -7,7 +22,9 @@ class TestFetchRobotsTxt:
     def test_robots_success(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.text = "user-agent: *\ndisallow: /private"
+        mock_response.iter_content.return_value = iter(
+            ["user-agent: *\ndisallow: /private".encode()]
+        )
         mock_get.return_value = mock_response
 
         result = fetch_robots_txt("https://example.com")
@@ -38,10 +55,422 @@ class TestFetchRobotsTxt:
         mock_429_response.status_code = 429
         mock_200_response = MagicMock()
         mock_200_response.status_code = 200
-        mock_200_response.text = "user-agent: *\ndisallow: /private"
+        mock_200_response.iter_content.return_value = iter(
+            ["user-agent: *\ndisallow: /private".encode()]
+        )
         mock_get.side_effect = [mock_429_response, mock_200_response]
 
         result = fetch_robots_txt("https://example.com")
 
         assert mock_sleep.called
         assert "disallowed" in result
+
+    @patch("src.interrogate.robots.requests.get")
+    def test_robots_cached_per_origin(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_content.return_value = iter(
+            ["user-agent: *\ndisallow: /private".encode()]
+        )
+        mock_response.headers = {}
+        mock_get.return_value = mock_response
+        cache = RobotsCache()
+
+        first = fetch_robots_txt("https://example.com/a", cache=cache)
+        second = fetch_robots_txt("https://EXAMPLE.com:443/b?q=1", cache=cache)
+
+        assert first == second
+        assert mock_get.call_count == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    @patch("src.interrogate.robots.requests.get")
+    def test_concurrent_misses_fetch_once(self, mock_get):
+        fetching = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            fetching.set()
+            time.sleep(0.05)
+            return mock_response
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_content.return_value = iter(
+            ["user-agent: *\ndisallow: /private".encode()]
+        )
+        mock_response.headers = {}
+        mock_get.side_effect = slow_get
+        cache = RobotsCache()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda n: fetch_robots_txt(f"https://example.com/{n}", cache=cache),
+                    range(8),
+                )
+            )
+
+        assert fetching.is_set()
+        assert mock_get.call_count == 1
+        assert all(result == results[0] for result in results)
+        assert cache._fetching == {}
+
+    @patch("src.interrogate.robots.requests.get")
+    def test_concurrent_misses_share_failed_fetch(self, mock_get):
+        def slow_get(*args, **kwargs):
+            time.sleep(0.05)
+            return mock_response
+
+        mock_response = MagicMock()
+        mock_response.status_code = 503
+        mock_response.headers = {}
+        mock_get.side_effect = slow_get
+        cache = RobotsCache()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda n: fetch_robots_txt(
+                        f"https://example.com/{n}",
+                        cache=cache,
+                        policy=RetryPolicy(attempts=1),
+                    ),
+                    range(8),
+                )
+            )
+
+        assert mock_get.call_count == 1
+        assert all("status 503" in result["error"] for result in results)
+        assert len(cache) == 0
+        assert cache._fetching == {}
+
+    @patch("src.interrogate.robots.requests.get")
+    def test_robots_cache_skips_server_errors(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 503
+        mock_response.headers = {}
+        mock_get.return_value = mock_response
+        cache = RobotsCache()
+
+        with patch("src.interrogate.utils.time.sleep"):
+            fetch_robots_txt("https://example.com", cache=cache)
+            fetch_robots_txt("https://example.com", cache=cache)
+
+        assert len(cache) == 0
+        assert mock_get.call_count == 4  # Each call retries once
+
+    def test_robots_revalidated_from_store(self, tmp_path):
+        store = ValidatorStore(str(tmp_path / "store.db"))
+        store.put_robots(
+            "https://example.com:443",
+            {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+            {"disallowed": ["/stored"]},
+        )
+        mock_response = MagicMock()
+        mock_response.status_code = 304
+        session = MagicMock()
+        session.get.return_value = mock_response
+
+        result = fetch_robots_txt("https://example.com", session=session, store=store)
+        store.close()
+
+        headers = session.get.call_args.kwargs["headers"]
+        assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+        assert result == {"disallowed": ["/stored"]}
+
+    @patch("src.interrogate.robots.requests.get")
+    def test_robots_capped(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_content.return_value = iter(
+            [b"User-agent: *\nDisallow: /a\n", b"Disallow: /b\n" * 1000]
+        )
+        mock_get.return_value = mock_response
+
+        result = fetch_robots_txt("https://example.com", max_size=40)
+
+        assert result["truncated"] is True
+        assert sorted(result["disallowed"]) == ["/a", "/b"]
+        assert result["raw"] == "User-agent: *\nDisallow: /a\nDisallow: /b\n"
+        assert mock_get.call_args.kwargs["stream"] is True
+        mock_response.close.assert_called_once()
+
+
+class TestRobotsCacheKey:
+    def test_default_ports_and_case(self):
+        assert robots_cache_key("https://Example.com/x") == "https://example.com:443"
+        assert robots_cache_key("http://example.com:80/") == "http://example.com:80"
+        assert robots_cache_key("http://example.com:8080/") == (
+            "http://example.com:8080"
+        )
+
+
+class TestRobotsCache:
+    def test_miss_then_hit(self):
+        cache = RobotsCache()
+
+        assert cache.get("https://example.com/") is None
+        cache.put("https://example.com/", {"disallowed": []})
+
+        assert cache.get("https://example.com/other") == {"disallowed": []}
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    @patch("src.interrogate.robots.time.monotonic")
+    def test_ttl_expiry(self, mock_monotonic):
+        cache = RobotsCache(ttl=10)
+        mock_monotonic.return_value = 100.0
+        cache.put("https://example.com/", {"disallowed": []})
+
+        mock_monotonic.return_value = 109.0
+        assert cache.get("https://example.com/") is not None
+        mock_monotonic.return_value = 111.0
+        assert cache.get("https://example.com/") is None
+        assert len(cache) == 0
+
+    @patch("src.interrogate.robots.time.monotonic")
+    def test_cache_control_max_age(self, mock_monotonic):
+        cache = RobotsCache(ttl=10)
+        mock_monotonic.return_value = 0.0
+        cache.put("https://a.example/", {}, {"Cache-Control": "public, max-age=60"})
+
+        mock_monotonic.return_value = 30.0
+        assert cache.get("https://a.example/") is not None
+
+    @patch("src.interrogate.robots.time.monotonic")
+    def test_expires_relative_to_date(self, mock_monotonic):
+        cache = RobotsCache(ttl=10)
+        mock_monotonic.return_value = 0.0
+        cache.put(
+            "https://a.example/",
+            {},
+            {
+                "Date": "Mon, 01 Jan 2024 00:00:00 GMT",
+                "Expires": "Mon, 01 Jan 2024 00:02:00 GMT",
+            },
+        )
+
+        mock_monotonic.return_value = 100.0
+        assert cache.get("https://a.example/") is not None
+        mock_monotonic.return_value = 121.0
+        assert cache.get("https://a.example/") is None
+
+    def test_no_store_not_cached(self):
+        cache = RobotsCache()
+
+        cache.put("https://a.example/", {}, {"Cache-Control": "no-store"})
+        cache.put("https://b.example/", {}, {"Cache-Control": "max-age=0"})
+
+        assert len(cache) == 0
+
+    @patch("src.interrogate.robots.time.monotonic")
+    def test_max_ttl_caps_lifetime(self, mock_monotonic):
+        cache = RobotsCache(max_ttl=100)
+        mock_monotonic.return_value = 0.0
+        cache.put("https://a.example/", {}, {"Cache-Control": "max-age=99999"})
+
+        mock_monotonic.return_value = 101.0
+        assert cache.get("https://a.example/") is None
+
+    def test_lru_eviction(self):
+        cache = RobotsCache(max_entries=2)
+        cache.put("https://a.example/", {"site": "a"})
+        cache.put("https://b.example/", {"site": "b"})
+        cache.get("https://a.example/")  # a becomes most recently used
+
+        cache.put("https://c.example/", {"site": "c"})
+
+        assert cache.get("https://b.example/") is None
+        assert cache.get("https://a.example/") == {"site": "a"}
+        assert cache.get("https://c.example/") == {"site": "c"}
+
+
+class TestParseRobotsTxt:
+    def test_parse_fields(self):
+        result = parse_robots_txt(
+            "User-agent: *\nDisallow: /a\nDisallow: /a\nCrawl-delay: 2\n"
+            "Sitemap: https://example.com/sitemap.xml\n"
+        )
+
+        assert result["disallowed"] == ["/a"]
+        assert result["crawl_delay"] == 2.0
+        assert result["sitemaps"] == ["https://example.com/sitemap.xml"]
+        assert result["user_agents"] == ["*"]
+
+    def test_sitemap_url_keeps_case(self):
+        result = parse_robots_txt("SITEMAP: https://example.com/Sitemaps/Index.xml\n")
+
+        assert result["sitemaps"] == ["https://example.com/Sitemaps/Index.xml"]
+
+
+class TestRobotsTxtParser:
+    def test_lines_split_across_chunks(self):
+        body = (
+            "User-agent: *\r\nDisallow: /caf\u00e9\r\nSitemap: https://a.example/S.xml"
+        )
+        parser = RobotsTxtParser()
+        for i in range(0, len(body.encode()), 3):
+            parser.feed(body.encode()[i : i + 3])
+
+        result = parser.close()
+
+        assert result["disallowed"] == ["/caf\u00e9"]
+        assert result["sitemaps"] == ["https://a.example/S.xml"]
+        assert result["raw"] == body
+        assert "truncated" not in result
+
+    def test_cap_drops_cut_line(self):
+        parser = RobotsTxtParser(max_size=30)
+
+        assert parser.feed(b"User-agent: *\nDisallow: /x\n")
+        assert not parser.feed(b"Disallow: /secret-area\n")
+        result = parser.close()
+
+        assert parser.size == 30
+        assert result["disallowed"] == ["/x"]
+        assert result["raw"] == "User-agent: *\nDisallow: /x\n"
+        assert result["truncated"] is True
+
+
+class TestRobotsOutput:
+    def test_raw_truncated(self):
+        robots_info = {"disallowed": [], "raw": "x" * 100}
+
+        output = robots_output(robots_info, raw_limit=10)
+
+        assert output["raw"] == "x" * 10
+        assert output["raw_truncated"] is True
+        assert robots_info["raw"] == "x" * 100  # The cached copy is untouched
+
+    def test_raw_dropped_or_kept(self):
+        robots_info = {"disallowed": [], "raw": "x" * 100}
+
+        assert "raw" not in robots_output(robots_info, raw_limit=0)
+        assert robots_output(robots_info, raw_limit=None) is robots_info
+        assert robots_output(robots_info, raw_limit=100) is robots_info
+
+
+class TestFetchRobotsTxtAsync:
+    def _fetch(self, handler, cache=None):
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await fetch_robots_txt_async(
+                    "https://example.com/page", client, cache=cache
+                )
+
+        return asyncio.run(run())
+
+    def test_robots_cached(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, text="user-agent: *\ndisallow: /private")
+
+        cache = RobotsCache()
+        self._fetch(handler, cache)
+        result = self._fetch(handler, cache)
+
+        assert "/private" in result["disallowed"]
+        assert len(calls) == 1
+        assert cache.hits == 1
+
+    def test_concurrent_misses_fetch_once(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, text="user-agent: *\ndisallow: /private")
+
+        cache = RobotsCache()
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await asyncio.gather(
+                    *(
+                        fetch_robots_txt_async(
+                            f"https://example.com/{n}", client, cache=cache
+                        )
+                        for n in range(8)
+                    )
+                )
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert all(result == results[0] for result in results)
+        assert cache._fetching_async == {}
+
+    def test_concurrent_misses_share_failed_fetch(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(0.05)
+            return httpx.Response(503)
+
+        cache = RobotsCache()
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await asyncio.gather(
+                    *(
+                        fetch_robots_txt_async(
+                            f"https://example.com/{n}",
+                            client,
+                            cache=cache,
+                            policy=RetryPolicy(attempts=1),
+                        )
+                        for n in range(8)
+                    )
+                )
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert all("status 503" in result["error"] for result in results)
+        assert cache._fetching_async == {}
+
+    def test_robots_success(self):
+        def handler(request):
+            assert request.url == "https://example.com/robots.txt"
+            return httpx.Response(200, text="user-agent: *\ndisallow: /private")
+
+        result = self._fetch(handler)
+
+        assert "/private" in result["disallowed"]
+
+    def test_robots_404(self):
+        result = self._fetch(lambda request: httpx.Response(404))
+
+        assert "not found (status 404)" in result["error"]
+
+    @patch("src.interrogate.utils.asyncio.sleep", new_callable=AsyncMock)
+    def test_robots_connection_error(self, mock_sleep):
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        result = self._fetch(handler)
+
+        assert "Failed to fetch robots.txt" in result["error"]
+
+    def test_robots_capped(self):
+        def handler(request):
+            return httpx.Response(
+                200, content=b"User-agent: *\n" + b"Disallow: /x\n" * 10**5
+            )
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await fetch_robots_txt_async(
+                    "https://example.com/page", client, max_size=1024
+                )
+
+        result = asyncio.run(run())
+
+        assert result["truncated"] is True
+        assert len(result["raw"]) <= 1024
+        assert result["disallowed"] == ["/x"]
@@ -0,0 +1,139 @@
+import pytest
+
+from src.interrogate.robots_rules import (
+    RobotsRules,
+    _CompiledCache,
+    compile_robots_txt,
+    product_token,
+    robots_rules,
+)
+
+UA = "Interrogate/1.0 (+https://github.com/inkyvoxel/interrogate)"
+
+
+def allowed(raw, path, user_agent=UA):
+    return compile_robots_txt(raw).is_allowed(user_agent, path)
+
+
+class TestProductToken:
+    def test_product_token(self):
+        assert product_token(UA) == "interrogate"
+        assert product_token(" Googlebot-News/2.1") == "googlebot-news"
+        assert product_token("*") == "*"
+
+
+class TestLongestMatch:
+    @pytest.mark.parametrize(
+        "rules, path, expected",
+        [
+            ("Allow: /p\nDisallow: /", "/page", True),
+            ("Allow: /folder\nDisallow: /folder", "/folder/page", True),
+            ("Allow: /page\nDisallow: /*.htm", "/page.htm", False),
+            ("Allow: /$\nDisallow: /", "/", True),
+            ("Allow: /$\nDisallow: /", "/page", False),
+            ("Disallow: /*.php$", "/index.php", False),
+            ("Disallow: /*.php$", "/index.php?lang=en", True),
+            ("Disallow: /*.php$", "/index.php5", True),
+            ("Disallow: /fish*.php", "/fishheads/catfish.php?id=1", False),
+            ("Disallow: /*?sessionid=", "/cart?sessionid=1", False),
+            ("Disallow: /**/private", "/a/b/private", False),
+            ("Disallow: /Private", "/private", True),
+            ("Disallow: /café", "/caf%C3%A9/menu", False),
+            ("Disallow:", "/anything", True),
+            ("Disallow: /", "/robots.txt", True),
+            ("Disallow: //x", "//x/page?q=1", False),
+            ("Disallow: /abc\nAllow: /ab", "/abd", True),
+            ("Disallow: /abc\nAllow: /ab", "/abcd", False),
+            ("Allow: /abcdef\nDisallow: /abc", "/abcde", False),
+            ("Allow: /abc$\nDisallow: /a", "/abc", True),
+            ("Allow: /abc$\nDisallow: /a", "/ab", False),
+            ("Disallow: /page", "//x/page", True),
+        ],
+    )
+    def test_rules(self, rules, path, expected):
+        assert allowed(f"User-agent: *\n{rules}\n", path) is expected
+
+
+class TestGroups:
+    RAW = (
+        "# Example\n"
+        "User-agent: googlebot\n"
+        "Disallow: /\n"
+        "\n"
+        "User-agent: Interrogate\n"
+        "User-agent: otherbot\n"
+        "Disallow: /private  # comment\n"
+        "Crawl-delay: 5\n"
+        "\n"
+        "User-agent: *\n"
+        "Disallow: /everyone\n"
+        "Sitemap: https://a.example/Sitemap.xml\n"
+    )
+
+    def test_own_group_is_used(self):
+        rules = compile_robots_txt(self.RAW)
+
+        assert not rules.is_allowed(UA, "https://a.example/private/x")
+        assert rules.is_allowed(UA, "https://a.example/everyone")
+        assert rules.is_allowed("otherbot", "/everyone")
+        assert rules.crawl_delay(UA) == 5.0
+        assert rules.sitemaps == ["https://a.example/Sitemap.xml"]
+
+    def test_falls_back_to_star_group(self):
+        rules = compile_robots_txt(self.RAW)
+
+        assert not rules.is_allowed("SomeBot/2.0", "https://a.example/everyone?q=1")
+        assert rules.is_allowed("SomeBot/2.0", "https://a.example/private")
+        assert rules.crawl_delay("SomeBot/2.0") is None
+
+    def test_groups_for_same_agent_are_merged(self):
+        raw = "User-agent: a\nDisallow: /x\n\nUser-agent: b\nDisallow: /y\n\nUser-agent: a\nDisallow: /z\n"
+        rules = compile_robots_txt(raw)
+
+        assert not rules.is_allowed("a", "/x")
+        assert not rules.is_allowed("a", "/z")
+        assert rules.is_allowed("a", "/y")
+
+    def test_no_matching_group_allows_everything(self):
+        assert allowed("User-agent: googlebot\nDisallow: /\n", "/page")
+
+    def test_rules_before_any_user_agent_are_ignored(self):
+        assert allowed("Disallow: /\nUser-agent: *\nDisallow: /x\n", "/page")
+
+
+class TestRobotsRules:
+    def test_from_robots_info(self):
+        rules = robots_rules({"raw": "User-agent: *\nDisallow: /x\n"})
+
+        assert rules is not None
+        assert not rules.is_allowed(UA, "/x")
+        assert robots_rules({"error": "robots.txt not found (status 404)"}) is None
+
+    def test_compiled_once_per_content(self):
+        raw = "User-agent: *\nDisallow: /once\n"
+
+        assert compile_robots_txt(raw) is compile_robots_txt(raw)
+
+    def test_cache_bounded_by_size(self):
+        cache = _CompiledCache(max_entries=10, max_chars=10)
+        rules = RobotsRules({}, [])
+        cache.put("a" * 6, rules)
+        cache.put("b" * 6, rules)
+        cache.put("c" * 11, rules)
+
+        assert cache.get("a" * 6) is None
+        assert cache.get("b" * 6) is rules
+        assert cache.get("c" * 11) is None
+        assert cache.chars == 6
+
+    def test_many_rules(self):
+        raw = "User-agent: *\n" + "".join(
+            f"Disallow: /section{i}/\nAllow: /section{i}/open*.html$\n"
+            for i in range(5000)
+        )
+        rules = compile_robots_txt(raw)
+
+        assert not rules.is_allowed(UA, "/section4999/page")
+        assert rules.is_allowed(UA, "/section4999/open-1.html")
+        assert not rules.is_allowed(UA, "/section4999/open-1.html?x")
+        assert rules.is_allowed(UA, "/section5000/page")
@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+from src.interrogate.scheduler import HostScheduler
+
+
+class TestHostScheduler:
+    @patch("src.interrogate.scheduler.time.monotonic")
+    def test_first_request_is_free(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        scheduler = HostScheduler()
+
+        assert scheduler.reserve("https://a.example:443", 5.0) == 0.0
+        assert scheduler.ready_at("https://a.example:443") == 105.0
+
+    @patch("src.interrogate.scheduler.time.monotonic")
+    def test_consecutive_requests_are_spaced(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        scheduler = HostScheduler()
+
+        waits = [scheduler.reserve("https://a.example:443", 5.0) for _ in range(3)]
+
+        assert waits == [0.0, 5.0, 10.0]
+
+    @patch("src.interrogate.scheduler.time.monotonic")
+    def test_hosts_are_independent(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        scheduler = HostScheduler()
+        scheduler.reserve("https://a.example:443", 30.0)
+
+        assert scheduler.reserve("https://b.example:443", 30.0) == 0.0
+        assert scheduler.ready_at("https://c.example:443") == 0.0
+
+    @patch("src.interrogate.scheduler.time.monotonic")
+    def test_slot_reopens_after_delay(self, mock_monotonic):
+        scheduler = HostScheduler()
+        mock_monotonic.return_value = 100.0
+        scheduler.reserve("https://a.example:443", 5.0)
+
+        mock_monotonic.return_value = 107.0
+        assert scheduler.reserve("https://a.example:443", 5.0) == 0.0
+
+    @patch("src.interrogate.scheduler.time.monotonic")
+    def test_prunes_expired_hosts(self, mock_monotonic):
+        scheduler = HostScheduler(max_hosts=2)
+        mock_monotonic.return_value = 100.0
+        scheduler.reserve("https://a.example:443", 1.0)
+        scheduler.reserve("https://b.example:443", 1.0)
+
+        mock_monotonic.return_value = 200.0
+        scheduler.reserve("https://c.example:443", 1.0)
+
+        assert len(scheduler) == 1
+
+    @patch("src.interrogate.scheduler.time.monotonic")
+    def test_defer_holds_host_back(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        scheduler = HostScheduler()
+        scheduler.reserve("https://a.example:443", 5.0)
+
+        scheduler.defer("https://a.example:443", 30.0)
+        scheduler.defer("https://a.example:443", 1.0)
+
+        assert scheduler.ready_at("https://a.example:443") == 130.0
+        assert scheduler.reserve("https://a.example:443", 5.0) == 30.0
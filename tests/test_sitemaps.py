@@ -0,0 +1,238 @@
+import gzip
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from src.interrogate.sitemaps import (
+    iter_site_urls,
+    iter_sitemap_urls,
+    parse_sitemap,
+    _open_sitemap,
+)
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(*locs):
+    entries = "".join(
+        f"<url><loc>{loc}</loc><priority>0.5</priority></url>" for loc in locs
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{entries}</urlset>'.encode()
+
+
+def sitemap_index(*locs):
+    entries = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs)
+    return f"<sitemapindex {NS}>{entries}</sitemapindex>".encode()
+
+
+def chunked(data, size=7):
+    return iter([data[i : i + size] for i in range(0, len(data), size)])
+
+
+def fake_session(sitemaps):
+    """A session serving {url: body} in small chunks, 404 for anything else."""
+
+    def get(url, **kwargs):
+        response = MagicMock()
+        response.status_code = 200 if url in sitemaps else 404
+        response.iter_content.return_value = chunked(sitemaps.get(url, b""))
+        return response
+
+    session = MagicMock()
+    session.get.side_effect = get
+    return session
+
+
+class TestParseSitemap:
+    def test_urlset(self):
+        stream = _open_sitemap(
+            chunked(urlset("https://a.example/1", "https://a.example/2")), 10**6
+        )
+
+        assert list(parse_sitemap(stream)) == [
+            ("url", "https://a.example/1"),
+            ("url", "https://a.example/2"),
+        ]
+
+    def test_index_without_namespace(self):
+        body = b"<sitemapindex><sitemap><loc> https://a.example/s.xml </loc></sitemap></sitemapindex>"
+        stream = _open_sitemap(chunked(body), 10**6)
+
+        assert list(parse_sitemap(stream)) == [("sitemap", "https://a.example/s.xml")]
+
+    def test_gzip(self):
+        body = gzip.compress(urlset(*(f"https://a.example/{i}" for i in range(1000))))
+        stream = _open_sitemap(chunked(body, 512), 10**6)
+
+        locs = [loc for _, loc in parse_sitemap(stream)]
+
+        assert len(locs) == 1000
+        assert locs[-1] == "https://a.example/999"
+
+    def test_entities_are_not_expanded(self):
+        body = (
+            b'<!DOCTYPE urlset [<!ENTITY x SYSTEM "file:///etc/passwd">]>'
+            b"<urlset><url><loc>&x;</loc></url></urlset>"
+        )
+
+        assert list(parse_sitemap(_open_sitemap(chunked(body), 10**6))) == []
+
+
+class TestIterSitemapUrls:
+    def test_follows_index_once(self):
+        session = fake_session(
+            {
+                "https://a.example/index.xml": sitemap_index(
+                    "/pages.xml.gz", "https://a.example/posts.xml", "/pages.xml.gz"
+                ),
+                "https://a.example/pages.xml.gz": gzip.compress(
+                    urlset("https://a.example/p1", "https://a.example/p2")
+                ),
+                "https://a.example/posts.xml": urlset("https://a.example/post"),
+            }
+        )
+
+        urls = list(iter_sitemap_urls(["https://a.example/index.xml"], session=session))
+
+        assert urls == [
+            "https://a.example/p1",
+            "https://a.example/p2",
+            "https://a.example/post",
+        ]
+        assert session.get.call_count == 3
+
+    def test_urls_are_streamed(self):
+        session = fake_session(
+            {"https://a.example/s.xml": urlset("https://a.example/1")}
+        )
+
+        urls = iter_sitemap_urls(["https://a.example/s.xml"], session=session)
+
+        assert session.get.call_count == 0
+        assert next(urls) == "https://a.example/1"
+        assert session.get.call_count == 1
+
+    def test_max_depth(self):
+        session = fake_session(
+            {
+                "https://a.example/index.xml": sitemap_index("/nested.xml"),
+                "https://a.example/nested.xml": sitemap_index("/pages.xml"),
+                "https://a.example/pages.xml": urlset("https://a.example/1"),
+            }
+        )
+
+        urls = list(
+            iter_sitemap_urls(
+                ["https://a.example/index.xml"], session=session, max_depth=1
+            )
+        )
+
+        assert urls == []
+        assert session.get.call_count == 2
+
+    def test_errors_are_reported_and_skipped(self):
+        session = fake_session(
+            {
+                "https://a.example/broken.xml": b"<urlset><url><loc>https://a.example/1</loc></url><url>",
+                "https://a.example/big.xml": urlset(
+                    *(f"https://a.example/{i}" for i in range(100))
+                ),
+                "https://a.example/ok.xml": urlset("https://a.example/ok"),
+            }
+        )
+        errors = []
+
+        urls = list(
+            iter_sitemap_urls(
+                [
+                    "https://a.example/missing.xml",
+                    "https://a.example/broken.xml",
+                    "https://a.example/big.xml",
+                    "https://a.example/ok.xml",
+                ],
+                session=session,
+                max_bytes=1000,
+                on_error=lambda url, message: errors.append((url, message)),
+            )
+        )
+
+        assert urls[0] == "https://a.example/1"
+        assert urls[-1] == "https://a.example/ok"
+        assert [url for url, _ in errors] == [
+            "https://a.example/missing.xml",
+            "https://a.example/broken.xml",
+            "https://a.example/big.xml",
+        ]
+        assert "status 404" in errors[0][1]
+        assert "larger than 1000 bytes" in errors[2][1]
+
+    def test_bad_gzip_is_skipped(self):
+        body = gzip.compress(urlset(*(f"https://a.example/{i}" for i in range(200))))
+        corrupt = body[:20] + bytes(b ^ 0xFF for b in body[20:40]) + body[40:]
+        session = fake_session(
+            {
+                "https://a.example/truncated.xml.gz": body[: len(body) // 2],
+                "https://a.example/corrupt.xml.gz": corrupt,
+                "https://a.example/ok.xml": urlset("https://a.example/ok"),
+            }
+        )
+        errors = []
+
+        urls = list(
+            iter_sitemap_urls(
+                [
+                    "https://a.example/truncated.xml.gz",
+                    "https://a.example/corrupt.xml.gz",
+                    "https://a.example/ok.xml",
+                ],
+                session=session,
+                on_error=lambda url, message: errors.append(url),
+            )
+        )
+
+        assert urls[-1] == "https://a.example/ok"
+        assert errors == [
+            "https://a.example/truncated.xml.gz",
+            "https://a.example/corrupt.xml.gz",
+        ]
+
+    @patch("src.interrogate.utils.time.sleep")
+    def test_connection_error_is_skipped(self, mock_sleep):
+        session = MagicMock()
+        session.get.side_effect = requests.ConnectionError("refused")
+        errors = []
+
+        urls = list(
+            iter_sitemap_urls(
+                ["https://a.example/s.xml"],
+                session=session,
+                on_error=lambda url, message: errors.append(url),
+            )
+        )
+
+        assert urls == []
+        assert errors == ["https://a.example/s.xml"]
+
+
+class TestIterSiteUrls:
+    @patch("src.interrogate.sitemaps.fetch_robots_txt")
+    def test_uses_robots_sitemaps(self, mock_robots):
+        mock_robots.return_value = {"sitemaps": ["https://a.example/Sitemap.xml"]}
+        session = fake_session(
+            {"https://a.example/Sitemap.xml": urlset("https://a.example/1")}
+        )
+
+        assert list(iter_site_urls("https://a.example/", session=session)) == [
+            "https://a.example/1"
+        ]
+
+    @patch("src.interrogate.sitemaps.fetch_robots_txt")
+    def test_falls_back_to_sitemap_xml(self, mock_robots):
+        mock_robots.return_value = {"error": "robots.txt not found (status 404)"}
+        session = fake_session(
+            {"https://a.example/sitemap.xml": urlset("https://a.example/1")}
+        )
+
+        assert list(iter_site_urls("https://a.example/blog/", session=session)) == [
+            "https://a.example/1"
+        ]
@@ -0,0 +1,125 @@
+import sqlite3
+
+import pytest
+
+from src.interrogate.sqlite_sink import SQLiteSink
+
+ROBOTS = {
+    "disallowed": ["/private"],
+    "sitemaps": ["https://a.example/sitemap.xml"],
+    "crawl_delay": 2.0,
+    "user_agents": ["*"],
+    "raw": "User-agent: *\nDisallow: /private\n",
+}
+
+
+def record(url, technologies=(), **extra):
+    return {
+        "url": url,
+        "status_code": 200,
+        "final_url": url,
+        "technologies": [{"name": name, "version": "1"} for name in technologies],
+        "headers": {"Server": "nginx"},
+        "robots_txt": ROBOTS,
+        **extra,
+    }
+
+
+def query(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+class TestSQLiteSink:
+    def test_normalized_tables(self, tmp_path):
+        path = str(tmp_path / "results.db")
+        with SQLiteSink(path, source="urls.txt") as sink:
+            sink.write(record("https://a.example/", ["nginx", "WordPress"], depth=0))
+            sink.write(record("https://a.example/x", timings={"total": 1.5}))
+            sink.write({"url": "https://b.example/", "error": "Timed out"})
+
+        assert query(path, "SELECT source, records FROM scans") == [("urls.txt", 3)]
+        assert query(
+            path, "SELECT url, origin, status_code, error, depth, timings FROM urls"
+        ) == [
+            ("https://a.example/", "https://a.example:443", 200, None, 0, None),
+            (
+                "https://a.example/x",
+                "https://a.example:443",
+                200,
+                None,
+                None,
+                '{"total": 1.5}',
+            ),
+            (
+                "https://b.example/",
+                "https://b.example:443",
+                None,
+                "Timed out",
+                None,
+                None,
+            ),
+        ]
+        assert query(path, "SELECT name FROM technologies ORDER BY name") == [
+            ("WordPress",),
+            ("nginx",),
+        ]
+        assert query(
+            path, "SELECT url, name, value FROM headers WHERE url LIKE '%/x'"
+        ) == [("https://a.example/x", "Server", "nginx")]
+        assert query(path, "SELECT origin, crawl_delay FROM robots") == [
+            ("https://a.example:443", 2.0)
+        ]
+        assert query(path, "SELECT kind, value FROM robots_entries ORDER BY kind") == [
+            ("disallow", "/private"),
+            ("sitemap", "https://a.example/sitemap.xml"),
+            ("user_agent", "*"),
+        ]
+
+    def test_unparseable_url(self, tmp_path):
+        path = str(tmp_path / "results.db")
+        with SQLiteSink(path) as sink:
+            sink.write({"url": "http://h:99999/", "error": "Port out of range 0-65535"})
+            sink.write(record("https://a.example/"))
+
+        assert query(path, "SELECT url, origin FROM urls ORDER BY url") == [
+            ("http://h:99999/", None),
+            ("https://a.example/", "https://a.example:443"),
+        ]
+
+    def test_rerun_upserts(self, tmp_path):
+        path = str(tmp_path / "results.db")
+        with SQLiteSink(path) as sink:
+            sink.write(record("https://a.example/", ["nginx", "WordPress"]))
+        with SQLiteSink(path) as sink:
+            sink.write(record("https://a.example/", ["nginx"], status_code=304))
+
+        assert query(path, "SELECT scan_id, status_code FROM urls") == [(2, 304)]
+        assert query(path, "SELECT name FROM technologies") == [("nginx",)]
+        assert query(path, "SELECT count(*) FROM robots_entries") == [(3,)]
+        assert query(path, "SELECT count(*) FROM scans") == [(2,)]
+
+    def test_batches_by_count(self, tmp_path):
+        path = str(tmp_path / "results.db")
+        sink = SQLiteSink(path, flush_every=2, flush_interval=60)
+        sink.write(record("https://a.example/1"))
+
+        assert query(path, "SELECT count(*) FROM urls") == [(0,)]
+        sink.write(record("https://a.example/2"))
+        assert query(path, "SELECT count(*) FROM urls") == [(2,)]
+        sink.close()
+
+    def test_projection(self, tmp_path):
+        path = str(tmp_path / "results.db")
+        with SQLiteSink(path, fields=["status_code"]) as sink:
+            sink.write(record("https://a.example/", ["nginx"]))
+
+        assert query(path, "SELECT status_code, final_url FROM urls") == [(200, None)]
+        assert query(path, "SELECT count(*) FROM technologies") == [(0,)]
+
+    def test_invalid_flush_every(self, tmp_path):
+        with pytest.raises(ValueError):
+            SQLiteSink(str(tmp_path / "results.db"), flush_every=0)
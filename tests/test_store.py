@@ -0,0 +1,63 @@
+from src.interrogate.store import (
+    StoredPage,
+    StoredRobots,
+    ValidatorStore,
+    conditional_headers,
+)
+
+
+class TestConditionalHeaders:
+    def test_none(self):
+        assert conditional_headers(None) == {}
+
+    def test_both_validators(self):
+        stored = StoredRobots('"abc"', "Mon, 01 Jan 2024 00:00:00 GMT", {})
+
+        assert conditional_headers(stored) == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+        }
+
+
+class TestValidatorStore:
+    def test_robots_round_trip(self, tmp_path):
+        path = str(tmp_path / "store.db")
+        with ValidatorStore(path) as store:
+            store.put_robots(
+                "https://example.com:443", {"ETag": '"v1"'}, {"disallowed": ["/a"]}
+            )
+
+        with ValidatorStore(path) as store:
+            stored = store.get_robots("https://example.com:443")
+
+        assert stored == StoredRobots('"v1"', None, {"disallowed": ["/a"]})
+
+    def test_robots_without_validator_not_stored(self, tmp_path):
+        with ValidatorStore(str(tmp_path / "store.db")) as store:
+            store.put_robots("https://example.com:443", {}, {"disallowed": []})
+
+            assert store.get_robots("https://example.com:443") is None
+
+    def test_page_round_trip(self, tmp_path):
+        headers = {"last-modified": "Mon, 01 Jan 2024 00:00:00 GMT", "Server": "nginx"}
+        with ValidatorStore(str(tmp_path / "store.db")) as store:
+            store.put_page(
+                "https://example.com", 200, "https://example.com/", headers, b"<html>"
+            )
+
+            stored = store.get_page("https://example.com")
+
+        assert stored == StoredPage(
+            None,
+            "Mon, 01 Jan 2024 00:00:00 GMT",
+            200,
+            "https://example.com/",
+            headers,
+            b"<html>",
+        )
+
+    def test_non_200_page_not_stored(self, tmp_path):
+        with ValidatorStore(str(tmp_path / "store.db")) as store:
+            store.put_page("https://example.com", 404, "x", {"ETag": '"v"'}, b"")
+
+            assert store.get_page("https://example.com") is None
@@ -1,4 +1,12 @@
-from src.interrogate.tech_detector import detect_technologies
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.interrogate.tech_detector import (
+    HTML_PARSERS,
+    IncrementalDetector,
+    detect_technologies,
+)
+from src.interrogate.timings import Timings
 
 
 class TestDetectTechnologies:
@@ -432,3 +440,182 @@ class TestDetectTechnologies:
         robots_txt = {"disallowed": ["/"]}
         techs = detect_technologies(headers, body, robots_txt)
         assert techs == []
+
+    def test_server_first_match_wins(self):
+        headers = {"Server": "Apache Tomcat/9.0.1"}
+        techs = detect_technologies(headers, "")
+        assert techs == [{"name": "Tomcat", "version": "9.0.1"}]
+
+    def test_meta_generator_without_version_is_not_reported(self):
+        headers = {}
+        body = '<html><meta name="generator" content="WordPress"></html>'
+        techs = detect_technologies(headers, body)
+        names = [tech["name"] for tech in techs]
+        assert names == ["WordPress"]  # Only from the body fallback
+        assert techs[0]["version"] is None
+
+    def test_next_data_marker_attributes_scripts_to_react(self):
+        headers = {}
+        body = (
+            '<html><script id="__NEXT_DATA__">{"version":"13.4.0"}</script>'
+            '<script src="/static/chunks/main.js"></script>'
+            "<!-- __next_data__ --></html>"
+        )
+        techs = detect_technologies(headers, body)
+        assert {"name": "React", "version": "13.4.0"} in techs
+
+    def test_script_matches_only_first_signature(self):
+        headers = {}
+        body = '<html><script src="/jquery-3.6.0/vue@3.2.0.js"></script></html>'
+        techs = detect_technologies(headers, body)
+        assert {"name": "jQuery", "version": "3.6.0"} in techs
+        assert {"name": "Vue.js", "version": "3.2.0"} not in techs
+
+    def test_facebook_script_requires_fbevents(self):
+        headers = {}
+        body = (
+            '<html><script src="https://connect.facebook.net/sdk.js"></script></html>'
+        )
+        techs = detect_technologies(headers, body)
+        assert {"name": "Facebook Pixel", "version": None} not in techs
+
+    def test_body_pair_on_same_line(self):
+        headers = {}
+        body = "google tag manager and analytics\nfacebook\npixel"
+        techs = detect_technologies(headers, body)
+        names = [tech["name"] for tech in techs]
+        assert "Google Analytics" in names
+        assert "Facebook Pixel" not in names  # Split across lines
+
+    def test_body_pair_within_word(self):
+        headers = {}
+        body = "googleanalytics facebookpixel"
+        techs = detect_technologies(headers, body)
+        names = [tech["name"] for tech in techs]
+        assert names == ["Google Analytics", "Facebook Pixel"]
+
+    def test_body_results_in_registry_order(self):
+        headers = {}
+        body = "prestashop hotjar django jquery"
+        techs = detect_technologies(headers, body)
+        names = [tech["name"] for tech in techs]
+        assert names == ["jQuery", "Django", "Hotjar", "PrestaShop"]
+
+    @pytest.mark.parametrize("html_parser", HTML_PARSERS)
+    def test_html_parsers_agree(self, html_parser):
+        headers = {}
+        body = (
+            "<!DOCTYPE html><html><head>"
+            '<META NAME="Generator" CONTENT="Drupal 9.5">'
+            '<script src="https://code.jquery.com/jquery-3.6.0.min.js"></script>'
+            "<!-- <script src='/vue@3.2.0.js'></script> -->"
+            '<script>document.write("<script src=/angular@1.8.0.js>")</script>'
+            '</head><body><script src="/bootstrap/5.3.0/bootstrap.js"></script>'
+            "</body></html>"
+        )
+        techs = detect_technologies(headers, body, html_parser=html_parser)
+        assert techs == [
+            {"name": "Drupal", "version": "9.5"},
+            {"name": "jQuery", "version": "3.6.0"},
+            {"name": "Bootstrap", "version": "5.3.0"},
+            {"name": "Vue.js", "version": None},
+            {"name": "Angular", "version": None},
+        ]
+
+    def test_fast_parser_limits_scripts(self):
+        headers = {}
+        body = (
+            "<html>"
+            + '<script src="/app.js"></script>' * 30
+            + '<script src="/hotjar.js"></script></html>'
+        )
+        techs = detect_technologies(headers, body)
+        assert techs == [{"name": "Hotjar", "version": None}]  # Only from the body
+
+    def test_unknown_html_parser(self):
+        with pytest.raises(ValueError, match="Unknown HTML parser"):
+            detect_technologies({}, "", html_parser="dom")
+
+    def test_concurrent_detection_is_consistent(self):
+        pages = [
+            '<html><meta name="generator" content="WordPress 6.4"></html>',
+            "<html><script src='/jquery-3.7.1.min.js'></script>gtag</html>",
+            "<html><script src='/vue.min.js'></script>facebook pixel</html>",
+        ]
+        expected = [detect_technologies({"Server": "nginx"}, page) for page in pages]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda page: detect_technologies({"Server": "nginx"}, page),
+                    pages * 100,
+                )
+            )
+
+        assert results == expected * 100
+
+    def test_timings_recorded(self):
+        timings = Timings()
+        body = '<html><meta name="generator" content="WordPress 6.4"></html>'
+        techs = detect_technologies({"Server": "nginx"}, body, timings=timings)
+        result = timings.as_dict()
+        assert {"name": "WordPress", "version": "6.4"} in techs
+        assert result["html_parse"] > 0
+        assert result["signature_match"] > 0
+
+
+class TestIncrementalDetector:
+    PAGE = (
+        "<!DOCTYPE html><html><head>"
+        '<meta name="generator" content="WordPress 6.4">'
+        '<script src="https://code.jquery.com/jquery-3.7.1.min.js"></script>'
+        "</head><body>" + "filler " * 2000 + "shopify</body></html>"
+    ).encode()
+
+    def _feed(self, detector, data, chunk_size):
+        read = b""
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start : start + chunk_size]
+            read += chunk
+            if detector.feed(chunk):
+                break
+        return read
+
+    def test_matches_one_shot_detection(self):
+        detector = IncrementalDetector(head_budget=len(self.PAGE))
+        read = self._feed(detector, self.PAGE, 7)
+        body = read.decode("utf-8", errors="ignore")
+
+        assert read == self.PAGE
+        assert detector.detect({}, body) == detect_technologies({}, body)
+
+    def test_stops_after_head_budget(self):
+        detector = IncrementalDetector(head_budget=100)
+        read = self._feed(detector, self.PAGE, 64)
+        head_end = self.PAGE.index(b"</head>")
+
+        assert head_end + 100 <= len(read) < head_end + 100 + 2 * 64
+        techs = detector.detect({}, read.decode("utf-8", errors="ignore"))
+        assert {"name": "WordPress", "version": "6.4"} in techs
+        assert {"name": "jQuery", "version": "3.7.1"} in techs
+        assert {"name": "Shopify", "version": None} not in techs
+
+    def test_head_end_split_across_chunks(self):
+        detector = IncrementalDetector(head_budget=0)
+
+        assert detector.feed(b"<html><head></he") is False
+        assert detector.feed(b"ad><body>") is True
+
+    def test_multibyte_characters_split_across_chunks(self):
+        data = '<html><head><meta name="generator" content="Wix – café"></head>'
+        encoded = data.encode()
+        detector = IncrementalDetector()
+        self._feed(detector, encoded, 1)
+
+        assert detector.detect({}, data) == [{"name": "Wix", "version": None}]
+
+    def test_no_head_reads_everything(self):
+        detector = IncrementalDetector(head_budget=0)
+        read = self._feed(detector, b"plain text " * 100, 10)
+
+        assert len(read) == 1100
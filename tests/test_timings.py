@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+from src.interrogate.timings import PHASES, Timings, TimingsSummary, measure
+
+
+class TestTimings:
+    def test_every_phase_reported(self):
+        result = Timings().as_dict()
+
+        assert list(result) == [*PHASES, "total"]
+        assert all(value >= 0 for value in result.values())
+
+    def test_repeated_phase_is_summed(self):
+        timings = Timings()
+        timings.add("ttfb", 0.25)
+        timings.add("ttfb", 0.5)
+
+        assert timings.as_dict()["ttfb"] == 750.0
+
+    @patch("src.interrogate.timings.time.perf_counter")
+    def test_measure_block(self, mock_clock):
+        mock_clock.side_effect = [0.0, 10.0, 10.5, 11.0]
+        timings = Timings()
+        with measure(timings, "download"):
+            pass
+
+        result = timings.as_dict()
+        assert result["download"] == 500.0
+        assert result["total"] == 11000.0
+
+    def test_measure_without_timings_is_noop(self):
+        with measure(None, "download"):
+            pass
+
+
+class TestTimingsSummary:
+    def test_aggregates_per_phase(self):
+        summary = TimingsSummary()
+        for value in [1.0, 2.0, 3.0, 4.0]:
+            summary.add({"ttfb": value})
+
+        result = summary.as_dict()
+
+        assert summary.count == 4
+        assert result["ttfb"] == {
+            "count": 4,
+            "total": 10.0,
+            "mean": 2.5,
+            "p50": 2.0,
+            "p95": 4.0,
+            "max": 4.0,
+        }
+
+    def test_sample_is_bounded(self):
+        summary = TimingsSummary(sample_size=10, seed=1)
+        for value in range(1000):
+            summary.add({"download": float(value)})
+
+        result = summary.as_dict()["download"]
+
+        assert len(summary._samples["download"]) == 10
+        assert result["count"] == 1000
+        assert result["max"] == 999.0
+        assert result["mean"] == 499.5
+
+    def test_empty(self):
+        assert TimingsSummary().as_dict() == {}
@@ -0,0 +1,112 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from src.interrogate.fetchers import fetch_url_info
+from src.interrogate.tech_detector import detect_technologies
+from src.interrogate.tracing import Tracer, get_tracer, set_tracer, span
+
+
+class RecordingTracer(Tracer):
+    def __init__(self):
+        self.started = []
+        self.ended = []
+
+    def on_start(self, span):
+        self.started.append(span.name)
+
+    def on_end(self, span):
+        self.ended.append(span)
+
+
+@pytest.fixture
+def tracer():
+    recorder = RecordingTracer()
+    set_tracer(recorder)
+    yield recorder
+    set_tracer(None)
+
+
+class TestSpan:
+    def test_no_tracer_is_noop(self):
+        assert get_tracer() is None
+        with span("stage", url="https://example.com") as current:
+            current.set("bytes", 10)
+
+    def test_span_reported(self, tracer):
+        with span("stage", url="https://Example.com:8080/page") as current:
+            current.set("bytes", 10)
+
+        (ended,) = tracer.ended
+        assert tracer.started == ["stage"]
+        assert ended.attributes == {
+            "url": "https://Example.com:8080/page",
+            "host": "example.com",
+            "bytes": 10,
+        }
+        assert ended.duration >= 0
+
+    def test_error_outcome(self, tracer):
+        with pytest.raises(RuntimeError):
+            with span("stage"):
+                raise RuntimeError("boom")
+
+        assert tracer.ended[0].attributes["outcome"] == "error"
+        assert tracer.ended[0].attributes["error"] == "RuntimeError: boom"
+
+    def test_set_tracer_none_restores_default(self, tracer):
+        set_tracer(None)
+        with span("stage"):
+            pass
+        assert tracer.ended == []
+
+
+class TestPipelineSpans:
+    @patch("src.interrogate.fetchers.requests.get")
+    @patch("src.interrogate.fetchers.time.sleep")
+    def test_fetch_emits_stage_spans(self, mock_sleep, mock_get, tracer):
+        mock_robots_response = MagicMock()
+        mock_robots_response.status_code = 200
+        mock_robots_response.iter_content.return_value = iter(
+            ["User-agent: *\nDisallow: /admin\n".encode()]
+        )
+        mock_503_response = MagicMock()
+        mock_503_response.status_code = 503
+        mock_main_response = MagicMock()
+        mock_main_response.status_code = 200
+        mock_main_response.url = "https://example.com/"
+        mock_main_response.headers = {"Server": "nginx"}
+        mock_main_response.iter_content.return_value = iter([b"<html>OK</html>"])
+        mock_get.side_effect = [
+            mock_robots_response,
+            mock_503_response,
+            mock_main_response,
+        ]
+
+        fetch_url_info("https://example.com/", include_body=True)
+
+        spans = {
+            (span.name, span.attributes.get("attempt")): span for span in tracer.ended
+        }
+        assert [span.name for span in tracer.ended] == [
+            "http.attempt",
+            "robots.fetch",
+            "http.attempt",
+            "http.attempt",
+            "body.read",
+            "detect.html_parse",
+            "detect.headers",
+            "detect.html",
+            "detect.body",
+        ]
+        assert spans[("http.attempt", 2)].attributes["outcome"] == 200
+        assert spans[("robots.fetch", None)].attributes["outcome"] == "ok"
+        assert spans[("body.read", None)].attributes["bytes"] == 15
+        assert spans[("body.read", None)].attributes["outcome"] == "complete"
+        assert spans[("body.read", None)].attributes["host"] == "example.com"
+        assert spans[("detect.headers", None)].attributes["matches"] == 1
+
+    def test_detection_results_unchanged(self, tracer):
+        body = '<html><meta name="generator" content="WordPress 6.4"></html>'
+        techs = detect_technologies({"Server": "nginx"}, body)
+        set_tracer(None)
+        assert techs == detect_technologies({"Server": "nginx"}, body)
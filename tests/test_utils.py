@@ -1,6 +1,13 @@
+import asyncio
 import re
-from unittest.mock import patch, MagicMock
-from src.interrogate.utils import retry_get, extract_version
+import httpx
+from unittest.mock import patch, AsyncMock, MagicMock
+from src.interrogate.utils import (
+    create_session,
+    retry_get,
+    retry_get_async,
+    extract_version,
+)
 
 
 class TestRetryGet:
@@ -47,6 +54,71 @@ class TestRetryGet:
         assert mock_get.call_count == 2
         mock_sleep.assert_called_once_with(2)
 
+    @patch("src.interrogate.utils.requests.get")
+    @patch("src.interrogate.utils.time.sleep")
+    def test_retry_get_uses_session(self, mock_sleep, mock_get):
+        session = MagicMock()
+        mock_429_response = MagicMock()
+        mock_429_response.status_code = 429
+        mock_200_response = MagicMock()
+        mock_200_response.status_code = 200
+        session.get.side_effect = [mock_429_response, mock_200_response]
+
+        result = retry_get(
+            "http://example.com", {"User-Agent": "test"}, session=session
+        )
+
+        assert result == mock_200_response
+        assert session.get.call_count == 2
+        mock_429_response.close.assert_called_once()
+        mock_get.assert_not_called()
+
+
+class TestCreateSession:
+    def test_pool_sizes(self):
+        session = create_session(pool_connections=3, pool_maxsize=7)
+
+        adapter = session.get_adapter("https://example.com")
+        assert adapter._pool_connections == 3
+        assert adapter._pool_maxsize == 7
+        assert session.get_adapter("http://example.com") is adapter
+        session.close()
+
+
+class TestRetryGetAsync:
+    def _get(self, responses):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return responses[len(calls) - 1]
+
+        async def run():
+            transport = httpx.MockTransport(handler)
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await retry_get_async(
+                    "http://example.com", {"User-Agent": "test"}, client=client
+                )
+
+        return asyncio.run(run()), calls
+
+    @patch("src.interrogate.utils.asyncio.sleep", new_callable=AsyncMock)
+    def test_success_first_try(self, mock_sleep):
+        response, calls = self._get([httpx.Response(200)])
+
+        assert response.status_code == 200
+        assert len(calls) == 1
+        assert calls[0].headers["User-Agent"] == "test"
+        mock_sleep.assert_not_awaited()
+
+    @patch("src.interrogate.utils.asyncio.sleep", new_callable=AsyncMock)
+    def test_retry_on_429(self, mock_sleep):
+        response, calls = self._get([httpx.Response(429), httpx.Response(200)])
+
+        assert response.status_code == 200
+        assert len(calls) == 2
+        mock_sleep.assert_awaited_once_with(2)
+
 
 class TestExtractVersion:
     def test_extract_version_with_group(self):